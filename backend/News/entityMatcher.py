@@ -0,0 +1,215 @@
+import re
+from collections import deque
+from typing import Iterable, Optional
+
+# ---------- configuration ---------- #
+_TAGGER_NAME   = "entities"        # tagger_state key in the news archive
+_MIN_NAME_LEN  = 3                 # shorter normalised names are too ambiguous
+# Upper-case words that are also listed tickers but mostly appear as plain English
+_TICKER_STOPWORDS = {
+    "A", "AI", "ALL", "AM", "AN", "ARE", "AT", "BE", "BIG", "CAN", "CEO", "CFO",
+    "EPS", "ETF", "EU", "FDA", "FOR", "GDP", "GO", "HAS", "IPO", "IT", "NEW", "NOW",
+    "ON", "ONE", "OUT", "PM", "REAL", "SEC", "SEE", "SO", "TV", "UK", "US", "USA",
+}
+# Legal suffixes stripped from SEC titles ("NVIDIA CORP" → "nvidia")
+_NAME_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited",
+    "plc", "llc", "lp", "sa", "nv", "ag", "se", "holdings", "holding", "group",
+    "the", "de", "class", "a", "b", "c", "new",
+}
+# Hand-maintained names the SEC title does not cover
+DEFAULT_ALIASES = {
+    "GOOGL": ["Google", "Alphabet"],
+    "GOOG":  ["Google", "Alphabet"],
+    "META":  ["Facebook", "Meta Platforms"],
+    "RKLB":  ["Rocket Lab"],
+    "NVDA":  ["Nvidia"],
+    "BRK-B": ["Berkshire Hathaway", "Berkshire"],
+}
+# ----------------------------------- #
+
+_WORD_RE = re.compile(r"[a-z0-9&]+")
+
+
+def normalise_name(title: str) -> str:
+    """Lower-case a company title and drop punctuation and trailing legal suffixes."""
+    words = _WORD_RE.findall(title.lower())
+    while words and words[-1] in _NAME_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+class AhoCorasick:
+    """
+    Minimal Aho–Corasick automaton over characters.
+
+    `search` walks the text once and reports every (start, end, pattern_id) hit,
+    regardless of how many patterns were added.
+    """
+
+    def __init__(self):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        self._lengths: list[int] = []
+
+    def add(self, pattern: str) -> int:
+        """Insert `pattern` and return its id."""
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        pattern_id = len(self._lengths)
+        self._out[node].append(pattern_id)
+        self._lengths.append(len(pattern))
+        return pattern_id
+
+    def build(self) -> "AhoCorasick":
+        """Compute failure links breadth-first; must be called after the last `add`."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        return self
+
+    def search(self, text: str) -> list[tuple[int, int, int]]:
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        hits = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pattern_id in out[node]:
+                hits.append((i + 1 - lengths[pattern_id], i + 1, pattern_id))
+        return hits
+
+
+class EntityMatcher:
+    """
+    Tags free text with every ticker whose symbol, company name or alias occurs in it.
+
+    • Names/aliases match case-insensitively but must start with a capital letter
+      in the original text (they are proper nouns).
+    • Symbols match as upper-case words ("NVDA") or cashtags ("$NVDA"); symbols in
+      `_TICKER_STOPWORDS` or single letters only count as cashtags.
+    • Matches contained in a longer match are dropped, so "Apple Hospitality" does
+      not also tag AAPL.
+    """
+
+    def __init__(self, entries: Iterable[dict], aliases: Optional[dict[str, list[str]]] = None):
+        self._automaton = AhoCorasick()
+        self._pattern_ids: dict[tuple[str, bool], int] = {}
+        self._tickers: list[set[str]] = []
+        self._is_symbol: list[bool] = []
+
+        for entry in entries:
+            ticker = entry["ticker"].upper()
+            self._add(ticker.lower(), ticker, is_symbol=True)
+            name = normalise_name(entry.get("title", ""))
+            if len(name) >= _MIN_NAME_LEN:
+                self._add(name, ticker, is_symbol=False)
+        for ticker, names in (DEFAULT_ALIASES if aliases is None else aliases).items():
+            for name in names:
+                self._add(normalise_name(name) or name.lower(), ticker.upper(), is_symbol=False)
+
+        self._automaton.build()
+
+    def _add(self, pattern: str, ticker: str, is_symbol: bool) -> None:
+        key = (pattern, is_symbol)
+        pattern_id = self._pattern_ids.get(key)
+        if pattern_id is None:
+            pattern_id = self._automaton.add(pattern)
+            self._pattern_ids[key] = pattern_id
+            self._tickers.append(set())
+            self._is_symbol.append(is_symbol)
+        self._tickers[pattern_id].add(ticker)
+
+    @classmethod
+    def from_sec(cls, aliases: Optional[dict[str, list[str]]] = None) -> "EntityMatcher":
+        """Build a matcher over the full SEC `company_tickers.json` universe."""
+        from Random.tickerUniverse import load_universe
+        return cls(load_universe(), aliases)
+
+    def _accept(self, text: str, start: int, end: int, pattern_id: int) -> bool:
+        # Word boundaries on both sides
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        if end < len(text) and text[end].isalnum():
+            return False
+
+        span = text[start:end]
+        if self._is_symbol[pattern_id]:
+            cashtag = start > 0 and text[start - 1] == "$"
+            if cashtag:
+                return True
+            return span.isupper() and len(span) > 1 and span not in _TICKER_STOPWORDS
+        return span[0].isupper() or span[0].isdigit()
+
+    def match(self, text: Optional[str]) -> set[str]:
+        """Return every ticker mentioned in `text`."""
+        if not text:
+            return set()
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters expand when lower-cased; keep offsets aligned
+            lowered = "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+
+        hits = [
+            (start, end, pid)
+            for start, end, pid in self._automaton.search(lowered)
+            if self._accept(text, start, end, pid)
+        ]
+        # Keep only maximal matches: sort by start, longest first, then sweep
+        hits.sort(key=lambda h: (h[0], -h[1]))
+        tickers: set[str] = set()
+        covered_until = -1
+        for start, end, pid in hits:
+            if end <= covered_until:
+                continue
+            tickers |= self._tickers[pid]
+            covered_until = max(covered_until, end)
+        return tickers
+
+    def tag_archive(self, archive, tagger: str = _TAGGER_NAME) -> int:
+        """
+        Tag every article the archive has not run through this matcher yet.
+
+        Args:
+            archive: A `News.newsArchive.NewsArchive`.
+            tagger: Progress key, so re-runs only look at new articles.
+
+        Returns:
+            The number of (ticker, article) tags written.
+        """
+        written = 0
+        for rows in archive.untagged_articles(tagger):
+            tags = []
+            for article_id, title, description, content in rows:
+                text = " \n ".join(part for part in (title, description, content) if part)
+                tags.extend((ticker, article_id) for ticker in self.match(text))
+            archive.add_tags(tagger, tags, last_article_id=rows[-1][0])
+            written += len(tags)
+        return written
+
+
+if __name__ == "__main__":
+    from News.newsArchive import NewsArchive
+
+    matcher = EntityMatcher.from_sec()
+    archive = NewsArchive()
+    archive.ingest("stocks OR shares OR earnings", tag="broad")
+    print(f"Wrote {matcher.tag_archive(archive)} ticker tags")
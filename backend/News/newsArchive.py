@@ -0,0 +1,466 @@
+import os
+import sqlite3
+import datetime as dt
+from contextlib import closing
+from typing import Iterator, Optional
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from TechnicalAnalysis import httpClients
+from TechnicalAnalysis import metrics
+
+load_dotenv()
+
+# ---------- configuration ---------- #
+_ARCHIVE_FILE = os.environ.get("NEWS_ARCHIVE_FILE", "news_archive.sqlite3")
+_NEWS_API_URL = os.environ.get("NEWS_API_URL", "https://newsapi.org/v2/everything")
+_PAGE_SIZE    = 100                 # NewsAPI maximum
+_MAX_PAGES    = 50                  # hard stop for a single ingest
+_LOOKBACK     = 28                  # days fetched for a query seen for the first time
+_TIMEOUT      = 30                  # seconds
+# ----------------------------------- #
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id           INTEGER PRIMARY KEY,
+    url          TEXT NOT NULL UNIQUE,
+    published_at TEXT NOT NULL,
+    source       TEXT,
+    author       TEXT,
+    title        TEXT,
+    description  TEXT,
+    content      TEXT
+);
+CREATE INDEX IF NOT EXISTS articles_published_at ON articles (published_at);
+
+CREATE TABLE IF NOT EXISTS article_tags (
+    tag        TEXT    NOT NULL,
+    article_id INTEGER NOT NULL REFERENCES articles (id),
+    PRIMARY KEY (tag, article_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ingest_state (
+    query             TEXT PRIMARY KEY,
+    last_published_at TEXT NOT NULL,
+    backfill_from     TEXT,
+    backfill_to       TEXT
+);
+
+CREATE TABLE IF NOT EXISTS tagger_state (
+    name            TEXT PRIMARY KEY,
+    last_article_id INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sentiment_scores (
+    model     TEXT NOT NULL,
+    text_hash BLOB NOT NULL,
+    score     REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS article_sentiment (
+    model      TEXT    NOT NULL,
+    article_id INTEGER NOT NULL REFERENCES articles (id),
+    score      REAL    NOT NULL,
+    PRIMARY KEY (model, article_id)
+) WITHOUT ROWID;
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5 (
+    title, description, content,
+    content='articles', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, description, content)
+    VALUES (new.id, new.title, new.description, new.content);
+END;
+"""
+
+_COLUMNS = ["url", "published_at", "source", "author", "title", "description"]
+
+
+def _to_iso(value) -> Optional[str]:
+    """Normalise a date/datetime/string to the `YYYY-MM-DDTHH:MM:SSZ` form NewsAPI uses."""
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class NewsArchive:
+    """
+    Local SQLite store of NewsAPI articles.
+
+    • Articles are deduplicated by URL; every article can carry any number of tags
+      (the query or ticker it was ingested for).
+    • `ingest` only pulls articles newer than the last stored `publishedAt` for
+      that query and follows NewsAPI pagination. When the plan's result cap cuts
+      a pull short, the range it did not reach is remembered as a backfill
+      cursor and fetched (with `to=`) on later runs.
+    • `search` answers keyword (FTS5) / tag / date-range queries from the index.
+    """
+
+    def __init__(self, path: str = _ARCHIVE_FILE, api_url: str = _NEWS_API_URL):
+        self.path = path
+        self.api_url = api_url
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+            # Archives created before the backfill cursor existed
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(ingest_state)")}
+            for column in ("backfill_from", "backfill_to"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE ingest_state ADD COLUMN {column} TEXT")
+            try:
+                conn.executescript(_FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5 – fall back to LIKE scans
+                self.has_fts = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    # ------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------
+    def last_published_at(self, query: str) -> Optional[str]:
+        """Newest `publishedAt` already stored for `query` (None if never ingested)."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT last_published_at FROM ingest_state WHERE query = ?", (query,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def backfill_range(self, query: str) -> Optional[tuple[str, str]]:
+        """(from, to) range a capped pull of `query` has not fetched yet, or None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT backfill_from, backfill_to FROM ingest_state WHERE query = ?", (query,)
+            ).fetchone()
+        return (row[0], row[1]) if row and row[1] else None
+
+    def _pages(self, query: str, since: str, api_key: str, language: str,
+               until: Optional[str] = None) -> Iterator[tuple[list[dict], bool]]:
+        """
+        Yield (articles, last) pages, newest first (up to `until` when given),
+        until the page runs past `since`.
+
+        `last` is True only on the page that completes the pagination; when the plan's
+        result cap or _MAX_PAGES stops it early, no page is marked last.
+        """
+        for page in range(1, _MAX_PAGES + 1):
+            params = {
+                "q": query,
+                "from": since,
+                "sortBy": "publishedAt",
+                "language": language,
+                "pageSize": _PAGE_SIZE,
+                "page": page,
+                "apiKey": api_key,
+            }
+            if until:
+                params["to"] = until
+            with metrics.upstream("newsapi"):
+                resp = httpClients.get(self.api_url, params=params, timeout=_TIMEOUT)
+                data = resp.json()
+            if data.get("status") != "ok":
+                # The free plan caps results; anything already pulled is still valid
+                if data.get("code") == "maximumResultsReached":
+                    return
+                raise RuntimeError(f"NewsAPI error: {data.get('message', 'Unknown error')}")
+
+            articles = data.get("articles") or []
+            last = (len(articles) < _PAGE_SIZE
+                    or page * _PAGE_SIZE >= data.get("totalResults", 0)
+                    or (articles and _to_iso(articles[-1].get("publishedAt")) <= since))
+            yield articles, bool(last)
+            if last:
+                return
+
+    def _store_page(self, query: str, tag: str, articles: list[dict],
+                    floor: Optional[str]) -> tuple[int, Optional[str], Optional[str]]:
+        """
+        Write one page in its own transaction and advance the query's watermark.
+
+        Returns:
+            (articles inserted, newest and oldest `publishedAt` on the page).
+        """
+        inserted, newest, oldest = 0, None, None
+        with closing(self._connect()) as conn, conn:
+            for art in articles:
+                published = _to_iso(art.get("publishedAt"))
+                url = art.get("url")
+                # Same-second articles are common; repeats are caught by the URL key
+                if not url or not published or (floor and published < floor):
+                    continue
+
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO articles "
+                    "(url, published_at, source, author, title, description, content) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        url,
+                        published,
+                        (art.get("source") or {}).get("name"),
+                        art.get("author"),
+                        art.get("title"),
+                        art.get("description"),
+                        art.get("content"),
+                    ),
+                )
+                inserted += cur.rowcount
+                conn.execute(
+                    "INSERT OR IGNORE INTO article_tags (tag, article_id) "
+                    "SELECT ?, id FROM articles WHERE url = ?",
+                    (tag, url),
+                )
+                newest = published if newest is None or published > newest else newest
+                oldest = published if oldest is None or published < oldest else oldest
+
+            if newest is not None:
+                conn.execute(
+                    "INSERT INTO ingest_state (query, last_published_at) VALUES (?, ?) "
+                    "ON CONFLICT (query) DO UPDATE SET "
+                    "last_published_at = max(last_published_at, excluded.last_published_at)",
+                    (query, newest),
+                )
+        return inserted, newest, oldest
+
+    def _set_backfill(self, query: str, start: Optional[str], end: Optional[str]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE ingest_state SET backfill_from = ?, backfill_to = ? WHERE query = ?",
+                (start, end, query),
+            )
+
+    def ingest(self, query: str, tag: Optional[str] = None,
+               api_key: Optional[str] = None, language: str = "en") -> int:
+        """
+        Pull every article for `query` newer than what is already stored, then
+        continue any backfill a capped earlier pull left behind.
+
+        Each page is committed on its own, and the watermark always moves to the
+        newest stored article. If the result cap stops the pull early, the range
+        between the old watermark and the oldest article fetched becomes the
+        backfill cursor; later runs page through it with `to=` until it is done.
+
+        Args:
+            query: NewsAPI `q` expression, e.g. "Nvidia".
+            tag: Label stored with every article (defaults to the query), e.g. "NVDA".
+            api_key: NewsAPI key; falls back to the NEWS_API_KEY environment variable.
+            language: NewsAPI language filter.
+
+        Returns:
+            The number of new articles written to the archive.
+        """
+        api_key = api_key or os.environ.get("NEWS_API_KEY")
+        if not api_key:
+            raise EnvironmentError("Set your NewsAPI key in the NEWS_API_KEY environment variable.")
+        tag = tag or query
+
+        last = self.last_published_at(query)
+        since = last or _to_iso(dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=_LOOKBACK))
+        pending = self.backfill_range(query)
+        inserted = 0
+
+        # Newer articles first
+        complete, oldest = False, None
+        for articles, complete in self._pages(query, since, api_key, language):
+            count, _, page_oldest = self._store_page(query, tag, articles, last)
+            inserted += count
+            oldest = page_oldest if oldest is None or (page_oldest and page_oldest < oldest) else oldest
+        if not complete and oldest is not None and oldest > since:
+            # An earlier gap further back stays covered by widening its start
+            pending = (pending[0] if pending else since, oldest)
+            self._set_backfill(query, *pending)
+            return inserted
+
+        # Then the range an earlier capped pull did not reach, newest first
+        if pending is not None:
+            start, cursor = pending
+            complete = False
+            for articles, complete in self._pages(query, start, api_key, language, until=cursor):
+                count, _, page_oldest = self._store_page(query, tag, articles, None)
+                inserted += count
+                if page_oldest is not None and page_oldest < cursor:
+                    cursor = page_oldest
+                    self._set_backfill(query, start, cursor)
+            if complete:
+                self._set_backfill(query, None, None)
+
+        return inserted
+
+    # ------------------------------------------------------------
+    # Tagging
+    # ------------------------------------------------------------
+    def untagged_articles(self, tagger: str, batch_size: int = 5000) -> Iterator[list[tuple]]:
+        """
+        Yield batches of (id, title, description, content) rows that `tagger`
+        has not processed yet, oldest first.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT last_article_id FROM tagger_state WHERE name = ?", (tagger,)
+            ).fetchone()
+            last_id = row[0] if row else 0
+            while True:
+                rows = conn.execute(
+                    "SELECT id, title, description, content FROM articles "
+                    "WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+                if not rows:
+                    return
+                yield rows
+                last_id = rows[-1][0]
+
+    def add_tags(self, tagger: str, tags: list[tuple[str, int]], last_article_id: int) -> None:
+        """Store (tag, article_id) pairs and remember how far `tagger` got."""
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO article_tags (tag, article_id) VALUES (?, ?)", tags
+            )
+            conn.execute(
+                "INSERT INTO tagger_state (name, last_article_id) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET last_article_id = excluded.last_article_id",
+                (tagger, last_article_id),
+            )
+
+    # ------------------------------------------------------------
+    # Sentiment scores
+    # ------------------------------------------------------------
+    def cached_scores(self, model: str, hashes: list[bytes]) -> dict[bytes, float]:
+        """Scores `model` already gave to the texts with these hashes."""
+        found = {}
+        with closing(self._connect()) as conn:
+            # Stay under SQLite's bound-parameter limit
+            for lo in range(0, len(hashes), 500):
+                chunk = hashes[lo:lo + 500]
+                rows = conn.execute(
+                    f"SELECT text_hash, score FROM sentiment_scores WHERE model = ? "
+                    f"AND text_hash IN ({', '.join('?' * len(chunk))})",
+                    [model, *chunk],
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def add_scores(self, model: str, scores: list[tuple[bytes, float]],
+                   articles: Optional[list[tuple[int, float]]] = None,
+                   last_article_id: Optional[int] = None) -> None:
+        """
+        Store (text_hash, score) pairs for `model`, plus optional per-article
+        scores and how far the archive scorer for `model` got.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sentiment_scores (model, text_hash, score) VALUES (?, ?, ?)",
+                [(model, h, s) for h, s in scores],
+            )
+            if articles:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO article_sentiment (model, article_id, score) VALUES (?, ?, ?)",
+                    [(model, a, s) for a, s in articles],
+                )
+            if last_article_id is not None:
+                conn.execute(
+                    "INSERT INTO tagger_state (name, last_article_id) VALUES (?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET last_article_id = excluded.last_article_id",
+                    (f"sentiment:{model}", last_article_id),
+                )
+
+    def sentiment(self, model: str, tag: Optional[str] = None,
+                  start=None, end=None) -> pd.DataFrame:
+        """Per-article `model` scores (published_at, title, score), oldest first."""
+        sql = ("SELECT a.published_at, a.title, s.score FROM article_sentiment s "
+               "JOIN articles a ON a.id = s.article_id WHERE s.model = ?")
+        params: list = [model]
+        if tag:
+            sql += " AND a.id IN (SELECT article_id FROM article_tags WHERE tag = ?)"
+            params.append(tag)
+        if start is not None:
+            sql += " AND a.published_at >= ?"
+            params.append(_to_iso(start))
+        if end is not None:
+            sql += " AND a.published_at < ?"
+            params.append(_to_iso(end))
+        sql += " ORDER BY a.published_at"
+
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        df["published_at"] = pd.to_datetime(df["published_at"], utc=True)
+        return df
+
+    def tagged_sentiment(self, model: str, start=None) -> pd.DataFrame:
+        """(tag, published_at, score) of every tagged article `model` has scored."""
+        sql = ("SELECT t.tag, a.published_at, s.score FROM article_sentiment s "
+               "JOIN articles a ON a.id = s.article_id "
+               "JOIN article_tags t ON t.article_id = s.article_id WHERE s.model = ?")
+        params: list = [model]
+        if start is not None:
+            sql += " AND a.published_at >= ?"
+            params.append(_to_iso(start))
+
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        df["published_at"] = pd.to_datetime(df["published_at"], utc=True)
+        return df
+
+    # ------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------
+    def search(self, text: Optional[str] = None, tag: Optional[str] = None,
+               start=None, end=None, limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Return archived articles (oldest first) matching every given filter.
+
+        Args:
+            text: Full-text expression (FTS5 syntax) over title/description/content.
+            tag: Only articles carrying this tag, e.g. "NVDA".
+            start: Inclusive lower bound on `published_at` (date, datetime or string).
+            end: Exclusive upper bound on `published_at`.
+            limit: Maximum number of rows (newest rows are kept).
+        """
+        clauses, params = [], []
+        if text:
+            if self.has_fts:
+                clauses.append("a.id IN (SELECT rowid FROM articles_fts WHERE articles_fts MATCH ?)")
+                params.append(text)
+            else:
+                clauses.append("(a.title LIKE ? OR a.description LIKE ? OR a.content LIKE ?)")
+                params.extend([f"%{text}%"] * 3)
+        if tag:
+            clauses.append("a.id IN (SELECT article_id FROM article_tags WHERE tag = ?)")
+            params.append(tag)
+        if start is not None:
+            clauses.append("a.published_at >= ?")
+            params.append(_to_iso(start))
+        if end is not None:
+            clauses.append("a.published_at < ?")
+            params.append(_to_iso(end))
+
+        sql = f"SELECT {', '.join('a.' + c for c in _COLUMNS)} FROM articles a"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY a.published_at DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        df["published_at"] = pd.to_datetime(df["published_at"], utc=True)
+        return df.iloc[::-1].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    archive = NewsArchive()
+    added = archive.ingest("Nvidia", tag="NVDA")
+    print(f"Archived {added} new articles")
+
+    recent = archive.search(tag="NVDA", start=dt.date.today() - dt.timedelta(days=7))
+    print(recent[["published_at", "title"]].tail(10).to_string(index=False))
@@ -0,0 +1,146 @@
+import datetime as dt
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# ---------- configuration ---------- #
+_MARKET_TZ    = "US/Eastern"
+_OPEN_TIME    = dt.time(9, 30)
+_CLOSE_TIME   = dt.time(16, 0)
+# ----------------------------------- #
+
+PRE_MARKET, REGULAR, AFTER_HOURS = 0, 1, 2
+PHASE_NAMES = np.array(["pre-market", "regular", "after-hours"])
+
+
+def _ns(index: pd.DatetimeIndex) -> np.ndarray:
+    """int64 nanoseconds since the epoch (UTC for tz-aware input), whatever the index resolution."""
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+
+def session_calendar(trading_days: Iterable,
+                     early_closes: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Build the session table every article is mapped onto.
+
+    Args:
+        trading_days: The session dates, e.g. the date index of the daily bars.
+        early_closes: Optional {date: datetime.time} for half days.
+
+    Returns:
+        A DataFrame indexed by session date (ascending) with int64 UTC-nanosecond
+        `open` and `close` columns.
+    """
+    days = pd.DatetimeIndex(pd.to_datetime(list(trading_days))).normalize().unique().sort_values()
+    if days.tz is not None:
+        days = days.tz_localize(None)
+
+    close_offsets = np.full(len(days), pd.Timedelta(hours=_CLOSE_TIME.hour, minutes=_CLOSE_TIME.minute).value)
+    for day, close in (early_closes or {}).items():
+        pos = days.get_indexer([pd.Timestamp(day)])[0]
+        if pos >= 0:
+            close_offsets[pos] = pd.Timedelta(hours=close.hour, minutes=close.minute).value
+
+    open_offset = pd.Timedelta(hours=_OPEN_TIME.hour, minutes=_OPEN_TIME.minute)
+    opens = (days + open_offset).tz_localize(_MARKET_TZ).tz_convert("UTC")
+    closes = (days + pd.to_timedelta(close_offsets)).tz_localize(_MARKET_TZ).tz_convert("UTC")
+
+    return pd.DataFrame(
+        {"open": _ns(opens), "close": _ns(closes)},
+        index=pd.Index(days.date, name="date"),
+    )
+
+
+def assign_sessions(published_at, calendar: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Map article timestamps to the first session whose close is after them.
+
+    Pre-market and regular-hours news lands on the same day's session; after-hours,
+    overnight and weekend news lands on the next session.
+
+    Returns:
+        (session positions into `calendar`, phase codes). Articles after the last
+        session's close, or before the first session's date (US/Eastern), get
+        position -1.
+    """
+    ts = pd.DatetimeIndex(pd.to_datetime(published_at, utc=True))
+    ts_ns = _ns(ts)
+    closes = calendar["close"].to_numpy()
+    opens = calendar["open"].to_numpy()
+
+    pos = np.searchsorted(closes, ts_ns, side="right")
+    # The first session's window starts at midnight of its own date: there is no
+    # earlier close in the calendar to take the overnight news from
+    first_start = _ns(pd.DatetimeIndex([calendar.index[0]]).tz_localize(_MARKET_TZ))[0] if len(closes) else 0
+    valid = (pos < len(closes)) & (ts_ns >= first_start)
+    safe = np.where(valid, pos, 0)
+
+    # Anything before the open is pre-market if it is on the session's own date
+    local_day = _ns(ts.tz_convert(_MARKET_TZ).tz_localize(None).normalize())
+    session_day = _ns(pd.DatetimeIndex(calendar.index))[safe]
+    phase = np.where(
+        ts_ns >= opens[safe], REGULAR,
+        np.where(local_day == session_day, PRE_MARKET, AFTER_HOURS),
+    )
+
+    return np.where(valid, pos, -1), phase
+
+
+def aggregate_sentiment(published_at, scores, calendar: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate per-article scores onto sessions with one `searchsorted` + `bincount`.
+
+    Returns:
+        A DataFrame indexed like `calendar` with `sentiment_score` (sum),
+        `article_count` and `mean_sentiment` columns.
+    """
+    pos, _ = assign_sessions(published_at, calendar)
+    scores = np.asarray(scores, dtype=np.float64)
+    keep = pos >= 0
+    n = len(calendar)
+
+    total = np.bincount(pos[keep], weights=scores[keep], minlength=n)
+    count = np.bincount(pos[keep], minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total / count, 0.0)
+
+    return pd.DataFrame(
+        {"sentiment_score": total, "article_count": count, "mean_sentiment": mean},
+        index=calendar.index,
+    )
+
+
+def decay_weighted(values, half_life: float) -> np.ndarray:
+    """
+    Exponentially decayed running sum, y[t] = x[t] + d * y[t-1] with d = 0.5 ** (1 / half_life).
+
+    `half_life` is measured in sessions.
+    """
+    decay = 0.5 ** (1.0 / half_life)
+    # ewm(adjust=False) computes (1-d)*x[t] + d*y[t-1]; a leading zero makes the
+    # recursion start from y[-1] = 0 so rescaling by 1/(1-d) gives the plain sum
+    series = pd.Series(np.concatenate(([0.0], np.asarray(values, dtype=np.float64))))
+    return series.ewm(alpha=1.0 - decay, adjust=False).mean().to_numpy()[1:] / (1.0 - decay)
+
+
+def sentiment_for_bars(bar_dates, published_at, scores,
+                       half_life: Optional[float] = None,
+                       early_closes: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Session-aligned sentiment for a series of daily bars, ready to assign as columns.
+
+    Args:
+        bar_dates: Dates of the daily bars (one session each).
+        published_at: Article timestamps (UTC or tz-aware).
+        scores: Per-article sentiment scores.
+        half_life: If given, adds a `decayed_sentiment` column with that half-life
+                   in sessions.
+    """
+    calendar = session_calendar(bar_dates, early_closes)
+    sentiment = aggregate_sentiment(published_at, scores, calendar)
+    if half_life:
+        sentiment["decayed_sentiment"] = decay_weighted(sentiment["sentiment_score"], half_life)
+    return sentiment
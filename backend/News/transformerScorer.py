@@ -0,0 +1,227 @@
+"""
+CPU-only FinBERT sentiment scores for headlines and archived articles.
+
+The model is loaded once per process: from an ONNX export when
+FINBERT_ONNX_DIR points at one (model.onnx plus the tokenizer files, as written
+by `optimum-cli export onnx --model ProsusAI/finbert`), otherwise as the PyTorch
+model with its Linear layers dynamically quantized to int8.
+
+Texts are tokenized once without padding, sorted by token count and cut into
+batches whose padded size (rows × longest row) stays under
+SENTIMENT_BATCH_TOKENS. Short headlines therefore run in wide batches and a few
+long articles do not pad everyone else out to 256 tokens.
+
+Every score is kept in the news archive (sentiment_scores, keyed by model and a
+hash of the text), so a headline is only run through the model once however
+many scripts or articles repeat it.
+
+    score = P(positive) − P(negative)   ∈ [−1, 1], like VADER's compound score
+
+transformers plus torch (or onnxruntime) are optional dependencies; `available()`
+says whether they are installed.
+"""
+import os
+import hashlib
+import threading
+from typing import Optional, Sequence
+
+import numpy as np
+
+from TechnicalAnalysis import metrics
+
+# ---------- configuration ---------- #
+_MODEL         = os.environ.get("FINBERT_MODEL", "ProsusAI/finbert")
+_ONNX_DIR      = os.environ.get("FINBERT_ONNX_DIR")               # exported model, if any
+_MAX_TOKENS    = 256                                              # longer texts are truncated
+_BATCH_TOKENS  = int(os.environ.get("SENTIMENT_BATCH_TOKENS", "8192"))   # padded tokens per call
+_MAX_BATCH     = 128                                              # rows per call
+_THREADS       = int(os.environ.get("SENTIMENT_THREADS", "0"))    # 0 → library default
+_ARCHIVE_BATCH = 2000                                             # articles read per step
+# ----------------------------------- #
+
+
+def available() -> bool:
+    """True when transformers and a runtime (onnxruntime or torch) can be imported."""
+    import importlib.util
+    if importlib.util.find_spec("transformers") is None:
+        return False
+    runtime = "onnxruntime" if _ONNX_DIR else "torch"
+    return importlib.util.find_spec(runtime) is not None
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+class _Model:
+    """Tokenizer plus an ONNX Runtime session or an int8 PyTorch model."""
+
+    def __init__(self, model_name: str = _MODEL, onnx_dir: Optional[str] = _ONNX_DIR):
+        from transformers import AutoConfig, AutoTokenizer
+
+        source = onnx_dir or model_name
+        self.tokenizer = AutoTokenizer.from_pretrained(source)
+        labels = {v.lower(): int(k) for k, v in AutoConfig.from_pretrained(source).id2label.items()}
+        self.positive, self.negative = labels["positive"], labels["negative"]
+
+        if onnx_dir:
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if _THREADS:
+                options.intra_op_num_threads = _THREADS
+            self.session = ort.InferenceSession(os.path.join(onnx_dir, "model.onnx"), options,
+                                                providers=["CPUExecutionProvider"])
+            self.inputs = {i.name for i in self.session.get_inputs()}
+            self.name = f"{model_name}:onnx"
+        else:
+            import torch
+            from transformers import AutoModelForSequenceClassification
+
+            if _THREADS:
+                torch.set_num_threads(_THREADS)
+            model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+            self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            self.session = None
+            self.name = f"{model_name}:int8"
+
+    def logits(self, encoded: dict) -> np.ndarray:
+        if self.session is not None:
+            feed = {k: np.asarray(v, dtype=np.int64) for k, v in encoded.items() if k in self.inputs}
+            return self.session.run(None, feed)[0]
+        import torch
+        with torch.inference_mode():
+            return self.model(**{k: torch.as_tensor(v) for k, v in encoded.items()}).logits.numpy()
+
+
+_models: dict[int, _Model] = {}
+_models_lock = threading.Lock()
+
+
+def _get_model() -> _Model:
+    """The process's model, loaded on first use (and again after a fork)."""
+    pid = os.getpid()
+    model = _models.get(pid)
+    if model is None:
+        with _models_lock:
+            model = _models.get(pid)
+            if model is None:
+                if not available():
+                    raise ImportError("FinBERT scoring needs `pip install transformers torch` "
+                                      "(or onnxruntime with FINBERT_ONNX_DIR)")
+                with metrics.timer("sentiment.load_model"):
+                    model = _models[pid] = _Model()
+    return model
+
+
+def model_name() -> str:
+    """Cache key of the scores this process produces, e.g. 'ProsusAI/finbert:int8'."""
+    return f"{_MODEL}:onnx" if _ONNX_DIR else f"{_MODEL}:int8"
+
+
+def token_batches(lengths: Sequence[int], budget: int = _BATCH_TOKENS,
+                  max_batch: int = _MAX_BATCH) -> list[np.ndarray]:
+    """
+    Group row positions by token count so each batch pads to at most `budget` tokens.
+
+    Returns:
+        Arrays of positions into `lengths`, shortest texts first.
+    """
+    order = np.argsort(np.asarray(lengths), kind="stable")
+    batches, start = [], 0
+    for i in range(1, len(order) + 1):
+        # Sorted ascending, so the newest row sets the padded width
+        if i == len(order) or i - start >= max_batch or (i + 1 - start) * lengths[order[i]] > budget:
+            batches.append(order[start:i])
+            start = i
+    return batches
+
+
+def _run(texts: list[str]) -> np.ndarray:
+    """Model scores for `texts`, in order."""
+    model = _get_model()
+    encoded = model.tokenizer(texts, truncation=True, max_length=_MAX_TOKENS)
+    lengths = [len(ids) for ids in encoded["input_ids"]]
+    scores = np.empty(len(texts))
+    for rows in token_batches(lengths):
+        batch = model.tokenizer.pad({k: [encoded[k][i] for i in rows] for k in encoded.keys()},
+                                    return_tensors="np")
+        with metrics.timer("sentiment.model"):
+            logits = model.logits(dict(batch))
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        scores[rows] = probs[:, model.positive] - probs[:, model.negative]
+    return scores
+
+
+def _archive(archive):
+    if archive is None:
+        from .newsArchive import NewsArchive
+        archive = NewsArchive()
+    return archive
+
+
+def score_texts(texts: Sequence[Optional[str]], archive=None) -> np.ndarray:
+    """
+    FinBERT score of every text; cached scores come from the archive, new ones are stored.
+
+    Args:
+        texts: Headlines or article bodies (None/empty score 0).
+        archive: A `News.newsArchive.NewsArchive` (default: the NEWS_ARCHIVE_FILE one).
+    """
+    archive = _archive(archive)
+    name = model_name()
+    texts = [t or "" for t in texts]
+    hashes = [text_hash(t) for t in texts]
+    cached = archive.cached_scores(name, list({h for h, t in zip(hashes, texts) if t}))
+
+    # One model row per distinct uncached text
+    todo = {}
+    for h, t in zip(hashes, texts):
+        if t and h not in cached:
+            todo.setdefault(h, t)
+    for h, t in zip(hashes, texts):
+        if t:
+            metrics.cache_result("sentiment_scores", hit=h not in todo)
+    if todo:
+        fresh = _run(list(todo.values()))
+        new = list(zip(todo.keys(), fresh.tolist()))
+        archive.add_scores(name, new)
+        cached.update(new)
+    return np.array([cached[h] if t else 0.0 for h, t in zip(hashes, texts)])
+
+
+def score_archive(archive=None, batch_size: int = _ARCHIVE_BATCH) -> int:
+    """
+    Score every archived article this model has not seen yet (title + description).
+
+    Returns:
+        The number of articles scored.
+    """
+    archive = _archive(archive)
+    name = model_name()
+    done = 0
+    for rows in archive.untagged_articles(f"sentiment:{name}", batch_size):
+        texts = [" ".join(part for part in (title, description) if part) for _, title, description, _ in rows]
+        scores = score_texts(texts, archive)
+        archive.add_scores(name, [], [(row[0], s) for row, s in zip(rows, scores.tolist())],
+                           last_article_id=rows[-1][0])
+        done += len(rows)
+    return done
+
+
+if __name__ == "__main__":
+    # Run from backend/:  python -m News.transformerScorer
+    import time
+    import datetime as dt
+
+    from .newsArchive import NewsArchive
+
+    archive = NewsArchive()
+    begin = time.perf_counter()
+    n = score_archive(archive)
+    print(f"Scored {n} articles with {model_name()} in {time.perf_counter() - begin:.1f}s")
+    recent = archive.sentiment(model_name(), tag="NVDA", start=dt.date.today() - dt.timedelta(days=7))
+    print(recent.tail(10).to_string(index=False))
@@ -0,0 +1,203 @@
+"""
+Cross-asset daily OHLCV panels for the ML pipeline.
+
+Each asset's full history is kept locally as one uncompressed .npz under
+ASSET_HISTORY_DIR (day numbers plus an (n, 5) OHLCV block), so a 25-year,
+multi-asset panel is a handful of parallel file reads. Assets missing from the
+local store, or whose history has gone stale, are fetched together in one
+batched yfinance download and written back.
+
+The panel is aligned on a common trading calendar (the dates every asset
+traded, or their union with how="outer") by scattering each asset's rows with
+searchsorted, and held as one (dates, assets, fields) float64 array.
+
+The daily bar store (TechnicalAnalysis.barStore) only keeps a rolling two
+years of Polygon bars and has no index series such as ^VIX, so long ML
+histories live in their own store.
+"""
+import os
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# ---------- configuration ---------- #
+_HISTORY_DIR    = os.environ.get("ASSET_HISTORY_DIR", "asset_history")
+_ASSETS         = os.environ.get("ML_ASSETS", "NVDA,SPY,VIX=^VIX")   # name[=symbol],...
+_MAX_STALE_DAYS = 4                                                # calendar days before a refetch
+_WORKERS        = 8
+# ----------------------------------- #
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def parse_assets(spec: str = _ASSETS) -> dict[str, str]:
+    """'NVDA,SPY,VIX=^VIX' → {'NVDA': 'NVDA', 'SPY': 'SPY', 'VIX': '^VIX'}."""
+    assets = {}
+    for item in spec.split(","):
+        name, _, symbol = item.strip().partition("=")
+        if name:
+            assets[name.strip()] = (symbol or name).strip()
+    return assets
+
+
+class AssetPanel:
+    """
+    Daily OHLCV for several assets on one calendar.
+
+    `values` is (dates, assets, fields) float64; NaN marks a day an asset did
+    not trade (only possible with how="outer").
+    """
+
+    def __init__(self, assets: list[str], dates: np.ndarray, values: np.ndarray):
+        self.assets = list(assets)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.values = values
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.dates.astype("datetime64[ns]"), name="Date")
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __getitem__(self, asset: str) -> pd.DataFrame:
+        """One asset's OHLCV (a view of the panel)."""
+        j = self.assets.index(asset)
+        return pd.DataFrame(self.values[:, j, :], index=self.index, columns=list(FIELDS), copy=False)
+
+    def field(self, field: str) -> pd.DataFrame:
+        """One field for every asset, e.g. field('Close') → dates × assets."""
+        k = FIELDS.index(field)
+        return pd.DataFrame(self.values[:, :, k], index=self.index, columns=self.assets)
+
+    def frame(self) -> pd.DataFrame:
+        """Everything as one frame with (asset, field) MultiIndex columns."""
+        columns = pd.MultiIndex.from_product([self.assets, FIELDS], names=["asset", "field"])
+        flat = self.values.reshape(len(self.dates), -1)
+        return pd.DataFrame(flat, index=self.index, columns=columns, copy=False)
+
+    def since(self, start) -> "AssetPanel":
+        i = np.searchsorted(self.dates, np.datetime64(start, "D"))
+        return AssetPanel(self.assets, self.dates[i:], self.values[i:])
+
+
+# ------------------------------------------------------------
+# Local history store:  <dir>/<symbol>.npz  → days (int64), ohlcv (n, 5)
+# ------------------------------------------------------------
+def _history_path(symbol: str, history_dir: str) -> str:
+    return os.path.join(history_dir, symbol.replace("/", "_") + ".npz")
+
+
+def _read_history(symbol: str, history_dir: str) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    try:
+        with np.load(_history_path(symbol, history_dir)) as data:
+            return data["days"].astype("datetime64[D]"), data["ohlcv"]
+    except FileNotFoundError:
+        return None
+
+
+def _write_history(symbol: str, history_dir: str, dates: np.ndarray, ohlcv: np.ndarray) -> None:
+    os.makedirs(history_dir, exist_ok=True)
+    path = _history_path(symbol, history_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        np.savez(fh, days=dates.astype("datetime64[D]").astype(np.int64), ohlcv=ohlcv)
+    os.replace(tmp, path)
+
+
+def _download(symbols: list[str]) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """Full daily history of every symbol in one batched yfinance call."""
+    import yfinance as yf
+
+    data = yf.download(symbols, period="max", group_by="ticker", auto_adjust=True,
+                       progress=False, threads=True)
+    result = {}
+    for symbol in symbols:
+        df = data[symbol] if isinstance(data.columns, pd.MultiIndex) else data
+        df = df[list(FIELDS)].dropna(subset=["Close"])
+        if df.empty:
+            continue
+        index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+        result[symbol] = (index.values.astype("datetime64[D]"), df.to_numpy(dtype=np.float64))
+    return result
+
+
+def load_histories(symbols: list[str], history_dir: str = _HISTORY_DIR,
+                   refresh: bool = False) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """
+    (dates, ohlcv) per symbol: local files read in parallel, one download for the rest.
+
+    Stale local histories are kept when the download fails; missing ones raise.
+    """
+    with ThreadPoolExecutor(max_workers=min(_WORKERS, max(len(symbols), 1))) as pool:
+        local = dict(zip(symbols, pool.map(lambda s: _read_history(s, history_dir), symbols)))
+
+    oldest = np.datetime64(dt.date.today() - dt.timedelta(days=_MAX_STALE_DAYS), "D")
+    fetch = [s for s, h in local.items() if refresh or h is None or h[0][-1] < oldest]
+    if fetch:
+        try:
+            fresh = _download(fetch)
+        except Exception:
+            if any(local[s] is None for s in fetch):
+                raise
+            fresh = {}
+        for symbol, (dates, ohlcv) in fresh.items():
+            _write_history(symbol, history_dir, dates, ohlcv)
+            local[symbol] = (dates, ohlcv)
+
+    missing = [s for s, h in local.items() if h is None]
+    if missing:
+        raise LookupError(f"No daily history for: {', '.join(missing)}")
+    return local
+
+
+def align(histories: list[tuple[np.ndarray, np.ndarray]], how: str = "inner") -> tuple[np.ndarray, np.ndarray]:
+    """Common calendar and the (dates, assets, fields) array scattered onto it."""
+    combine = np.intersect1d if how == "inner" else np.union1d
+    dates = reduce(combine, (d for d, _ in histories))
+    values = np.full((len(dates), len(histories), len(FIELDS)), np.nan)
+    for j, (d, ohlcv) in enumerate(histories):
+        pos = np.searchsorted(dates, d)
+        hit = pos < len(dates)
+        hit[hit] = dates[pos[hit]] == d[hit]
+        values[pos[hit], j] = ohlcv[hit]
+    return dates, values
+
+
+def load_panel(assets: Optional[dict[str, str]] = None, start: Optional[str] = None,
+               how: str = "inner", history_dir: str = _HISTORY_DIR,
+               refresh: bool = False) -> AssetPanel:
+    """
+    Aligned OHLCV panel for `assets` (name → symbol, default ML_ASSETS).
+
+    Args:
+        assets: Column names and the ticker each is loaded from.
+        start: Drop dates before this (YYYY-MM-DD) before aligning.
+        how: "inner" keeps days every asset traded, "outer" keeps all of them.
+        refresh: Re-download every asset instead of trusting the local store.
+    """
+    assets = assets or parse_assets()
+    histories = load_histories(list(dict.fromkeys(assets.values())), history_dir, refresh)
+    selected = []
+    for symbol in assets.values():
+        dates, ohlcv = histories[symbol]
+        if start is not None:
+            i = np.searchsorted(dates, np.datetime64(start, "D"))
+            dates, ohlcv = dates[i:], ohlcv[i:]
+        selected.append((dates, ohlcv))
+    dates, values = align(selected, how)
+    return AssetPanel(list(assets), dates, values)
+
+
+if __name__ == "__main__":
+    # Run from backend/:  python -m Random.assetPanel
+    import time
+
+    begin = time.perf_counter()
+    panel = load_panel()
+    print(f"{len(panel.assets)} assets × {len(panel)} days in {time.perf_counter() - begin:.3f}s")
+    print(panel.field("Close").tail())
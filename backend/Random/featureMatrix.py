@@ -0,0 +1,240 @@
+"""
+Contiguous float32 training matrices for the ML pipeline.
+
+`build_matrix` turns an AssetPanel into one C-contiguous (rows, features)
+float32 array plus int8 targets. Features are computed one target symbol at a
+time in float64 and written straight into their rows, so peak memory is the
+matrix itself plus a few columns of a single symbol. Rows with any missing
+feature or no future return are then squeezed out in place: there is no
+dropna copy, and `rows` records where each kept row sat in the
+(dates × symbols) grid.
+
+Rows are ordered by date, then symbol. A walk-forward fold is therefore
+X[:stop] / X[stop:stop + n], which is a view. scikit-learn's tree models
+work in float32 internally, so they also stop converting a float64 frame on
+every fit.
+
+The features follow testing.py's original pandas_ta set, computed with
+TechnicalAnalysis.panelIndicators: EMA/Wilder averages are seeded with a
+simple average, so early values differ slightly from pandas_ta.
+"""
+import os
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from TechnicalAnalysis import panelIndicators
+
+from .assetPanel import FIELDS, AssetPanel
+
+# ---------- configuration ---------- #
+_HORIZON   = 5                      # days ahead for the up/down target
+_CONTEXT   = ("SPY", "VIX")         # assets used as market features, not as targets
+_COPY_ROWS = 65_536                 # rows moved per step when compacting in place
+# ----------------------------------- #
+
+
+def _sample_std(values, period: int) -> np.ndarray:
+    """Rolling standard deviation with ddof=1, like pandas `rolling(n).std()`."""
+    return panelIndicators.rolling_std(values, period) * np.sqrt(period / (period - 1))
+
+
+def _atr(high, low, close, period: int = 14) -> np.ndarray:
+    prev = np.r_[np.nan, close[:-1]]
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+    return panelIndicators.seeded_ema(tr, period, 1.0 / period)
+
+
+def _bands(close, period: int = 20, k: float = 2.0) -> tuple[np.ndarray, np.ndarray]:
+    mid = panelIndicators.sma(close, period)
+    sd = panelIndicators.rolling_std(close, period)
+    return mid + k * sd, mid - k * sd
+
+
+# feature name → function of the bars dict (Close/High/Low/Volume of the target,
+# plus the close of each context asset under its own name)
+FEATURES: dict[str, Callable[[dict], np.ndarray]] = {
+    "Close":      lambda b: b["Close"],
+    "High":       lambda b: b["High"],
+    "Low":        lambda b: b["Low"],
+    "Volume":     lambda b: b["Volume"],
+    "SPY":        lambda b: b["SPY"],
+    "VIX":        lambda b: b["VIX"],
+    "RSI_14":     lambda b: panelIndicators.rsi(b["Close"], 14),
+    "MACD":       lambda b: panelIndicators.ema(b["Close"], 12) - panelIndicators.ema(b["Close"], 26),
+    "BB_upper":   lambda b: _bands(b["Close"])[0],
+    "BB_lower":   lambda b: _bands(b["Close"])[1],
+    "ATR_14":     lambda b: _atr(b["High"], b["Low"], b["Close"], 14),
+    "OBV":        lambda b: panelIndicators.obv(b["Close"], b["Volume"]),
+    "Ret_1":      lambda b: panelIndicators.pct_change(b["Close"], 1),
+    "Ret_2":      lambda b: panelIndicators.pct_change(b["Close"], 2),
+    "Ret_5":      lambda b: panelIndicators.pct_change(b["Close"], 5),
+    "Ret_10":     lambda b: panelIndicators.pct_change(b["Close"], 10),
+    "Vol_10":     lambda b: _sample_std(panelIndicators.pct_change(b["Close"], 1), 10),
+    "Vol_30":     lambda b: _sample_std(panelIndicators.pct_change(b["Close"], 1), 30),
+    "SPY_Ret_1":  lambda b: panelIndicators.pct_change(b["SPY"], 1),
+    "VIX_Change": lambda b: np.r_[np.nan, np.diff(b["VIX"])],
+}
+
+
+class FeatureMatrix:
+    """
+    Training rows for one or more symbols.
+
+    • X: (rows, features) float32, C-contiguous (or a memmap when built with `path`).
+    • y: int8 up/down target; future_ret: float32 return over the horizon.
+    • dates / symbol_codes: date and index into `symbols` of every row.
+    • rows: position of each row in the (dates × symbols) grid it was built from.
+    """
+
+    def __init__(self, X, y, future_ret, features, dates, symbols, symbol_codes, rows):
+        self.X = X
+        self.y = y
+        self.future_ret = future_ret
+        self.features = list(features)
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.symbol_codes = symbol_codes
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.y)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.X, self.y, self.future_ret, self.dates, self.symbol_codes, self.rows))
+
+    def split(self, stop: int, start: int = 0) -> tuple[np.ndarray, np.ndarray]:
+        """(X, y) views of rows [start, stop)."""
+        return self.X[start:stop], self.y[start:stop]
+
+    def day_starts(self) -> np.ndarray:
+        """Row where each distinct date begins; use these as fold boundaries."""
+        return np.flatnonzero(np.r_[True, self.dates[1:] != self.dates[:-1]])
+
+    def frame(self, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+        """A slice as a DataFrame, for inspection."""
+        sl = slice(start, stop)
+        index = pd.MultiIndex.from_arrays(
+            [pd.DatetimeIndex(self.dates[sl].astype("datetime64[ns]")),
+             np.asarray(self.symbols, dtype=object)[self.symbol_codes[sl]]],
+            names=["Date", "symbol"],
+        )
+        df = pd.DataFrame(self.X[sl], index=index, columns=self.features)
+        df["Target"] = self.y[sl]
+        return df
+
+
+def _compact(X: np.ndarray, keep: np.ndarray) -> int:
+    """Move the rows in `keep` (ascending) to the front of X in place; returns their count."""
+    n = len(keep)
+    for lo in range(0, n, _COPY_ROWS):
+        # Destination rows never pass the source rows still to be read
+        X[lo:min(lo + _COPY_ROWS, n)] = X[keep[lo:lo + _COPY_ROWS]]
+    return n
+
+
+def _context_closes(panel: AssetPanel, context: Sequence[str]) -> dict[str, np.ndarray]:
+    close = FIELDS.index("Close")
+    return {c: panel.values[:, panel.assets.index(c), close] for c in context if c in panel.assets}
+
+
+def _bars(panel: AssetPanel, asset: str, shared: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    j = panel.assets.index(asset)
+    bars = {f: panel.values[:, j, k] for k, f in enumerate(FIELDS)}
+    bars.update(shared)
+    return bars
+
+
+def build_matrix(panel: AssetPanel,
+                 targets: Optional[Sequence[str]] = None,
+                 context: Sequence[str] = _CONTEXT,
+                 horizon: int = _HORIZON,
+                 features: dict[str, Callable] = FEATURES,
+                 path: Optional[str] = None) -> FeatureMatrix:
+    """
+    Feature matrix for every target asset of `panel`.
+
+    Args:
+        panel: Aligned OHLCV panel (see assetPanel.load_panel).
+        targets: Assets to build rows for (default: every asset not in `context`).
+        context: Assets whose closes are available to features under their own name.
+        horizon: Days ahead for the up/down target.
+        features: Name → function of the bars dict.
+        path: Build X as a .npy memmap at this path instead of in RAM.
+    """
+    targets = list(targets) if targets is not None else [a for a in panel.assets if a not in context]
+    n_dates, n_sym, n_feat = len(panel.dates), len(targets), len(features)
+    n_rows = n_dates * n_sym
+    shape = (n_rows, n_feat)
+    if path is not None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        X = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=shape)
+    else:
+        X = np.empty(shape, dtype=np.float32)
+    future = np.empty(n_rows, dtype=np.float32)
+    valid = np.ones(n_rows, dtype=bool)
+
+    shared = _context_closes(panel, context)
+    for s, asset in enumerate(targets):
+        bars = _bars(panel, asset, shared)
+        # Row t * n_sym + s: date-major, so folds by date are contiguous
+        rows = slice(s, None, n_sym)
+        ok = valid[rows]
+        for k, fn in enumerate(features.values()):
+            column = np.asarray(fn(bars), dtype=np.float64)
+            ok &= np.isfinite(column)
+            X[rows, k] = column
+        close = bars["Close"]
+        ret = np.full(n_dates, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret[:-horizon] = close[horizon:] / close[:-horizon] - 1.0
+        ok &= np.isfinite(ret)
+        future[rows] = ret
+
+    keep = np.flatnonzero(valid)
+    n = _compact(X, keep)
+    if path is None:
+        X.resize((n, n_feat), refcheck=False)
+    else:
+        X = X[:n]
+    future = future[keep]
+    y = (future > 0).astype(np.int8)
+    dates = panel.dates[keep // n_sym]
+    codes = (keep % n_sym).astype(np.int16)
+    return FeatureMatrix(X, y, future, features, dates, targets, codes, keep)
+
+
+def latest_rows(panel: AssetPanel,
+                targets: Sequence[str],
+                context: Sequence[str] = _CONTEXT,
+                features: dict[str, Callable] = FEATURES) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Newest complete feature row of each target, for inference.
+
+    Unlike `build_matrix` no future return is needed, so the last bars count.
+
+    Returns:
+        (targets, features) float32 rows (NaN where a target has none) and their dates.
+    """
+    X = np.full((len(targets), len(features)), np.nan, dtype=np.float32)
+    dates = np.full(len(targets), np.datetime64("NaT"), dtype="datetime64[D]")
+    shared = _context_closes(panel, context)
+    for s, asset in enumerate(targets):
+        bars = _bars(panel, asset, shared)
+        columns = np.column_stack([np.asarray(fn(bars), dtype=np.float64) for fn in features.values()])
+        complete = np.flatnonzero(np.isfinite(columns).all(axis=1))
+        if len(complete):
+            X[s] = columns[complete[-1]]
+            dates[s] = panel.dates[complete[-1]]
+    return X, dates
+
+
+if __name__ == "__main__":
+    # Run from backend/:  python -m Random.featureMatrix
+    from . import assetPanel
+
+    fm = build_matrix(assetPanel.load_panel())
+    print(f"{len(fm)} rows × {len(fm.features)} features, {fm.nbytes / 1e6:.1f} MB")
+    print(fm.frame(len(fm) - 5))
@@ -0,0 +1,386 @@
+"""
+Local registry of fitted models, and a micro-batching predictor to serve them.
+
+    <MODEL_REGISTRY_DIR>/<name>/CURRENT           → current version
+    <MODEL_REGISTRY_DIR>/<name>/v<N>/model.pkl    → the pickled estimator
+    <MODEL_REGISTRY_DIR>/<name>/v<N>/spec.json    → features, threshold, task, data, sha256
+
+`save_model` writes a new version and switches CURRENT atomically, like the bar
+store. `get_predictor(name)` unpickles the current version once per process and
+reloads only when CURRENT moves on. Concurrent `predict` calls on one predictor
+are gathered for up to PREDICT_BATCH_WAIT_MS and answered by a single
+predict_proba / predict call over the stacked rows.
+
+`latest_features(spec, symbols)` builds the newest feature row of the model's
+own symbols (data targets and assets) with featureMatrix's feature functions
+over the local asset history; rows are reused for FEATURE_TTL seconds. `precompute_features` (run by the end-of-day
+pipeline) also writes them under FEATURE_CACHE_DIR, where any process reads
+them for FEATURE_DISK_TTL seconds before building its own.
+"""
+import os
+import re
+import json
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+import numpy as np
+
+from TechnicalAnalysis import metrics
+
+from . import assetPanel
+from . import featureMatrix
+
+# ---------- configuration ---------- #
+_REGISTRY_DIR  = os.environ.get("MODEL_REGISTRY_DIR", "model_registry")
+_BATCH_WAIT    = float(os.environ.get("PREDICT_BATCH_WAIT_MS", "2")) / 1000.0
+_MAX_BATCH     = 4096            # rows scored per model call
+_RELOAD_CHECK  = 5.0             # seconds between CURRENT checks
+_FEATURE_TTL   = float(os.environ.get("FEATURE_TTL", "300"))
+_FEATURE_CACHE = 64              # cached latest-feature sets
+_FEATURE_DIR   = os.environ.get("FEATURE_CACHE_DIR", "feature_cache")
+_FEATURE_DISK_TTL = float(os.environ.get("FEATURE_DISK_TTL", str(20 * 3600)))   # until the next close
+# ----------------------------------- #
+
+TASKS = ("classifier", "regressor")
+_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class ModelError(ValueError):
+    """Raised for prediction requests the registry cannot serve."""
+
+
+class ModelNotFound(LookupError):
+    """Raised when no saved model has the requested name."""
+
+
+def _model_dir(name: str, registry_dir: str) -> str:
+    if not _NAME_RE.match(name or ""):
+        raise ModelNotFound(f"Invalid model name '{name}'")
+    return os.path.join(registry_dir, name)
+
+
+def current_version(name: str, registry_dir: str = _REGISTRY_DIR) -> Optional[int]:
+    try:
+        with open(os.path.join(_model_dir(name, registry_dir), "CURRENT"), "r") as fh:
+            return int(fh.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_model(name: str, model, features: Sequence[str], threshold: Optional[float] = None,
+               task: str = "classifier", data: Optional[dict] = None,
+               registry_dir: str = _REGISTRY_DIR) -> int:
+    """
+    Store a fitted estimator as the next version of `name` and make it current.
+
+    Args:
+        name: Registry name, e.g. 'nvda_rf'.
+        model: Fitted estimator (predict_proba for classifiers, predict for regressors).
+        features: Column order the model was trained on.
+        threshold: Calibrated probability cut-off for the signal (classifiers).
+        task: 'classifier' or 'regressor'.
+        data: How to rebuild inputs, e.g. {'assets': ..., 'start': ..., 'context': ..., 'horizon': ...}.
+
+    Returns:
+        The new version number.
+    """
+    if task not in TASKS:
+        raise ValueError(f"task must be one of {', '.join(TASKS)}")
+    root = _model_dir(name, registry_dir)
+    os.makedirs(root, exist_ok=True)
+    version = (current_version(name, registry_dir) or 0) + 1
+    path = os.path.join(root, f"v{version}")
+    os.makedirs(path)
+
+    blob = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(os.path.join(path, "model.pkl"), "wb") as fh:
+        fh.write(blob)
+    spec = {
+        "name": name,
+        "version": version,
+        "task": task,
+        "features": list(features),
+        "threshold": None if threshold is None else float(threshold),
+        "data": data or {},
+        "sha256": hashlib.sha256(blob).hexdigest(),
+        "created": time.time(),
+    }
+    with open(os.path.join(path, "spec.json"), "w") as fh:
+        json.dump(spec, fh, indent=2)
+
+    tmp = os.path.join(root, "CURRENT.tmp")
+    with open(tmp, "w") as fh:
+        fh.write(str(version))
+    os.replace(tmp, os.path.join(root, "CURRENT"))
+    return version
+
+
+def load_model(name: str, version: Optional[int] = None, registry_dir: str = _REGISTRY_DIR):
+    """(estimator, spec) of `version` (default: current); the pickle is checked against its hash."""
+    version = version or current_version(name, registry_dir)
+    if version is None:
+        raise ModelNotFound(f"No saved model named '{name}'")
+    path = os.path.join(_model_dir(name, registry_dir), f"v{version}")
+    with open(os.path.join(path, "spec.json"), "r") as fh:
+        spec = json.load(fh)
+    with open(os.path.join(path, "model.pkl"), "rb") as fh:
+        blob = fh.read()
+    if hashlib.sha256(blob).hexdigest() != spec["sha256"]:
+        raise ModelError(f"{name} v{version}: model.pkl does not match its recorded hash")
+    return pickle.loads(blob), spec
+
+
+def list_models(registry_dir: str = _REGISTRY_DIR) -> list[dict]:
+    """Spec of the current version of every saved model."""
+    specs = []
+    if not os.path.isdir(registry_dir):
+        return specs
+    for name in sorted(os.listdir(registry_dir)):
+        version = current_version(name, registry_dir)
+        if version is not None:
+            with open(os.path.join(registry_dir, name, f"v{version}", "spec.json"), "r") as fh:
+                specs.append(json.load(fh))
+    return specs
+
+
+# ------------------------------------------------------------
+# Serving
+# ------------------------------------------------------------
+class _Pending:
+    __slots__ = ("X", "result", "error", "done")
+
+    def __init__(self, X: np.ndarray):
+        self.X = X
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class Predictor:
+    """One loaded model version; concurrent `predict` calls share model invocations."""
+
+    def __init__(self, model, spec: dict, batch_wait: float = _BATCH_WAIT):
+        self.model = model
+        self.spec = spec
+        self.name = spec["name"]
+        self.version = spec["version"]
+        self.features = spec["features"]
+        self.threshold = spec.get("threshold")
+        self.batch_wait = batch_wait
+        self._queue: list[_Pending] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=f"predict-{self.name}", daemon=True)
+        self._worker.start()
+
+    def _score(self, X: np.ndarray) -> np.ndarray:
+        if self.spec["task"] == "classifier":
+            return self.model.predict_proba(X)[:, 1]
+        return np.asarray(self.model.predict(X), dtype=np.float64)
+
+    def predict(self, X) -> np.ndarray:
+        """Scores for the rows of X: probability of the positive class, or the regression value."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != len(self.features):
+            raise ModelError(f"{self.name} expects rows of {len(self.features)} features: {', '.join(self.features)}")
+        pending = _Pending(X)
+        with self._cond:
+            if self._closed:
+                # Replaced by a newer version after the caller looked it up
+                return self._score(X)
+            self._queue.append(pending)
+            self._cond.notify()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def signals(self, scores: np.ndarray) -> Optional[np.ndarray]:
+        if self.threshold is None:
+            return None
+        return scores >= self.threshold
+
+    def _take_batch(self) -> list[_Pending]:
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            # Give concurrent callers a moment to join the batch
+            deadline = time.monotonic() + self.batch_wait
+            while sum(len(p.X) for p in self._queue) < _MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, rows = [], 0
+            while self._queue and (not batch or rows + len(self._queue[0].X) <= _MAX_BATCH):
+                pending = self._queue.pop(0)
+                batch.append(pending)
+                rows += len(pending.X)
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            try:
+                with metrics.timer("predict.model"):
+                    scores = self._score(np.concatenate([p.X for p in batch]))
+                offset = 0
+                for p in batch:
+                    p.result = scores[offset:offset + len(p.X)]
+                    offset += len(p.X)
+            except Exception as e:
+                for p in batch:
+                    p.error = e
+            for p in batch:
+                p.done.set()
+
+    def close(self) -> None:
+        """Stop the worker once queued requests are answered."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+_predictors: dict[str, tuple[Predictor, float]] = {}
+_predictors_lock = threading.Lock()
+
+
+def get_predictor(name: str, registry_dir: str = _REGISTRY_DIR) -> Predictor:
+    """The loaded current version of `name`, reloaded when a new version is saved."""
+    now = time.monotonic()
+    cached = _predictors.get(name)
+    if cached is not None and now - cached[1] < _RELOAD_CHECK:
+        return cached[0]
+    with _predictors_lock:
+        cached = _predictors.get(name)
+        if cached is not None and now - cached[1] < _RELOAD_CHECK:
+            return cached[0]
+        version = current_version(name, registry_dir)
+        if version is None:
+            raise ModelNotFound(f"No saved model named '{name}'")
+        if cached is not None and cached[0].version == version:
+            predictor = cached[0]
+        else:
+            with metrics.timer("predict.load_model"):
+                model, spec = load_model(name, version, registry_dir)
+            predictor = Predictor(model, spec)
+            if cached is not None:
+                cached[0].close()
+        _predictors[name] = (predictor, now)
+        return predictor
+
+
+# ------------------------------------------------------------
+# Cached latest feature rows
+# ------------------------------------------------------------
+_features: OrderedDict = OrderedDict()
+_features_lock = threading.Lock()
+
+
+def _feature_path(key: tuple, feature_dir: str) -> str:
+    return os.path.join(feature_dir, hashlib.sha1(repr(key).encode()).hexdigest() + ".npz")
+
+
+def _read_features(key: tuple, feature_dir: str) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    path = _feature_path(key, feature_dir)
+    try:
+        if time.time() - os.path.getmtime(path) > _FEATURE_DISK_TTL:
+            return None
+        with np.load(path) as data:
+            return data["X"], data["dates"].astype("datetime64[D]")
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def _write_features(key: tuple, rows: tuple[np.ndarray, np.ndarray], feature_dir: str) -> None:
+    os.makedirs(feature_dir, exist_ok=True)
+    path = _feature_path(key, feature_dir)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as fh:
+        np.savez(fh, X=rows[0], dates=rows[1].astype("datetime64[D]").astype(np.int64))
+    os.replace(tmp, path)
+
+
+def latest_features(spec: dict, symbols: Sequence[str], refresh: bool = False,
+                    feature_dir: str = _FEATURE_DIR) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Newest feature row of each symbol for a model saved with featureMatrix features.
+
+    Only the model's own symbols (its data targets and assets, by ticker or asset
+    name) are served, so a request never triggers a download; their rows are
+    built and cached together.
+
+    Args:
+        refresh: Rebuild from the asset history and rewrite the on-disk copy.
+
+    Returns:
+        (symbols, features) float32 rows (NaN where a symbol has none) and their dates.
+    """
+    unknown = [f for f in spec["features"] if f not in featureMatrix.FEATURES]
+    if unknown:
+        raise ModelError(f"{spec['name']} needs features that are not cached: {', '.join(unknown)}; "
+                         "POST the rows instead")
+    data = spec.get("data") or {}
+    assets = dict(data.get("assets") or assetPanel.parse_assets())
+    covered = sorted(set(data.get("targets") or []) | set(assets.values()))
+    # Asset names ("VIX") and their tickers ("^VIX") both name a covered symbol
+    aliases = {**{s: s for s in covered}, **assets}
+    outside = [s for s in symbols if s not in aliases]
+    if outside:
+        raise ModelError(f"{spec['name']} has no data for {', '.join(outside)}; "
+                         f"one of {', '.join(sorted(aliases))}")
+    for s in covered:
+        assets.setdefault(s, s)
+    context = tuple(data.get("context") or featureMatrix._CONTEXT)
+    key = (tuple(sorted(assets.items())), data.get("start"), context, tuple(covered), tuple(spec["features"]))
+
+    with _features_lock:
+        cached = _features.get(key)
+    fresh = not refresh and cached is not None and time.monotonic() - cached[0] < _FEATURE_TTL
+    metrics.cache_result("predict_features", hit=fresh)
+    if fresh:
+        rows = cached[1]
+    else:
+        rows = None if refresh else _read_features(key, feature_dir)
+        metrics.cache_result("predict_features_disk", hit=rows is not None)
+        if rows is None:
+            with metrics.timer("predict.features"):
+                try:
+                    panel = assetPanel.load_panel(assets, start=data.get("start"))
+                except LookupError as e:
+                    raise ModelError(str(e))
+                rows = featureMatrix.latest_rows(
+                    panel, covered, context, {f: featureMatrix.FEATURES[f] for f in spec["features"]}
+                )
+            _write_features(key, rows, feature_dir)
+        with _features_lock:
+            _features[key] = (time.monotonic(), rows)
+            while len(_features) > _FEATURE_CACHE:
+                _features.popitem(last=False)
+    pick = [covered.index(aliases[s]) for s in symbols]
+    return rows[0][pick], rows[1][pick]
+
+
+def precompute_features(registry_dir: str = _REGISTRY_DIR, feature_dir: str = _FEATURE_DIR) -> list[str]:
+    """
+    Rebuild the latest feature rows of every registered model's own targets.
+
+    Models whose features are not all featureMatrix features are skipped.
+
+    Returns:
+        Names of the models whose rows were written.
+    """
+    done = []
+    for spec in list_models(registry_dir):
+        targets = (spec.get("data") or {}).get("targets")
+        if not targets or any(f not in featureMatrix.FEATURES for f in spec["features"]):
+            continue
+        latest_features(spec, targets, refresh=True, feature_dir=feature_dir)
+        done.append(spec["name"])
+    return done
@@ -1,12 +1,18 @@
-
+import os
 
 import requests
 
 SEC_DOCUMENT_URL = "https://www.sec.gov/files/company_tickers.json"
+# The SEC rejects requests without a descriptive User-Agent
+SEC_USER_AGENT = os.environ.get("SEC_USER_AGENT", "Summer-25Project admin@example.com")
+
 
-def pullTickers():
-    r = requests.get(SEC_DOCUMENT_URL)
-    print(r)
+def pullTickers() -> list[dict]:
+    """Return the SEC ticker list as [{"cik_str": int, "ticker": str, "title": str}, ...]."""
+    r = requests.get(SEC_DOCUMENT_URL, headers={"User-Agent": SEC_USER_AGENT}, timeout=30)
+    r.raise_for_status()
+    return list(r.json().values())
 
 if __name__ == "__main__":
-    pullTickers()
+    tickers = pullTickers()
+    print(f"{len(tickers)} tickers, e.g. {tickers[:3]}")
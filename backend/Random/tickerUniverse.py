@@ -0,0 +1,230 @@
+import os
+import re
+import json
+import bisect
+import datetime as dt
+import threading
+from collections import Counter
+from typing import Optional
+
+import requests
+
+from TechnicalAnalysis import httpClients
+from TechnicalAnalysis import metrics
+
+from .tickerList import SEC_DOCUMENT_URL, SEC_USER_AGENT
+
+# ---------- configuration ---------- #
+_CACHE_FILE = os.environ.get("UNIVERSE_CACHE_FILE", "company_tickers.json")
+_META_FILE  = _CACHE_FILE + ".meta"      # ETag / Last-Modified / last check date
+_TIMEOUT    = 30                         # seconds
+# ----------------------------------- #
+
+_WORD_RE = re.compile(r"[a-z0-9&]+")
+
+
+def _read_json(path: str):
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _write_json(path: str, obj) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(obj, fh)
+    os.replace(tmp, path)
+
+
+def load_universe(force: bool = False) -> list[dict]:
+    """
+    Return the SEC ticker list, downloading `company_tickers.json` at most once a day.
+
+    • The same calendar day → served straight from the local copy.
+    • Otherwise → conditional GET (If-None-Match / If-Modified-Since); a 304 only
+      refreshes the check date.
+    • If the SEC cannot be reached, a stale local copy is still returned.
+    """
+    today = dt.date.today().isoformat()
+    meta = _read_json(_META_FILE) if os.path.isfile(_META_FILE) else {}
+    have_cache = os.path.isfile(_CACHE_FILE)
+
+    if have_cache and not force and meta.get("checked_on") == today:
+        return list(_read_json(_CACHE_FILE).values())
+
+    headers = {"User-Agent": SEC_USER_AGENT}
+    if have_cache:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        with metrics.upstream("sec"):
+            r = httpClients.get(SEC_DOCUMENT_URL, headers=headers, timeout=_TIMEOUT)
+        if r.status_code != 304:
+            r.raise_for_status()
+    except requests.RequestException:
+        if have_cache:
+            return list(_read_json(_CACHE_FILE).values())
+        raise
+
+    if r.status_code == 200:
+        _write_json(_CACHE_FILE, r.json())
+        meta = {
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+        }
+    meta["checked_on"] = today
+    _write_json(_META_FILE, meta)
+
+    return list(_read_json(_CACHE_FILE).values())
+
+
+def _words(text: str) -> list[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TickerIndex:
+    """
+    In-memory lookup structures over the SEC universe.
+
+    • exact symbol / CIK lookups are dict hits;
+    • symbol and name-word prefixes are two `bisect` calls on sorted keys;
+    • fuzzy name search scores candidates that share trigrams with the query.
+    """
+
+    def __init__(self, entries: list[dict]):
+        self.entries = [
+            {"cik_str": int(e["cik_str"]), "ticker": e["ticker"].upper(), "title": e["title"]}
+            for e in entries
+        ]
+
+        self._by_symbol: dict[str, int] = {}
+        self._by_cik: dict[int, list[int]] = {}
+        for i, e in enumerate(self.entries):
+            self._by_symbol.setdefault(e["ticker"], i)
+            self._by_cik.setdefault(e["cik_str"], []).append(i)
+
+        symbols = sorted((e["ticker"], i) for i, e in enumerate(self.entries))
+        self._symbol_keys = [s for s, _ in symbols]
+        self._symbol_ids = [i for _, i in symbols]
+
+        # Every word suffix of a name is a key, so "lab" finds "Rocket Lab USA"
+        names = []
+        self._gram_counts: list[int] = []
+        gram_ids: dict[str, list[int]] = {}
+        for i, e in enumerate(self.entries):
+            words = _words(e["title"])
+            for w in range(len(words)):
+                names.append((" ".join(words[w:]), i))
+            grams = _trigrams(" ".join(words))
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                gram_ids.setdefault(gram, []).append(i)
+        names.sort()
+        self._name_keys = [n for n, _ in names]
+        self._name_ids = [i for _, i in names]
+        self._grams = gram_ids
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # ------------------------------------------------------------
+    # Exact lookups
+    # ------------------------------------------------------------
+    def by_symbol(self, symbol: str) -> Optional[dict]:
+        i = self._by_symbol.get(symbol.upper())
+        return None if i is None else self.entries[i]
+
+    def by_cik(self, cik: int) -> list[dict]:
+        return [self.entries[i] for i in self._by_cik.get(int(cik), [])]
+
+    # ------------------------------------------------------------
+    # Searches
+    # ------------------------------------------------------------
+    @staticmethod
+    def _prefix(keys: list[str], ids: list[int], prefix: str, limit: int) -> list[int]:
+        lo = bisect.bisect_left(keys, prefix)
+        hi = bisect.bisect_left(keys, prefix + "\uffff", lo)
+        return ids[lo:min(hi, lo + limit)]
+
+    def prefix_symbols(self, prefix: str, limit: int = 10) -> list[dict]:
+        ids = self._prefix(self._symbol_keys, self._symbol_ids, prefix.upper(), limit)
+        return [self.entries[i] for i in ids]
+
+    def prefix_names(self, prefix: str, limit: int = 10) -> list[dict]:
+        # Suffix keys can repeat an entry, so over-fetch before de-duplicating
+        ids = self._prefix(self._name_keys, self._name_ids, " ".join(_words(prefix)), limit * 3)
+        return [self.entries[i] for i in dict.fromkeys(ids)][:limit]
+
+    def fuzzy_names(self, query: str, limit: int = 10) -> list[dict]:
+        """Rank names by Dice similarity of character trigrams."""
+        grams = _trigrams(" ".join(_words(query)))
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._grams.get(gram, ()))
+        scored = [
+            (2.0 * shared / (len(grams) + self._gram_counts[i]), i)
+            for i, shared in counts.most_common(limit * 5)
+        ]
+        scored.sort(reverse=True)
+        return [self.entries[i] for _, i in scored[:limit]]
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Autocomplete: exact symbol, then symbol prefixes, then name prefixes; fuzzy
+        name matching is the fallback when none of those hit (e.g. a typo).
+        """
+        query = query.strip()
+        if not query:
+            return []
+
+        results: dict[int, dict] = {}
+
+        def add(items):
+            for e in items:
+                if len(results) >= limit:
+                    return
+                results.setdefault(id(e), e)
+
+        exact = self.by_symbol(query)
+        if exact:
+            add([exact])
+        add(self.prefix_symbols(query, limit))
+        add(self.prefix_names(query, limit))
+        if not results and len(query) >= 3:
+            add(self.fuzzy_names(query, limit))
+        return list(results.values())
+
+
+_index: Optional[TickerIndex] = None
+_index_day: Optional[dt.date] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> TickerIndex:
+    """Process-wide index, rebuilt the first time it is used each day."""
+    global _index, _index_day
+    today = dt.date.today()
+    if _index is None or _index_day != today:
+        with _index_lock:
+            if _index is None or _index_day != today:
+                _index = TickerIndex(load_universe())
+                _index_day = today
+    return _index
+
+
+if __name__ == "__main__":
+    import time
+
+    index = get_index()
+    for q in ["NVDA", "app", "rocket lab", "micrsoft"]:
+        start = time.perf_counter()
+        hits = index.search(q)
+        took = (time.perf_counter() - start) * 1000
+        print(f"{q!r:14} {took:6.3f} ms  {[h['ticker'] for h in hits]}")
@@ -10,6 +10,7 @@ import matplotlib.pyplot as plt
 from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
 import requests
 import os
+import sys
 
 # === NEW ML & ENV IMPORTS ===
 from sklearn.model_selection import TimeSeriesSplit, cross_val_score
@@ -65,30 +66,37 @@ def preprocess_text(text):
 news_data['cleaned_headline'] = news_data['headline'].apply(preprocess_text)
 
 # ===== Sentiment =====
-analyzer = SentimentIntensityAnalyzer()
-def get_sentiment_score(text):
-    return analyzer.polarity_scores(text or "")['compound']
+# SENTIMENT_MODEL=finbert scores the raw headlines with FinBERT (CPU, cached in the news archive)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if os.getenv("SENTIMENT_MODEL", "vader").lower() == "finbert":
+    from News import transformerScorer
+    news_data['sentiment_score'] = transformerScorer.score_texts(news_data['headline'].tolist())
+else:
+    analyzer = SentimentIntensityAnalyzer()
+    def get_sentiment_score(text):
+        return analyzer.polarity_scores(text or "")['compound']
 
-news_data['sentiment_score'] = news_data['cleaned_headline'].apply(get_sentiment_score)
+    news_data['sentiment_score'] = news_data['cleaned_headline'].apply(get_sentiment_score)
 
 # ===== Dates/Aggregation =====
-news_data['date'] = pd.to_datetime(news_data['date']).dt.date
+# Each article is summed onto the session it can first move: pre-market and regular-hours
+# news onto that day's bar, after-hours, overnight and weekend news onto the next one
+from News import sessionAggregation
 stock_data['Date'] = pd.to_datetime(stock_data['Date']).dt.date
-
-aggregated_sentiment = news_data.groupby('date', as_index=False)['sentiment_score'].sum()
-
-# ===== Merge (left join keeps all trading days) =====
-combined_data = (
-    stock_data[['Date', 'Close']]
-    .merge(aggregated_sentiment, left_on='Date', right_on='date', how='left')
-    .drop(columns=['date'])
+sessions = sessionAggregation.sentiment_for_bars(
+    stock_data['Date'], pd.to_datetime(news_data['date'], utc=True), news_data['sentiment_score']
 )
-combined_data['sentiment_score'] = combined_data['sentiment_score'].fillna(0.0)
+news_data['date'] = pd.to_datetime(news_data['date']).dt.date
+
+# ===== One row per trading day =====
+combined_data = stock_data[['Date', 'Close']].copy()
+combined_data['sentiment_score'] = sessions['sentiment_score'].reindex(combined_data['Date']).fillna(0.0).to_numpy()
 
 # === Auto-limit plot to the news window ===
-if not aggregated_sentiment.empty:
-    news_start = aggregated_sentiment['date'].min()
-    news_end   = aggregated_sentiment['date'].max()
+news_sessions = sessions.index[sessions['article_count'] > 0]
+if len(news_sessions):
+    news_start = news_sessions.min()
+    news_end   = news_sessions.max()
     plot_mask  = (combined_data['Date'] >= news_start) & (combined_data['Date'] <= news_end)
     plot_data  = combined_data.loc[plot_mask].copy()
     if plot_data.empty:
@@ -126,6 +134,15 @@ print("Mean R^2:", scores.mean())
 model.fit(X, y)
 ml_data['Predicted_Return'] = model.predict(X)
 
+# Keep the fitted model for serving: POST /predict {"model": "nvda_sentiment_ridge", "rows": [[score]]}
+from Random import modelRegistry
+version = modelRegistry.save_model(
+    "nvda_sentiment_ridge", model, list(X.columns), task="regressor",
+    data={"target": "next-day return", "news_query": params['q'],
+          "sentiment": os.getenv("SENTIMENT_MODEL", "vader").lower()},
+)
+print(f"Saved nvda_sentiment_ridge v{version} to the model registry")
+
 # ===== Plot actual vs predicted =====
 fig, ax = plt.subplots(figsize=(14,6))
 ax.plot(ml_data['Date'], ml_data['Return'], label="Actual Return")
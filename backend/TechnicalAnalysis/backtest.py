@@ -0,0 +1,218 @@
+import itertools
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from . import barStore
+from . import panelIndicators
+
+# ---------- configuration ---------- #
+_SLIPPAGE_BPS   = 5.0        # paid on every unit of turnover
+_COMMISSION_BPS = 1.0        # paid on every unit of turnover
+_PERIODS        = 252        # bars per year (daily bars)
+_SWEEP_BATCH    = 2_000_000  # max bars x columns simulated in one array pass
+# ----------------------------------- #
+
+
+# ------------------------------------------------------------
+# Signal → position helpers
+# ------------------------------------------------------------
+def hold_until(entries: np.ndarray, exits: np.ndarray) -> np.ndarray:
+    """
+    Long (1.0) from each entry bar until the next exit bar, flat otherwise.
+
+    Both masks are (bars, columns); state is carried forward with one ffill.
+    """
+    state = np.where(entries, 1.0, np.where(exits, 0.0, np.nan))
+    if state.ndim == 1:
+        return pd.Series(state).ffill().fillna(0.0).to_numpy()
+    return pd.DataFrame(state).ffill().fillna(0.0).to_numpy()
+
+
+def ema_crossover(closes, fast: int, slow: int) -> np.ndarray:
+    """Long while EMA(fast) is above EMA(slow)."""
+    with np.errstate(invalid="ignore"):
+        return (panelIndicators.ema(closes, fast) > panelIndicators.ema(closes, slow)).astype(np.float64)
+
+
+def rsi_reversion(closes, period: int = 14, lower: float = 30.0, upper: float = 70.0) -> np.ndarray:
+    """Buy when RSI drops below `lower`, sell when it rises above `upper`."""
+    rsi = panelIndicators.rsi(closes, period)
+    with np.errstate(invalid="ignore"):
+        return hold_until(rsi < lower, rsi > upper)
+
+
+# ------------------------------------------------------------
+# Simulation
+# ------------------------------------------------------------
+def simulate(closes, positions, opens=None,
+             slippage_bps: float = _SLIPPAGE_BPS,
+             commission_bps: float = _COMMISSION_BPS,
+             commission_per_share: float = 0.0) -> dict[str, np.ndarray]:
+    """
+    Per-column returns of holding `positions`, net of costs.
+
+    `positions[t]` is the target decided on bar t's close and filled on bar t+1:
+    at its open when `opens` is given (the old position carries the overnight
+    gap, the new one the session, compounded), otherwise at its close (the old
+    position carries the whole bar and the new one earns from bar t+2).
+
+    Args:
+        closes / opens: (bars, columns) prices; NaN where a symbol has no bar.
+        positions: (bars, columns) target exposure per column, e.g. 1 = fully long.
+        slippage_bps / commission_bps: Cost per unit of turnover, in basis points.
+        commission_per_share: Dollar commission per share traded, charged as a
+            fraction of the fill price.
+
+    Returns:
+        dict with `returns` (net per-bar return per column), `positions` (exposure
+        after each bar's fill), `turnover` and `costs`, all (bars, columns).
+    """
+    c = np.asarray(closes, dtype=np.float64)
+    target = np.nan_to_num(np.asarray(positions, dtype=np.float64))
+    # No price on the decision bar → no position taken from it
+    target[np.isnan(c)] = 0.0
+
+    held = np.zeros_like(target)
+    held[1:] = target[:-1]
+    prev = np.zeros_like(target)
+    prev[1:] = held[:-1]
+
+    prev_close = np.empty_like(c)
+    prev_close[1:] = c[:-1]
+    prev_close[0] = np.nan
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if opens is None:
+            # Filled at this bar's close: the bar's move belongs to the old position
+            fill = c
+            gross = prev * (c / prev_close - 1.0)
+        else:
+            o = np.asarray(opens, dtype=np.float64)
+            fill = o
+            # The session leg compounds on whatever the overnight leg left
+            gross = (1.0 + prev * (o / prev_close - 1.0)) * (1.0 + held * (c / o - 1.0)) - 1.0
+
+        turnover = np.abs(held - prev)
+        costs = turnover * (slippage_bps + commission_bps) / 1e4
+        if commission_per_share:
+            costs = costs + turnover * commission_per_share / fill
+
+    returns = np.nan_to_num(gross) - np.nan_to_num(costs)
+    return {"returns": returns, "positions": held, "turnover": turnover, "costs": np.nan_to_num(costs)}
+
+
+def risk_stats(returns, turnover=None, periods_per_year: int = _PERIODS) -> pd.DataFrame:
+    """
+    Risk/return statistics for each column of a (bars,) or (bars, strategies) return array.
+
+    Returns:
+        One row per column: total_return, cagr, ann_vol, sharpe, sortino,
+        max_drawdown, calmar, hit_rate, and avg_turnover when `turnover` is given.
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    if r.ndim == 1:
+        r = r[:, None]
+    n = len(r)
+
+    equity = np.cumprod(1.0 + r, axis=0)
+    peak = np.maximum.accumulate(equity, axis=0)
+    drawdown = (equity / peak - 1.0).min(axis=0)
+    total = equity[-1] - 1.0
+    years = n / periods_per_year
+
+    mean = r.mean(axis=0)
+    vol = r.std(axis=0, ddof=1) if n > 1 else np.zeros(r.shape[1])
+    downside = np.sqrt(np.mean(np.minimum(r, 0.0) ** 2, axis=0))
+    active = r != 0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stats = {
+            "total_return": total,
+            "cagr": np.where(equity[-1] > 0, equity[-1] ** (1.0 / years) - 1.0, -1.0),
+            "ann_vol": vol * np.sqrt(periods_per_year),
+            "sharpe": mean / vol * np.sqrt(periods_per_year),
+            "sortino": mean / downside * np.sqrt(periods_per_year),
+            "max_drawdown": drawdown,
+            "calmar": np.where(drawdown < 0, (equity[-1] ** (1.0 / years) - 1.0) / -drawdown, np.nan),
+            "hit_rate": (r > 0).sum(axis=0) / np.maximum(active.sum(axis=0), 1),
+        }
+    if turnover is not None:
+        t = np.asarray(turnover, dtype=np.float64)
+        stats["avg_turnover"] = (t if t.ndim > 1 else t[:, None]).mean(axis=0)
+    return pd.DataFrame(stats)
+
+
+def run_backtest(closes, positions, opens=None, initial_capital: float = 100_000.0,
+                 periods_per_year: int = _PERIODS, **costs) -> dict:
+    """
+    Equal-weight portfolio of one sleeve per column (symbol).
+
+    Returns:
+        dict with the per-symbol simulation arrays, the portfolio `returns` and
+        `equity` curve (in dollars), and a one-row `stats` DataFrame.
+    """
+    sim = simulate(closes, positions, opens, **costs)
+    portfolio = sim["returns"].mean(axis=1) if sim["returns"].ndim > 1 else sim["returns"]
+    turnover = sim["turnover"].mean(axis=1) if sim["turnover"].ndim > 1 else sim["turnover"]
+    sim["portfolio_returns"] = portfolio
+    sim["equity"] = initial_capital * np.cumprod(1.0 + portfolio)
+    sim["stats"] = risk_stats(portfolio, turnover, periods_per_year)
+    return sim
+
+
+# ------------------------------------------------------------
+# Parameter sweeps
+# ------------------------------------------------------------
+def sweep(closes, strategy: Callable[..., np.ndarray], grid: dict[str, list],
+          opens=None, periods_per_year: int = _PERIODS, **costs) -> pd.DataFrame:
+    """
+    Backtest `strategy` for every combination in `grid` over all symbols.
+
+    Combinations are simulated in batches laid side by side as extra columns, so
+    each batch is one array pass regardless of how many combinations it holds.
+
+    Args:
+        closes: (bars, symbols) prices.
+        strategy: f(closes, **params) → (bars, symbols) positions.
+        grid: {param: [values, ...]}, e.g. {"fast": [10, 20], "slow": [50, 100]}.
+
+    Returns:
+        One row per combination: the parameters plus `risk_stats` columns.
+    """
+    c = np.asarray(closes, dtype=np.float64)
+    o = None if opens is None else np.asarray(opens, dtype=np.float64)
+    n_bars, n_symbols = c.shape
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    per_batch = max(1, _SWEEP_BATCH // (n_bars * n_symbols))
+
+    frames = []
+    for start in range(0, len(combos), per_batch):
+        batch = combos[start:start + per_batch]
+        positions = np.concatenate([strategy(c, **params) for params in batch], axis=1)
+        tiled_c = np.tile(c, (1, len(batch)))
+        tiled_o = None if o is None else np.tile(o, (1, len(batch)))
+        sim = simulate(tiled_c, positions, tiled_o, **costs)
+
+        # Equal-weight each combination's symbols into one portfolio column
+        returns = sim["returns"].reshape(n_bars, len(batch), n_symbols).mean(axis=2)
+        turnover = sim["turnover"].reshape(n_bars, len(batch), n_symbols).mean(axis=2)
+        stats = risk_stats(returns, turnover, periods_per_year)
+        frames.append(pd.concat([pd.DataFrame(batch), stats], axis=1))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    panel = barStore.load_panel()
+    if panel is None:
+        print("The bar store is empty; run `python -m TechnicalAnalysis.screener --refresh` first.")
+    else:
+        closes = panel["close"]
+        results = sweep(
+            closes, ema_crossover,
+            {"fast": [5, 10, 20, 50], "slow": [50, 100, 200]},
+            opens=panel["open"],
+        )
+        print(results.sort_values("sharpe", ascending=False).to_string(index=False))
@@ -0,0 +1,195 @@
+import os
+import json
+import shutil
+import datetime as dt
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from polygon import RESTClient
+
+from . import httpClients
+from . import metrics
+
+# ---------- configuration ---------- #
+_STORE_DIR   = os.environ.get("BAR_STORE_DIR", "bar_store")   # local columnar store
+_PERIOD_DAYS = 730                                           # rolling window kept
+_KEEP_OLD    = 1                                             # previous versions kept for readers
+FIELDS       = ("open", "high", "low", "close", "volume", "vwap")
+# ----------------------------------- #
+
+
+class BarPanel:
+    """
+    Daily bars for many symbols as one (dates, symbols) float64 array per field.
+
+    Columns follow `symbols`; a NaN means the symbol has no bar that day.
+    Arrays may be read-only memory maps of the on-disk store.
+    """
+
+    def __init__(self, symbols: list[str], dates: np.ndarray,
+                 fields: dict[str, np.ndarray], version: int = 0):
+        self.symbols = list(symbols)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.fields = fields
+        self.version = version
+        self._columns = {s: i for i, s in enumerate(self.symbols)}
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.fields[field]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._columns
+
+    def column(self, symbol: str) -> int:
+        return self._columns[symbol]
+
+    def columns(self, symbols: Iterable[str]) -> np.ndarray:
+        return np.array([self._columns[s] for s in symbols], dtype=np.intp)
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """One symbol in the same layout `callClosingPrices.get_price_data` returns."""
+        col = self._columns[symbol]
+        df = pd.DataFrame(
+            {field: self.fields[field][:, col] for field in FIELDS},
+            index=pd.DatetimeIndex(self.dates.astype("datetime64[ns]"), name="ts"),
+        )
+        return df[df["close"].notna()]
+
+
+# ------------------------------------------------------------
+# On-disk layout:  <store>/CURRENT  → version number
+#                  <store>/v<version>/{dates.npy, symbols.json, <field>.npy}
+# ------------------------------------------------------------
+def current_version(store_dir: str = _STORE_DIR) -> Optional[int]:
+    try:
+        with open(os.path.join(store_dir, "CURRENT"), "r") as fh:
+            return int(fh.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+@metrics.timed("bar_store.load")
+def load_panel(store_dir: str = _STORE_DIR, mmap: bool = True) -> Optional[BarPanel]:
+    """Open the current panel (memory-mapped read-only by default), or None if empty."""
+    version = current_version(store_dir)
+    if version is None:
+        return None
+    path = os.path.join(store_dir, f"v{version}")
+    mode = "r" if mmap else None
+    with open(os.path.join(path, "symbols.json"), "r") as fh:
+        symbols = json.load(fh)
+    dates = np.load(os.path.join(path, "dates.npy"))
+    fields = {f: np.load(os.path.join(path, f"{f}.npy"), mmap_mode=mode) for f in FIELDS}
+    return BarPanel(symbols, dates, fields, version)
+
+
+def save_panel(panel: BarPanel, store_dir: str = _STORE_DIR) -> int:
+    """Write `panel` as a new version and atomically make it current."""
+    os.makedirs(store_dir, exist_ok=True)
+    version = (current_version(store_dir) or 0) + 1
+    path = os.path.join(store_dir, f"v{version}")
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+    np.save(os.path.join(path, "dates.npy"), panel.dates)
+    with open(os.path.join(path, "symbols.json"), "w") as fh:
+        json.dump(panel.symbols, fh)
+    for f in FIELDS:
+        np.save(os.path.join(path, f"{f}.npy"), np.ascontiguousarray(panel.fields[f], dtype=np.float64))
+
+    tmp = os.path.join(store_dir, "CURRENT.tmp")
+    with open(tmp, "w") as fh:
+        fh.write(str(version))
+    os.replace(tmp, os.path.join(store_dir, "CURRENT"))
+
+    # Old versions stay around briefly for readers that still map them
+    for name in os.listdir(store_dir):
+        if name.startswith("v") and name[1:].isdigit() and int(name[1:]) < version - _KEEP_OLD:
+            shutil.rmtree(os.path.join(store_dir, name), ignore_errors=True)
+
+    panel.version = version
+    return version
+
+
+# ------------------------------------------------------------
+# Refresh from Polygon
+# ------------------------------------------------------------
+def _download_grouped(client: RESTClient, day: dt.date) -> dict[str, tuple]:
+    """All symbols' bars for one trading day (empty on weekends/holidays)."""
+    with metrics.upstream("polygon"):
+        aggs = client.get_grouped_daily_aggs(day.strftime("%Y-%m-%d"), adjusted=True)
+    return {
+        a.ticker: (a.open, a.high, a.low, a.close, a.volume, a.vwap)
+        for a in aggs or []
+        if a.ticker and a.close is not None
+    }
+
+
+def refresh_panel(symbols: Optional[Iterable[str]] = None,
+                  store_dir: str = _STORE_DIR,
+                  period_days: int = _PERIOD_DAYS) -> BarPanel:
+    """
+    Bring the store up to date, one grouped-daily call per missing day.
+
+    Args:
+        symbols: Restrict the panel to these tickers (default: everything Polygon returns).
+        store_dir: Store location.
+        period_days: Rolling window kept in the store.
+    """
+    today = dt.date.today()
+    start = today - dt.timedelta(days=period_days)
+    old = load_panel(store_dir, mmap=False)
+
+    if old is not None and len(old.dates):
+        first_missing = old.dates[-1].astype(object) + dt.timedelta(days=1)
+    else:
+        first_missing = start
+    missing = [
+        d.date() for d in pd.bdate_range(max(first_missing, start), today)
+    ]
+    if not missing:
+        return old
+
+    client = httpClients.polygon_client()
+
+    wanted = {s.upper() for s in symbols} if symbols is not None else None
+    new_days: list[tuple[dt.date, dict[str, tuple]]] = []
+    for day in missing:
+        bars = _download_grouped(client, day)
+        if wanted is not None:
+            bars = {s: b for s, b in bars.items() if s in wanted}
+        if bars:
+            new_days.append((day, bars))
+    if not new_days:
+        return old
+
+    old_symbols = old.symbols if old is not None else []
+    seen = set(old_symbols)
+    added = sorted({s for _, bars in new_days for s in bars} - seen)
+    all_symbols = old_symbols + added
+    col = {s: i for i, s in enumerate(all_symbols)}
+
+    n_old = len(old.dates) if old is not None else 0
+    n_rows = n_old + len(new_days)
+    fields = {f: np.full((n_rows, len(all_symbols)), np.nan) for f in FIELDS}
+    if old is not None:
+        for f in FIELDS:
+            fields[f][:n_old, :len(old_symbols)] = old.fields[f]
+
+    for r, (_, bars) in enumerate(new_days, start=n_old):
+        cols = np.array([col[s] for s in bars], dtype=np.intp)
+        values = np.array(list(bars.values()), dtype=np.float64)
+        for k, f in enumerate(FIELDS):
+            fields[f][r, cols] = values[:, k]
+
+    dates = np.concatenate([
+        old.dates if old is not None else np.array([], dtype="datetime64[D]"),
+        np.array([d for d, _ in new_days], dtype="datetime64[D]"),
+    ])
+
+    # Drop rows that fell out of the rolling window
+    keep = dates >= np.datetime64(start, "D")
+    panel = BarPanel(all_symbols, dates[keep], {f: a[keep] for f, a in fields.items()})
+    save_panel(panel, store_dir)
+    return panel
@@ -1,7 +1,163 @@
 # (MFM) = ((Close - Low) - (High - Close)) / (High - low)
 # (MFV) = MFM * Volume
-def calculateAD(data):
-    print(data)
+# (ADL) = running total of MFV
+# Chaikin oscillator = EMA(ADL, 3) - EMA(ADL, 10)
+import math
 
+import numpy as np
+import pandas as pd
 
+from . import metrics
+from . import panelIndicators
 
+# ---------- configuration ---------- #
+_FAST = 3
+_SLOW = 10
+# ----------------------------------- #
+
+
+def money_flow_multiplier(high, low, close, out: np.ndarray = None) -> np.ndarray:
+    """
+    Close Location Value in [-1, 1], float64, for (bars,) or (bars, symbols) arrays.
+
+    Zero-range bars give 0 (no accumulation either way) instead of NaN; NaN
+    inputs stay NaN.
+    """
+    h = np.asarray(high, dtype=np.float64)
+    l = np.asarray(low, dtype=np.float64)
+    c = np.asarray(close, dtype=np.float64)
+    if out is None:
+        out = np.empty(np.broadcast(h, l, c).shape)
+    rng = h - l
+    # (c - l) - (h - c) == 2c - l - h
+    np.multiply(c, 2.0, out=out)
+    out -= l
+    out -= h
+    np.divide(out, rng, out=out, where=rng != 0)
+    out[rng == 0] = 0.0
+    return out
+
+
+def adl(high, low, close, volume, out: np.ndarray = None) -> np.ndarray:
+    """
+    Accumulation/Distribution Line; float64, same shape as the inputs.
+
+    A bar with no data adds nothing and shows NaN; the line carries on after it.
+    """
+    out = money_flow_multiplier(high, low, close, out=out)
+    out *= np.asarray(volume, dtype=np.float64)
+    missing = np.isnan(out)
+    out[missing] = 0.0
+    np.cumsum(out, axis=0, out=out)
+    out[missing] = np.nan
+    return out
+
+
+def chaikin_oscillator(adl_values, fast: int = _FAST, slow: int = _SLOW) -> np.ndarray:
+    """EMA(fast) - EMA(slow) of the ADL (EMAs seeded like panelIndicators.ema)."""
+    result = panelIndicators.ema(adl_values, fast)
+    result -= panelIndicators.ema(adl_values, slow)
+    return result
+
+
+@metrics.timed("indicator.adl")
+def calculateAD(data: pd.DataFrame, fast: int = _FAST, slow: int = _SLOW) -> pd.DataFrame:
+    """
+    ADL and Chaikin oscillator for a frame in the `get_price_data` layout.
+
+    The input frame is left untouched.
+
+    Args:
+        data: DataFrame with `high`, `low`, `close` and `volume` columns.
+        fast / slow: Chaikin EMA periods.
+
+    Returns:
+        DataFrame on the same index with float64 columns `clv`, `mfv`, `adl`, `chaikin`.
+    """
+    high, low, close = (data[c].to_numpy(dtype=np.float64) for c in ("high", "low", "close"))
+    volume = data["volume"].to_numpy(dtype=np.float64)
+
+    clv = money_flow_multiplier(high, low, close)
+    mfv = clv * volume
+    line = np.cumsum(np.nan_to_num(mfv))
+    line[np.isnan(mfv)] = np.nan
+    return pd.DataFrame(
+        {"clv": clv, "mfv": mfv, "adl": line, "chaikin": chaikin_oscillator(line, fast, slow)},
+        index=data.index,
+    )
+
+
+# ------------------------------------------------------------
+# Incremental updates
+# ------------------------------------------------------------
+class _SeededEma:
+    """EMA seeded with the simple average of its first `period` inputs."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.value = None
+        self._seed_sum = 0.0
+        self._seed_n = 0
+
+    def update(self, x: float):
+        if self.value is None:
+            self._seed_sum += x
+            self._seed_n += 1
+            if self._seed_n == self.period:
+                self.value = self._seed_sum / self.period
+        else:
+            self.value += (x - self.value) * self.alpha
+        return self.value
+
+
+class ADLState:
+    """
+    ADL and Chaikin oscillator updated in O(1) per new bar.
+
+    Produces the same values as `calculateAD` over the same bars, so a stream can
+    start from `from_frame(history)` and then call `update` as bars arrive.
+    """
+
+    def __init__(self, fast: int = _FAST, slow: int = _SLOW):
+        self.adl = 0.0
+        self._fast = _SeededEma(fast)
+        self._slow = _SeededEma(slow)
+
+    @property
+    def chaikin(self):
+        if self._fast.value is None or self._slow.value is None:
+            return None
+        return self._fast.value - self._slow.value
+
+    def update(self, high: float, low: float, close: float, volume: float) -> tuple:
+        """
+        Add one bar; returns (adl, chaikin), chaikin None until `slow` bars are in.
+
+        A bar with a missing (NaN/inf) value is skipped, as in `calculateAD`.
+        """
+        if not all(math.isfinite(v) for v in (high, low, close, volume)):
+            return self.adl, self.chaikin
+        rng = high - low
+        if rng:
+            self.adl += ((close - low) - (high - close)) / rng * volume
+        self._fast.update(self.adl)
+        self._slow.update(self.adl)
+        return self.adl, self.chaikin
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, fast: int = _FAST, slow: int = _SLOW) -> "ADLState":
+        """State after every bar of `data` (bars with missing values are skipped)."""
+        state = cls(fast, slow)
+        cols = data[["high", "low", "close", "volume"]].dropna()
+        if cols.empty:
+            return state
+        line = adl(*(cols[c].to_numpy(dtype=np.float64) for c in cols.columns))
+        state.adl = float(line[-1])
+        for ema_state in (state._fast, state._slow):
+            if len(line) >= ema_state.period:
+                ema_state.value = float(panelIndicators.ema(line, ema_state.period)[-1])
+            else:
+                ema_state._seed_sum = float(line.sum())
+                ema_state._seed_n = len(line)
+        return state
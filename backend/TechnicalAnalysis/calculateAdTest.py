@@ -1,11 +1,14 @@
 # adl.py
+# Run as `python -m TechnicalAnalysis.calculateAdTest` from the backend folder.
 
 from dotenv import load_dotenv
 import os
-import requests
 import pandas as pd
 from datetime import datetime, timedelta
 
+from . import calculateAD
+from . import httpClients
+
 # —————————————————————————————————————
 # 1. Load your Polygon API token
 # —————————————————————————————————————
@@ -27,11 +30,11 @@ def get_historical_data(ticker: str, start_date: str, end_date: str) -> pd.DataF
     """
     token = load_token()
     url = (
-        f"https://api.polygon.io/v2/aggs/ticker/{ticker}"
+        f"{httpClients.POLYGON_BASE}/v2/aggs/ticker/{ticker}"
         f"/range/1/day/{start_date}/{end_date}"
-        f"?adjusted=true&sort=asc&limit=50000&apiKey={token}"
     )
-    resp = requests.get(url)
+    params = {"adjusted": "true", "sort": "asc", "limit": 50000, "apiKey": token}
+    resp = httpClients.get(url, params=params)
     resp.raise_for_status()
     data = resp.json()
     if "results" not in data:
@@ -56,17 +59,13 @@ def get_historical_data(ticker: str, start_date: str, end_date: str) -> pd.DataF
 # —————————————————————————————————————
 def calculate_adl(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Adds three new columns to df:
-      - clv: Close Location Value (–1 to +1)
+    Returns a copy of df with three new float64 columns:
+      - clv: Close Location Value (–1 to +1, 0 on zero-range days)
       - mfv: Money Flow Volume
       - adl: cumulative Accumulation/Distribution Line
     """
-    # avoid division by zero on zero-range days
-    range_ = df["high"] - df["low"]
-    df["clv"] = ((df["close"] - df["low"]) - (df["high"] - df["close"])) / range_.replace(0, pd.NA)
-    df["mfv"] = df["clv"] * df["volume"]
-    df["adl"] = df["mfv"].cumsum().fillna(method="ffill").fillna(0)
-    return df
+    ad = calculateAD.calculateAD(df)
+    return df.assign(clv=ad["clv"], mfv=ad["mfv"], adl=ad["adl"])
 
 
 # —————————————————————————————————————
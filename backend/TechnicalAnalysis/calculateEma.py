@@ -1,10 +1,9 @@
 from typing import Iterator, Union, List
 from http.client import HTTPResponse
-from polygon import RESTClient
 from polygon.rest.models import Agg
 from datetime import datetime, timedelta
 import pytz  # pip install pytz
-from .loadToken import load_token
+from . import httpClients
 
 
 def get_ema_list(data: list[float], period: int) -> list[float]:
@@ -61,9 +60,8 @@ def format_ts(ts_ms: int) -> str:
 
 if __name__ == "__main__":
     # ——————————————————————————————————————————————————————————————————
-    # Replace "YOUR_POLYGON_API_KEY" below with your actual Polygon.io key.
+    # Run from backend/:  python -m TechnicalAnalysis.calculateEma
     # ——————————————————————————————————————————————————————————————————
-    client = RESTClient(load_token())
     ticker = "AAPL"
 
     eastern_tz = pytz.timezone("US/Eastern")
@@ -74,19 +72,9 @@ if __name__ == "__main__":
     lookback_days = 500
     start_date = (today_et - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
 
-    raw_aggs = client.list_aggs(
-        ticker,
-        1,
-        "day",
-        start_date,
-        end_date,
-        adjusted="true",
-        sort="asc",
-        limit=500
-    )
+    raw_aggs = httpClients.iter_aggs(ticker, 1, "day", start_date, end_date)
 
-
-    # Pull everything into a list so we can run calculate_ema twice:
+    # Closes are pulled off the page stream once so calculate_ema can run twice:
     data_list = get_list_from_aggs(raw_aggs)
     # 3) Compute 50-day and 200-day EMAs
     ema_50 = calculate_ema(data_list, period=50)
@@ -0,0 +1,172 @@
+# calculateMACD.py
+# Module to fetch data and calculate MACD indicators.
+# Bars come from the local bar store when it has the symbol, otherwise from the
+# Polygon-backed callClosingPrices cache - the same closes every other indicator uses.
+# The lines are indicatorGraph's macd nodes, so /macd and /indicators agree.
+# Run as `python -m TechnicalAnalysis.calculateMACD` from the backend folder.
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from . import barStore
+from . import callClosingPrices
+from . import indicatorGraph
+from . import metrics
+
+# ---------- configuration ---------- #
+_LOOKBACK_DAYS = 365
+_SHORT_SPAN    = 12
+_LONG_SPAN     = 26
+_SIGNAL_SPAN   = 9
+# ----------------------------------- #
+
+
+def fetch_last_year_data(symbol: str) -> pd.DataFrame:
+    """
+    Fetch the last 1 year of daily bars for the given ticker symbol.
+
+    Parameters:
+        symbol (str): Ticker symbol, e.g., 'AAPL'.
+
+    Returns:
+        pd.DataFrame: DataFrame indexed by date with open/high/low/close/volume/vwap columns.
+    """
+    symbol = symbol.upper()
+    panel = barStore.load_panel()
+    if panel is not None and symbol in panel:
+        data = panel.frame(symbol)
+    else:
+        data = callClosingPrices.get_price_data(symbol)
+    if data.empty:
+        return data
+    start = data.index[-1] - pd.Timedelta(days=_LOOKBACK_DAYS)
+    return data[data.index > start]
+
+
+def _from_graph(graph: indicatorGraph.IndicatorGraph, short_span: int, long_span: int,
+                signal_span: int) -> dict[str, np.ndarray]:
+    names = {
+        "MACD": f"macd_{short_span}_{long_span}",
+        "Signal": f"macdsignal_{short_span}_{long_span}_{signal_span}",
+        "Histogram": f"macdhist_{short_span}_{long_span}_{signal_span}",
+    }
+    values = graph.compute(names.values())
+    return {column: values[name] for column, name in names.items()}
+
+
+def macd_arrays(
+    closes,
+    short_span: int = _SHORT_SPAN,
+    long_span: int = _LONG_SPAN,
+    signal_span: int = _SIGNAL_SPAN
+) -> dict[str, np.ndarray]:
+    """
+    MACD line, Signal line and Histogram for (bars,) or (bars, symbols) closes.
+
+    Computed from indicatorGraph's ema/sub nodes: every EMA is seeded with the
+    simple average of its first `span` values (panelIndicators.ema), so the
+    lines are NaN until the long EMA (and then the signal EMA) has its seed.
+    The closes are only read, never copied.
+
+    Returns:
+        dict with 'MACD', 'Signal' and 'Histogram' arrays shaped like `closes`.
+    """
+    graph = indicatorGraph.IndicatorGraph({"close": np.asarray(closes, dtype=np.float64)})
+    return _from_graph(graph, short_span, long_span, signal_span)
+
+
+@metrics.timed("indicator.macd")
+def calculate_macd(
+    data: pd.DataFrame,
+    short_span: int = _SHORT_SPAN,
+    long_span: int = _LONG_SPAN,
+    signal_span: int = _SIGNAL_SPAN
+) -> pd.DataFrame:
+    """
+    Calculate MACD line, Signal line, and Histogram, returning a new DataFrame.
+
+    Parameters:
+        data (pd.DataFrame): DataFrame with a 'close' (or 'Close') column; it is not copied or modified.
+        short_span (int): EMA span for the short term (default 12).
+        long_span (int): EMA span for the long term (default 26).
+        signal_span (int): EMA span for the signal line (default 9).
+
+    Returns:
+        pd.DataFrame: Same index as `data` with columns:
+            - 'MACD': MACD line values.
+            - 'Signal': Signal line values.
+            - 'Histogram': MACD minus Signal.
+    """
+    column = "close" if "close" in data.columns else "Close"
+    closes = data[column].to_numpy(dtype=np.float64)
+    return pd.DataFrame(macd_arrays(closes, short_span, long_span, signal_span), index=data.index)
+
+
+def macd_panel(
+    panel: barStore.BarPanel,
+    symbols: Optional[Sequence[str]] = None,
+    short_span: int = _SHORT_SPAN,
+    long_span: int = _LONG_SPAN,
+    signal_span: int = _SIGNAL_SPAN
+) -> dict[str, np.ndarray]:
+    """
+    MACD for many symbols of the bar store at once; arrays are (dates, symbols).
+
+    Uses the cached graph of the store version, so the EMAs are shared with /indicators.
+    """
+    return _from_graph(indicatorGraph.for_panel(panel, symbols), short_span, long_span, signal_span)
+
+
+def _test_calculate_macd():
+    """
+    Basic test for calculate_macd using a simple increasing series.
+    """
+    dates = pd.date_range('2020-01-01', periods=50)
+    # Create a linear increasing 'Close' price series
+    data = pd.DataFrame({'Close': range(50)}, index=dates)
+    result = calculate_macd(data)
+    # Ensure required columns exist
+    assert all(col in result.columns for col in ['MACD', 'Signal', 'Histogram']), \
+        "MACD calculation did not produce expected columns"
+    # Ensure no NaNs in the output after longest EMA span
+    cleaned = result.dropna()
+    assert not cleaned[['MACD', 'Signal', 'Histogram']].isna().any().any(), \
+        "MACD output contains NaNs where it should be fully calculated"
+    # Same numbers as the indicator graph behind /indicators
+    graph = indicatorGraph.IndicatorGraph({'close': data['Close'].to_numpy(dtype=np.float64)})
+    expected = graph.compute(['macdsignal_12_26_9'])['macdsignal_12_26_9']
+    assert np.allclose(result['Signal'], expected, equal_nan=True), "MACD signal line differs from the graph"
+    print("_test_calculate_macd passed.")
+
+if __name__ == "__main__":
+    # Run tests
+    _test_calculate_macd()
+
+    # Example usage when run as a script
+    symbol = input("Enter ticker symbol (e.g., AAPL): ").upper().strip()
+    data = fetch_last_year_data(symbol)
+    if data.empty:
+        print(f"No data found for {symbol}.")
+    else:
+        macd_df = calculate_macd(data)
+        # Extract scalar values via .iloc to avoid FutureWarning
+        macd_val = macd_df['MACD'].iloc[-1]
+        signal_val = macd_df['Signal'].iloc[-1]
+        hist_val = macd_df['Histogram'].iloc[-1]
+        diff_value = macd_val - signal_val
+
+        # Print values without DataFrame headers
+        print(f"\nLatest MACD values for {symbol}:")
+        print(f"MACD: {macd_val:.6f}")
+        print(f"Signal: {signal_val:.6f}")
+        print(f"Histogram: {hist_val:.6f}")
+
+        # Comparison
+        if diff_value > 0:
+            print(f"\nThe MACD line is above the Signal line by {diff_value:.6f}.")
+        elif diff_value < 0:
+            print(f"\nThe MACD line is below the Signal line by {abs(diff_value):.6f}.")
+        else:
+            print("\nThe MACD line and the Signal line are equal.")
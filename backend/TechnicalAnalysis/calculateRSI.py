@@ -1,22 +1,16 @@
-from polygon import RESTClient
-from polygon.rest.models import Agg
 from datetime import datetime, timedelta, timezone
+import numpy as np
 import pytz
-from loadToken import load_token
+from . import httpClients
 
-def fetch_daily_bars(ticker: str, lookback_days: int = 365) -> list[Agg]:
-    """Fetch daily bars for the past lookback_days in Eastern Time."""
+def fetch_daily_bars(ticker: str, lookback_days: int = 365) -> dict[str, np.ndarray]:
+    """Fetch daily bars for the past lookback_days in Eastern Time, as one array per field."""
     eastern = pytz.timezone("US/Eastern")
     today_et = datetime.now(eastern).date()
     start = (today_et - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
     end   = today_et.strftime("%Y-%m-%d")
 
-    client = RESTClient(load_token())
-    raw = client.list_aggs(
-        ticker, 1, "day", start, end,
-        adjusted="true", sort="asc", limit=lookback_days + 5
-    )
-    return list(raw)
+    return httpClients.agg_columns(httpClients.iter_aggs(ticker, 1, "day", start, end))
 
 def calculate_rsi(closes: list[float], period: int = 14) -> list[float | None]:
     """
@@ -69,8 +63,8 @@ if __name__ == "__main__":
     bars   = fetch_daily_bars(ticker, lookback_days=365)
 
     # Extract closing prices and timestamps
-    closes     = [bar.close     for bar in bars]
-    timestamps = [bar.timestamp for bar in bars]
+    closes     = bars["close"].tolist()
+    timestamps = bars["timestamp"].tolist()
 
     # Calculate 14-period RSI
     period_rsi = 14
@@ -88,6 +82,3 @@ if __name__ == "__main__":
         rsi_str  = f"{rsi:6.2f}" if rsi is not None else "   nan"
         ma_str   = f"{ma:8.2f}" if ma is not None else "     nan"
         print(f"{date_str:<12} {close:8.2f} {rsi_str} {ma_str}")
-
-
-f
\ No newline at end of file
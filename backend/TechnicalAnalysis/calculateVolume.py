@@ -1,10 +1,9 @@
 from typing import Iterator, Union
 from http.client import HTTPResponse
-from polygon import RESTClient
 from polygon.rest.models import Agg
 from datetime import datetime, timedelta
 import pytz  # pip install pytz
-from loadToken import load_token
+from . import httpClients
 
 
 def calculate_ema(
@@ -66,9 +65,9 @@ def format_ts(ts_ms: int) -> str:
 
 if __name__ == "__main__":
     # ——————————————————————————————————————————————————————————————————
-    #  Replace "YOUR_POLYGON_API_KEY" below with your actual Polygon.io key.
+    #  Run from backend/:  python -m TechnicalAnalysis.calculateVolume
     # ——————————————————————————————————————————————————————————————————
-    client = RESTClient(load_token())
+    client = httpClients.polygon_client()
     ticker = "AAPL"
 
     # ----------------------------------------------
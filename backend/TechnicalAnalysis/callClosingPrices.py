@@ -1,9 +1,11 @@
 import os
 import datetime as dt
 from functools import lru_cache
+from . import httpClients
 from . import loadToken
+from . import metrics
+from . import sharedBars
 import pandas as pd
-from polygon import RESTClient
 
 
 # ---------- configuration ---------- #
@@ -19,60 +21,70 @@ def _download_polygon(symbol: str,
                       end_date: dt.date,
                       api_key: str) -> pd.DataFrame:
     """Download raw daily aggregate bars from Polygon.io."""
-    client = RESTClient(api_key)
-    aggs = client.get_aggs(
-        ticker=symbol,
-        multiplier=1,
-        timespan="day",
-        from_=start_date,
-        to=end_date,
-        adjusted=True
-    )
-
-
-    if not aggs:
+    # Pages are streamed straight into columns over the shared keep-alive client
+    with metrics.upstream("polygon"):
+        cols = httpClients.agg_columns(
+            httpClients.iter_aggs(symbol, 1, "day", start_date, end_date, api_key=api_key)
+        )
+
+    if not len(cols["timestamp"]):
         raise ValueError(
             f"Polygon returned 0 rows for {symbol} "
             f"between {start_date} and {end_date}."
         )
 
-    # RESTClient returns Aggregate objects – convert to dicts first
-    df = pd.DataFrame(
-        {
-            "open":  [a.open   for a in aggs],
-            "high":  [a.high   for a in aggs],
-            "low":   [a.low    for a in aggs],
-            "close": [a.close  for a in aggs],
-            "volume":[a.volume for a in aggs],
-            "vwap":  [a.vwap   for a in aggs],
-            "ts":    [pd.to_datetime(a.timestamp, unit="ms") for a in aggs],
-        }
-    ).set_index("ts").sort_index()
+    with metrics.timer("price_data.frame_build"):
+        ts = pd.to_datetime(cols.pop("timestamp"), unit="ms")
+        df = pd.DataFrame(cols, index=pd.Index(ts, name="ts")).sort_index()
 
     return df
 
 
-@lru_cache(maxsize=4)
 def get_price_data(symbol: str = _DEFAULT_SYMBOL) -> pd.DataFrame:
     """
     Return a DataFrame with the last `_PERIOD_DAYS` of daily data.
 
-    • Reads from disk if a fresh cache exists.
+    • Served from the shared-memory bar segment when a loader has published one
+      (read-only, one copy for all workers) and it is as fresh as the disk cache
+      has to be; a stale segment (e.g. the loader stopped) is skipped.
+    • Otherwise reads from disk if a fresh cache exists.
     • Otherwise → pulls from Polygon, saves to disk, and returns.
     """
+    last = sharedBars.last_date()
+    if last is not None:
+        fresh = _is_fresh(last)
+        metrics.cache_result("shared_bars_fresh", hit=fresh)
+        if fresh:
+            shared = sharedBars.frame(symbol)
+            if shared is not None:
+                return shared
+    return _cached_price_data(symbol)
+
+
+@lru_cache(maxsize=4)
+def _is_fresh(last_date: dt.date) -> bool:
+    """Cached bars are used only if they reach today."""
+    return last_date >= dt.date.today()
+
+
+def _cached_price_data(symbol: str) -> pd.DataFrame:
     # Include today by making the upper bound exclusive
     end_date   = dt.date.today() + dt.timedelta(days=1)
     start_date = end_date - dt.timedelta(days=_PERIOD_DAYS)
 
     # 1) Try cache ----------------------------------------------------------
     if os.path.isfile(_CACHE_FILE):
-        df_cached = pd.read_pickle(_CACHE_FILE)
+        with metrics.timer("price_data.pickle_read"):
+            df_cached = pd.read_pickle(_CACHE_FILE)
+        metrics.payload_size("price_pickle", os.path.getsize(_CACHE_FILE))
         if (
             not df_cached.empty
             and df_cached.index.min().date() <= start_date
-            and df_cached.index.max().date() >= end_date - dt.timedelta(days=1)
+            and _is_fresh(df_cached.index.max().date())
         ):
+            metrics.cache_result("price_pickle", hit=True)
             return df_cached.copy()
+    metrics.cache_result("price_pickle", hit=False)
 
     # 2) Download fresh data ------------------------------------------------
     api_key = loadToken.load_token()
@@ -84,12 +96,10 @@ def get_price_data(symbol: str = _DEFAULT_SYMBOL) -> pd.DataFrame:
     df = _download_polygon(symbol, start_date, end_date, api_key)
 
     # Persist for future imports
-    df.to_pickle(_CACHE_FILE)
+    with metrics.timer("price_data.pickle_write"):
+        df.to_pickle(_CACHE_FILE)
 
     return df
 
 
-# ------------------------------------------------------------
-# Expose an immediately usable DataFrame when the module loads
-# ------------------------------------------------------------
-price_data: pd.DataFrame = get_price_data()     # noqa: E305
+metrics.REGISTRY.track_lru("price_data_memory", _cached_price_data)
@@ -0,0 +1,364 @@
+"""
+Headless chart rendering for the dashboard, cached by (chart, params, data version).
+
+    GET /charts/price_sentiment?ticker=NVDA&days=90
+    GET /charts/prediction?model=nvda_rf&days=250&format=svg
+    GET /charts/simulation?stock_mean=0.1&stock_std=0.2&stock_weight=0.5
+
+The charts are the ones the scripts show with plt.show():
+    price_sentiment   close price with per-session sentiment bars (NVDA_Sentiment)
+    prediction        actual forward return vs model output (NVDA_Sentiment / testing.py)
+    simulation        portfolio end-value histogram (Monte_Carlo_Simulations)
+
+Figures are drawn with matplotlib's object API on the Agg canvas, never pyplot,
+so nothing needs a display or shares pyplot's global state. Rendering runs on a
+process pool of CHART_WORKERS; the request thread only gathers the data.
+
+Every chart has a version function that names the data it would draw (bar count
+and last bar, model version, sentiment file time...). The cache key hashes the
+chart, its normalised params, the format and that version; `key` computes it
+without touching the image, so ETag revalidations stop there. Rendered bytes are
+kept in memory and under CHART_CACHE_DIR, so repeat views never re-render until
+the data moves on, and concurrent requests for one key share one render.
+"""
+import os
+import json
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable
+
+import numpy as np
+
+from . import metrics
+
+# ---------- configuration ---------- #
+_CACHE_DIR   = os.environ.get("CHART_CACHE_DIR", "chart_cache")
+_WORKERS     = int(os.environ.get("CHART_WORKERS", "2"))
+_MEMORY      = 128                     # rendered charts kept in memory
+_DPI         = 100
+_SIZE        = (12, 6)                 # inches
+# ----------------------------------- #
+
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+class ChartError(ValueError):
+    """Raised for chart requests that cannot be drawn."""
+
+
+# ------------------------------------------------------------
+# Renderers (run in the worker processes; data in, bytes out)
+# ------------------------------------------------------------
+def _figure():
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=_SIZE, dpi=_DPI)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _save(fig, fmt: str) -> bytes:
+    import io
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, bbox_inches="tight")
+    return buf.getvalue()
+
+
+def _date_axis(ax) -> None:
+    from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
+
+    locator = AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(ConciseDateFormatter(locator))
+
+
+def render_price_sentiment(data: dict, fmt: str) -> bytes:
+    fig = _figure()
+    ax1 = fig.add_subplot()
+    ax1.plot(data["dates"], data["close"], label=f"{data['ticker']} close", linewidth=2.2, zorder=3)
+    ax1.set_ylabel("Price")
+    _date_axis(ax1)
+    if data.get("sentiment") is not None:
+        ax2 = ax1.twinx()
+        score = data["sentiment"]
+        ax2.bar(data["dates"], score, color=np.where(score >= 0, "green", "red"), alpha=0.6, width=1.0, zorder=1)
+        ax2.set_ylabel(f"Sentiment ({data['model']})")
+        ax1.set_zorder(2)
+        ax1.patch.set_alpha(0)
+    ax1.set_title(f"{data['ticker']} price vs aggregated sentiment"
+                  + ("" if data.get("sentiment") is not None else " (no sentiment scores)"))
+    return _save(fig, fmt)
+
+
+def render_prediction(data: dict, fmt: str) -> bytes:
+    fig = _figure()
+    ax1 = fig.add_subplot()
+    ax1.plot(data["dates"], data["actual"], label="Actual return", color="tab:blue")
+    ax1.set_ylabel(f"Actual {data['horizon']}-day return")
+    _date_axis(ax1)
+    if data["task"] == "regressor":
+        ax1.plot(data["dates"], data["predicted"], label="Predicted return", color="tab:orange")
+        ax1.legend(loc="upper left")
+    else:
+        ax2 = ax1.twinx()
+        ax2.plot(data["dates"], data["predicted"], label="P(up)", color="tab:orange")
+        if data.get("threshold") is not None:
+            ax2.axhline(data["threshold"], color="gray", linestyle="--", label="threshold")
+        ax2.set_ylabel("Predicted probability of an up move")
+        ax2.legend(loc="upper right")
+    ax1.set_title(f"{data['model']} v{data['version']}: actual vs predicted ({data['target']})")
+    return _save(fig, fmt)
+
+
+def render_simulation(data: dict, fmt: str) -> bytes:
+    p = data["params"]
+    rng = np.random.default_rng(p["seed"])
+    stock_ret = rng.normal(p["stock_mean"], p["stock_std"], p["n_iter"])
+    end = p["initial"] * (1 + p["rf"] * (1 - p["stock_weight"]) + stock_ret * p["stock_weight"])
+    hit = (end >= p["desired_cash"]).mean()
+
+    fig = _figure()
+    ax = fig.add_subplot()
+    ax.hist(end, bins=100)
+    ax.axvline(p["desired_cash"], color="red", linestyle="--")
+    ax.set_xlabel("Portfolio end value")
+    ax.set_ylabel("Simulations")
+    ax.set_title(f"{p['n_iter']:,} simulations, {p['stock_weight']:.0%} in the stock: "
+                 f"P(≥ ${p['desired_cash']:,.0f}) = {hit:.1%}")
+    return _save(fig, fmt)
+
+
+# ------------------------------------------------------------
+# Data + version per chart (request side)
+# ------------------------------------------------------------
+def _price_sentiment(params: dict) -> tuple[tuple, Callable[[], dict]]:
+    from . import callClosingPrices
+    from . import eodPipeline
+
+    ticker = params["ticker"]
+    try:
+        bars = callClosingPrices.get_price_data(ticker)
+    except Exception as e:
+        raise ChartError(f"No bars for '{ticker}': {e}")
+    bars = bars.iloc[-params["days"]:]
+    if bars.empty:
+        raise ChartError(f"No bars for '{ticker}'")
+    sentiment_file = os.path.join(eodPipeline._EOD_DIR, "sentiment.npz")
+    stamp = os.path.getmtime(sentiment_file) if os.path.isfile(sentiment_file) else None
+    version = (len(bars), str(bars.index[-1]), stamp)
+
+    def load() -> dict:
+        dates = bars.index.values.astype("datetime64[D]")
+        data = {"ticker": ticker, "dates": dates, "close": bars["close"].to_numpy(), "sentiment": None}
+        sentiment = eodPipeline.load_sentiment()
+        if sentiment is not None and ticker in sentiment["symbols"]:
+            pos = np.searchsorted(sentiment["dates"], dates)
+            hit = (pos < len(sentiment["dates"])) & (sentiment["dates"][np.minimum(pos, len(sentiment["dates"]) - 1)] == dates)
+            score = np.zeros(len(dates))
+            score[hit] = sentiment["score"][pos[hit], sentiment["symbols"].index(ticker)]
+            data.update(sentiment=score, model=sentiment["model"])
+        return data
+
+    return version, load
+
+
+def _prediction(params: dict) -> tuple[tuple, Callable[[], dict]]:
+    from Random import assetPanel, featureMatrix, modelRegistry
+
+    try:
+        predictor = modelRegistry.get_predictor(params["model"])
+    except modelRegistry.ModelNotFound as e:
+        raise ChartError(str(e))
+    spec = predictor.spec
+    data_spec = spec.get("data") or {}
+    unknown = [f for f in spec["features"] if f not in featureMatrix.FEATURES]
+    if unknown or not data_spec.get("targets"):
+        raise ChartError(f"{spec['name']} was not trained on featureMatrix features")
+    target = params.get("target") or data_spec["targets"][0]
+    assets = dict(data_spec.get("assets") or assetPanel.parse_assets())
+    assets.setdefault(target, target)
+    # The history files' times name the data without reading it
+    stamps = []
+    for symbol in sorted(set(assets.values())):
+        path = assetPanel._history_path(symbol, assetPanel._HISTORY_DIR)
+        stamps.append(os.path.getmtime(path) if os.path.isfile(path) else None)
+    version = (predictor.version, data_spec.get("start"), *stamps)
+
+    def load() -> dict:
+        try:
+            panel = assetPanel.load_panel(assets, start=data_spec.get("start"))
+        except LookupError as e:
+            raise ChartError(str(e))
+        horizon = int(data_spec.get("horizon") or featureMatrix._HORIZON)
+        context = tuple(data_spec.get("context") or featureMatrix._CONTEXT)
+        fm = featureMatrix.build_matrix(panel, [target], context, horizon,
+                                        {f: featureMatrix.FEATURES[f] for f in spec["features"]})
+        rows = slice(max(len(fm) - params["days"], 0), None)
+        return {
+            "model": spec["name"], "version": predictor.version, "task": spec["task"],
+            "threshold": predictor.threshold, "target": target, "horizon": horizon,
+            "dates": fm.dates[rows], "actual": fm.future_ret[rows],
+            "predicted": predictor.predict(fm.X[rows]),
+        }
+
+    return version, load
+
+
+def _simulation(params: dict) -> tuple[tuple, Callable[[], dict]]:
+    return (), lambda: {"params": params}
+
+
+# chart → (param spec {name: (type, default, low, high)}, data function, renderer)
+CHARTS: dict[str, tuple[dict, Callable, Callable]] = {
+    "price_sentiment": (
+        {"ticker": (str, "NVDA", None, None), "days": (int, 90, 5, 730)},
+        _price_sentiment, render_price_sentiment,
+    ),
+    "prediction": (
+        {"model": (str, "", None, None), "target": (str, "", None, None), "days": (int, 250, 20, 5000)},
+        _prediction, render_prediction,
+    ),
+    "simulation": (
+        {"stock_mean": (float, 0.1, -1.0, 1.0), "stock_std": (float, 0.2, 0.0, 2.0),
+         "stock_weight": (float, 0.5, 0.0, 1.0), "rf": (float, 0.03, -0.1, 0.5),
+         "initial": (float, 1000.0, 1.0, 1e9), "desired_cash": (float, 1050.0, 0.0, 1e10),
+         "n_iter": (int, 1000, 10, 1_000_000), "seed": (int, 0, 0, 2**31 - 1)},
+        _simulation, render_simulation,
+    ),
+}
+
+
+def parse_params(chart: str, args) -> dict:
+    """Typed, defaulted and range-checked params (only the chart's own keys)."""
+    if chart not in CHARTS:
+        raise LookupError(f"Unknown chart '{chart}'; one of {', '.join(CHARTS)}")
+    params = {}
+    for name, (kind, default, low, high) in CHARTS[chart][0].items():
+        raw = args.get(name)
+        try:
+            value = default if raw in (None, "") else kind(raw)
+        except ValueError:
+            raise ChartError(f"{name} must be a {kind.__name__}")
+        if kind is str:
+            value = value.strip().upper() if name in ("ticker", "target") else value.strip()
+        elif kind is float and not math.isfinite(value):
+            raise ChartError(f"{name} must be a finite number")
+        elif (low is not None and value < low) or (high is not None and value > high):
+            raise ChartError(f"{name} must be between {low} and {high}")
+        params[name] = value
+    return params
+
+
+# ------------------------------------------------------------
+# Cache + worker pool
+# ------------------------------------------------------------
+_memory: OrderedDict = OrderedDict()
+_inflight: dict[str, Future] = {}
+_lock = threading.Lock()
+_pools: dict[int, ProcessPoolExecutor] = {}
+
+
+def _pool() -> ProcessPoolExecutor:
+    pid = os.getpid()
+    with _lock:
+        pool = _pools.get(pid)
+        if pool is None:
+            pool = _pools[pid] = ProcessPoolExecutor(max_workers=max(_WORKERS, 1))
+    return pool
+
+
+def cache_key(chart: str, params: dict, fmt: str, version: tuple) -> str:
+    blob = json.dumps([chart, params, fmt, list(version)], sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+
+def _remember(key: str, body: bytes) -> None:
+    with _lock:
+        _memory[key] = body
+        _memory.move_to_end(key)
+        while len(_memory) > _MEMORY:
+            _memory.popitem(last=False)
+
+
+def key(chart: str, params: dict, fmt: str = "png") -> tuple[str, Callable[[], dict]]:
+    """
+    (cache key, data loader) for a chart; only the data version is looked up.
+
+    A request whose ETag matches the key can be answered before any image is read.
+
+    Args:
+        chart: One of CHARTS.
+        params: Output of `parse_params`.
+        fmt: 'png' or 'svg'.
+    """
+    if fmt not in FORMATS:
+        raise ChartError(f"format must be one of {', '.join(FORMATS)}")
+    version, load = CHARTS[chart][1](params)
+    return cache_key(chart, params, fmt, version), load
+
+
+def body(chart: str, key: str, load: Callable[[], dict], fmt: str = "png",
+         cache_dir: str = _CACHE_DIR) -> bytes:
+    """Image bytes for a `key` result: memory, then disk, then a render on the worker pool."""
+    renderer = CHARTS[chart][2]
+    path = os.path.join(cache_dir, chart, f"{key}.{fmt}")
+
+    with _lock:
+        cached = _memory.get(key)
+        future = _inflight.get(key) if cached is None else None
+        owner = cached is None and future is None and not os.path.isfile(path)
+        if owner:
+            future = _inflight[key] = Future()
+    if cached is not None:
+        metrics.cache_result("charts", hit=True)
+        return cached
+    if future is not None and not owner:
+        # Someone else is rendering this exact chart
+        metrics.cache_result("charts", hit=True)
+        return future.result()
+    if not owner:
+        with open(path, "rb") as fh:
+            cached = fh.read()
+        metrics.cache_result("charts", hit=True)
+        _remember(key, cached)
+        return cached
+
+    metrics.cache_result("charts", hit=False)
+    try:
+        with metrics.timer(f"charts.{chart}"):
+            rendered = _pool().submit(renderer, load(), fmt).result()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(rendered)
+        os.replace(tmp, path)
+        _remember(key, rendered)
+        future.set_result(rendered)
+        return rendered
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+
+def render(chart: str, params: dict, fmt: str = "png", cache_dir: str = _CACHE_DIR) -> tuple[str, bytes]:
+    """(cache key, image bytes) for a chart: `key` then `body`."""
+    chart_key, load = key(chart, params, fmt)
+    return chart_key, body(chart, chart_key, load, fmt, cache_dir)
+
+
+if __name__ == "__main__":
+    # Run from backend/:  python -m TechnicalAnalysis.chartService
+    import time
+
+    for attempt in ("cold", "warm"):
+        begin = time.perf_counter()
+        key, body = render("simulation", parse_params("simulation", {"n_iter": "100000"}))
+        print(f"{attempt}: {len(body):,} bytes in {time.perf_counter() - begin:.3f}s ({key[:12]})")
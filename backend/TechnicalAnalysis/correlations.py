@@ -0,0 +1,429 @@
+"""
+Rolling correlations and betas across the bar store, kept per store version.
+
+Two sets of rolling cross-sums over the last CORR_WINDOW daily returns:
+    • the most liquid CORR_MAX_SYMBOLS symbols against each other → correlation matrix
+    • every symbol against the CORR_BENCHMARKS (SPY, QQQ, IWM)      → betas
+
+For columns A and B with returns X, Y and valid-bar masks Ma, Mb (missing bars
+count as 0 and drop out of the pair), RollingCov keeps A-by-B sums of X·Y, X·Mb,
+Ma·Y, X²·Mb, Ma·Y² and Ma·Mb. These give pairwise covariance, correlation and
+beta, matching pandas' pairwise-complete rolling corr. A new bar adds one outer
+product per sum and the bar leaving the window subtracts one. After a store
+refresh only the new days are pushed through the saved state, O(N²) each,
+instead of recomputing the window. The matrix is rebuilt when one of its symbols
+leaves the store, the benchmark sums whenever the universe changes, and both
+every CORR_WINDOW pushes to stop rounding drift.
+
+Each store version gets <CORR_DIR>/v<N>/:
+    labels.json         matrix symbols, benchmarks, universe, window, last date
+    corr.npy            upper triangle (i < j) of the correlation matrix, float16
+    hedge_pos.npy / hedge_neg.npy    (symbols, 20) partners with the highest /
+                        lowest correlation, int32, with *_corr.npy values
+    betas.npy / beta_corr.npy        (universe, benchmarks) float32
+    state.npz           rolling sums + the return window, for the next update
+
+`hedges(symbol)` reads these rows: choosing a hedge is a lookup.
+"""
+import os
+import json
+import shutil
+import argparse
+import threading
+from typing import Optional, Sequence
+
+import numpy as np
+
+from . import barStore
+from . import metrics
+from . import panelIndicators
+
+# ---------- configuration ---------- #
+_CORR_DIR    = os.environ.get("CORR_DIR", "correlations")
+_WINDOW      = int(os.environ.get("CORR_WINDOW", "60"))          # daily returns per window
+_MIN_OBS     = max(_WINDOW * 2 // 3, 2)                          # pair observations for a value
+_MAX_SYMBOLS = int(os.environ.get("CORR_MAX_SYMBOLS", "1000"))   # matrix size (by dollar volume)
+_BENCHMARKS  = os.environ.get("CORR_BENCHMARKS", "SPY,QQQ,IWM")
+_HEDGES      = 20                                                # partners stored per symbol
+_KEEP_OLD    = 1                                                 # previous versions kept
+# ----------------------------------- #
+
+
+class CorrelationError(LookupError):
+    """Raised when a symbol or the correlation store is not available."""
+
+
+class RollingCov:
+    """
+    Pairwise-complete rolling second moments between column sets A and B.
+
+    `push(a, b)` adds one bar of returns (NaN = no bar) and drops the bar that
+    falls out of the window.
+    """
+
+    _SUMS = ("xy", "xm", "my", "xxm", "myy", "n")
+
+    def __init__(self, n_a: int, n_b: int, window: int = _WINDOW):
+        self.window = window
+        self.ring_a = np.full((window, n_a), np.nan)
+        self.ring_b = np.full((window, n_b), np.nan)
+        self.pos = 0
+        self.pushes = 0
+        for name in self._SUMS:
+            setattr(self, name, np.zeros((n_a, n_b)))
+
+    @staticmethod
+    def _terms(a: np.ndarray, b: np.ndarray) -> tuple:
+        ma, mb = ~np.isnan(a), ~np.isnan(b)
+        x, y = np.where(ma, a, 0.0), np.where(mb, b, 0.0)
+        return x, y, ma.astype(np.float64), mb.astype(np.float64)
+
+    def _add(self, a: np.ndarray, b: np.ndarray, sign: float) -> None:
+        """Add (sign=1) or remove (sign=-1) bars a: (rows, n_a), b: (rows, n_b)."""
+        x, y, ma, mb = self._terms(a, b)
+        self.xy += sign * (x.T @ y)
+        self.xm += sign * (x.T @ mb)
+        self.my += sign * (ma.T @ y)
+        self.xxm += sign * ((x * x).T @ mb)
+        self.myy += sign * (ma.T @ (y * y))
+        self.n += sign * (ma.T @ mb)
+
+    def build(self, a: np.ndarray, b: np.ndarray) -> "RollingCov":
+        """Start from the last `window` rows of a and b (one matmul per sum)."""
+        a, b = a[-self.window:], b[-self.window:]
+        for name in self._SUMS:
+            getattr(self, name)[:] = 0.0
+        self._add(a, b, 1.0)
+        self.ring_a[:] = np.nan
+        self.ring_b[:] = np.nan
+        self.ring_a[:len(a)], self.ring_b[:len(b)] = a, b
+        self.pos = len(a) % self.window
+        self.pushes = 0
+        return self
+
+    def push(self, a: np.ndarray, b: np.ndarray) -> None:
+        old_a, old_b = self.ring_a[self.pos], self.ring_b[self.pos]
+        if self.pushes + 1 >= self.window:
+            # Re-sum the window now and then so add/subtract rounding cannot build up
+            self.ring_a[self.pos], self.ring_b[self.pos] = a, b
+            self.pos = (self.pos + 1) % self.window
+            order = np.r_[self.pos:self.window, 0:self.pos]
+            self.build(self.ring_a[order], self.ring_b[order])
+            return
+        self._add(old_a[None], old_b[None], -1.0)
+        self._add(a[None], b[None], 1.0)
+        self.ring_a[self.pos], self.ring_b[self.pos] = a, b
+        self.pos = (self.pos + 1) % self.window
+        self.pushes += 1
+
+    def _centered(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n = self.n
+        cov = n * self.xy - self.xm * self.my
+        var_a = n * self.xxm - self.xm * self.xm
+        var_b = n * self.myy - self.my * self.my
+        return cov, var_a, var_b
+
+    def corr(self, min_obs: int = _MIN_OBS) -> np.ndarray:
+        cov, var_a, var_b = self._centered()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = cov / np.sqrt(var_a * var_b)
+        out[(self.n < min_obs) | (var_a <= 0) | (var_b <= 0)] = np.nan
+        return np.clip(out, -1.0, 1.0, out=out)
+
+    def beta(self, min_obs: int = _MIN_OBS) -> np.ndarray:
+        """Slope of each A column on each B column."""
+        cov, _, var_b = self._centered()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = cov / var_b
+        out[(self.n < min_obs) | (var_b <= 0)] = np.nan
+        return out
+
+    def state(self, prefix: str) -> dict[str, np.ndarray]:
+        arrays = {f"{prefix}{name}": getattr(self, name) for name in self._SUMS}
+        arrays.update({f"{prefix}ring_a": self.ring_a, f"{prefix}ring_b": self.ring_b,
+                       f"{prefix}meta": np.array([self.pos, self.pushes, self.window])})
+        return arrays
+
+    @classmethod
+    def from_state(cls, data, prefix: str) -> "RollingCov":
+        pos, pushes, window = (int(v) for v in data[f"{prefix}meta"])
+        ring_a, ring_b = data[f"{prefix}ring_a"], data[f"{prefix}ring_b"]
+        rc = cls(ring_a.shape[1], ring_b.shape[1], window)
+        rc.ring_a, rc.ring_b, rc.pos, rc.pushes = ring_a.copy(), ring_b.copy(), pos, pushes
+        for name in cls._SUMS:
+            setattr(rc, name, data[f"{prefix}{name}"].copy())
+        return rc
+
+
+# ------------------------------------------------------------
+# Upper-triangle storage
+# ------------------------------------------------------------
+def pack_upper(matrix: np.ndarray, dtype=np.float16) -> np.ndarray:
+    """Entries above the diagonal, row by row."""
+    return matrix[np.triu_indices(len(matrix), k=1)].astype(dtype)
+
+
+def triangle_index(i, j, n: int):
+    """Position of (i, j), i != j, in a packed n × n upper triangle."""
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    return i * n - i * (i + 1) // 2 + (j - i - 1)
+
+
+def unpack_row(packed: np.ndarray, i: int, n: int) -> np.ndarray:
+    """Row i of the full matrix (1.0 on the diagonal) gathered from the triangle."""
+    others = np.arange(n)
+    row = np.ones(n, dtype=np.float32)
+    mask = others != i
+    row[mask] = packed[triangle_index(i, others[mask], n)]
+    return row
+
+
+# ------------------------------------------------------------
+# Building per store version
+# ------------------------------------------------------------
+def _version_dir(version: int, corr_dir: str) -> str:
+    return os.path.join(corr_dir, f"v{version}")
+
+
+def _liquid(panel: barStore.BarPanel, window: int, limit: int, always: Sequence[str]) -> list[str]:
+    """The `limit` symbols with the highest median dollar volume over the window."""
+    dollars = panel.fields["close"][-window:] * panel.fields["volume"][-window:]
+    traded = (~np.isnan(dollars)).sum(axis=0) >= _MIN_OBS
+    median = np.full(len(panel.symbols), -np.inf)
+    median[traded] = np.nanmedian(dollars[:, traded], axis=0)
+    order = np.argsort(-median, kind="stable")
+    picked = [panel.symbols[i] for i in order[:limit] if np.isfinite(median[i])]
+    extra = [s for s in always if s in panel and s not in picked]
+    return sorted(picked[:limit - len(extra)] + extra)
+
+
+def _returns(panel: barStore.BarPanel, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+    close = panel.fields["close"] if symbols is None else panel.fields["close"][:, panel.columns(symbols)]
+    return panelIndicators.pct_change(close, 1)
+
+
+def _previous(corr_dir: str, version: int) -> Optional[tuple[int, dict]]:
+    """The newest older version with saved state, and its labels."""
+    if not os.path.isdir(corr_dir):
+        return None
+    older = sorted((int(n[1:]) for n in os.listdir(corr_dir) if n[:1] == "v" and n[1:].isdigit()
+                    and int(n[1:]) < version), reverse=True)
+    for v in older:
+        path = os.path.join(_version_dir(v, corr_dir), "labels.json")
+        if os.path.isfile(path) and os.path.isfile(os.path.join(_version_dir(v, corr_dir), "state.npz")):
+            with open(path, "r") as fh:
+                return v, json.load(fh)
+    return None
+
+
+@metrics.timed("correlations.update")
+def update(panel: Optional[barStore.BarPanel] = None, corr_dir: str = _CORR_DIR,
+           window: int = _WINDOW, max_symbols: int = _MAX_SYMBOLS) -> dict:
+    """
+    Write the correlation files for the current store version.
+
+    The previous version's rolling state is advanced by the new days when the
+    symbol sets still match; otherwise everything is rebuilt from the window.
+    Files are staged in a private directory and moved into place; a version that
+    is already published is left as it is.
+
+    Returns:
+        Summary: version, symbols, benchmarks, days pushed (None when rebuilt).
+    """
+    panel = panel or barStore.load_panel()
+    if panel is None:
+        raise CorrelationError("The bar store is empty")
+    benchmarks = [b for b in (s.strip().upper() for s in _BENCHMARKS.split(",")) if b and b in panel]
+    if not benchmarks:
+        raise CorrelationError(f"None of the benchmarks {_BENCHMARKS} are in the bar store")
+    dates = [str(d) for d in panel.dates]
+
+    pair, bench, pushed = None, None, None
+    previous = _previous(corr_dir, panel.version)
+    if previous is not None:
+        old_version, labels = previous
+        if (labels["window"] == window and labels["benchmarks"] == benchmarks
+                and labels["last_date"] in dates and all(s in panel for s in labels["symbols"])):
+            symbols = labels["symbols"]
+            new = slice(dates.index(labels["last_date"]) + 1, None)
+            with np.load(os.path.join(_version_dir(old_version, corr_dir), "state.npz")) as data:
+                pair = RollingCov.from_state(data, "pair_")
+                if labels["universe"] == panel.symbols:
+                    bench = RollingCov.from_state(data, "bench_")
+            r_pair = _returns(panel, symbols)[new]
+            for t in range(len(r_pair)):
+                pair.push(r_pair[t], r_pair[t])
+            if bench is not None:
+                r_all, r_bench = _returns(panel)[new], _returns(panel, benchmarks)[new]
+                for t in range(len(r_all)):
+                    bench.push(r_all[t], r_bench[t])
+            pushed = len(r_pair)
+    if pair is None:
+        symbols = _liquid(panel, window, max_symbols, benchmarks)
+        r_pair = _returns(panel, symbols)
+        pair = RollingCov(len(symbols), len(symbols), window).build(r_pair, r_pair)
+    if bench is None:
+        # New listings change the universe; the benchmark sums are cheap to rebuild
+        bench = RollingCov(len(panel.symbols), len(benchmarks), window).build(
+            _returns(panel), _returns(panel, benchmarks))
+
+    corr = pair.corr()
+    np.fill_diagonal(corr, 1.0)
+    path = _version_dir(panel.version, corr_dir)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, "corr.npy"), pack_upper(corr))
+
+    # Hedge candidates: partners ranked by correlation (self and missing values last)
+    k = min(_HEDGES, max(len(symbols) - 1, 1))
+    ranked = np.where(np.isnan(corr), -np.inf, corr)
+    np.fill_diagonal(ranked, -np.inf)
+    pos = np.argsort(-ranked, axis=1, kind="stable")[:, :k]
+    ranked = np.where(np.isnan(corr), np.inf, corr)
+    np.fill_diagonal(ranked, np.inf)
+    neg = np.argsort(ranked, axis=1, kind="stable")[:, :k]
+    for name, idx in (("hedge_pos", pos), ("hedge_neg", neg)):
+        np.save(os.path.join(tmp, f"{name}.npy"), idx.astype(np.int32))
+        np.save(os.path.join(tmp, f"{name}_corr.npy"), np.take_along_axis(corr, idx, axis=1).astype(np.float16))
+
+    np.save(os.path.join(tmp, "betas.npy"), bench.beta().astype(np.float32))
+    np.save(os.path.join(tmp, "beta_corr.npy"), bench.corr().astype(np.float32))
+    np.savez(os.path.join(tmp, "state.npz"), **pair.state("pair_"), **bench.state("bench_"))
+    with open(os.path.join(tmp, "labels.json"), "w") as fh:
+        json.dump({"symbols": symbols, "benchmarks": benchmarks, "universe": panel.symbols,
+                   "window": window, "last_date": dates[-1]}, fh)
+
+    # Another worker (or the EOD job) may have published this version meanwhile;
+    # its files are the same, and readers may already have them open
+    try:
+        if os.path.isdir(path):
+            raise FileExistsError(path)
+        os.replace(tmp, path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+        shutil.rmtree(tmp, ignore_errors=True)
+    for name in os.listdir(corr_dir):
+        if name[:1] == "v" and name[1:].isdigit() and int(name[1:]) < panel.version - _KEEP_OLD:
+            shutil.rmtree(os.path.join(corr_dir, name), ignore_errors=True)
+    return {"version": panel.version, "symbols": len(symbols), "benchmarks": benchmarks, "pushed": pushed}
+
+
+# ------------------------------------------------------------
+# Lookups
+# ------------------------------------------------------------
+class Correlations:
+    """Read-only view of one version's files (arrays are memory-mapped)."""
+
+    def __init__(self, version: int, corr_dir: str = _CORR_DIR):
+        path = _version_dir(version, corr_dir)
+        with open(os.path.join(path, "labels.json"), "r") as fh:
+            labels = json.load(fh)
+        self.version = version
+        self.symbols: list[str] = labels["symbols"]
+        self.benchmarks: list[str] = labels["benchmarks"]
+        self.universe: list[str] = labels["universe"]
+        self.window = labels["window"]
+        self.date = labels["last_date"]
+        self._col = {s: i for i, s in enumerate(self.symbols)}
+        self._row = {s: i for i, s in enumerate(self.universe)}
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        self.packed = load("corr")
+        self.hedge_pos, self.hedge_pos_corr = load("hedge_pos"), load("hedge_pos_corr")
+        self.hedge_neg, self.hedge_neg_corr = load("hedge_neg"), load("hedge_neg_corr")
+        self.betas, self.beta_corr = load("betas"), load("beta_corr")
+
+    def correlation(self, a: str, b: str) -> Optional[float]:
+        """Rolling correlation of two matrix symbols (None if either is outside the matrix)."""
+        if a not in self._col or b not in self._col:
+            return None
+        if a == b:
+            return 1.0
+        value = float(self.packed[triangle_index(self._col[a], self._col[b], len(self.symbols))])
+        return None if np.isnan(value) else value
+
+    def matrix(self, symbols: Sequence[str]) -> np.ndarray:
+        """Square sub-matrix for `symbols` (all must be in the matrix)."""
+        idx = np.array([self._col[s] for s in symbols])
+        out = np.ones((len(idx), len(idx)), dtype=np.float32)
+        i, j = np.triu_indices(len(idx), k=1)
+        if len(i):
+            vals = self.packed[triangle_index(idx[i], idx[j], len(self.symbols))]
+            out[i, j] = out[j, i] = vals
+        return out
+
+    def hedges(self, symbol: str, k: int = 5) -> dict:
+        """
+        Benchmark betas of `symbol` and its most / least correlated partners.
+
+        Shorting a positively correlated partner, or holding a negatively
+        correlated one, offsets part of the position; `beta` gives the benchmark
+        notional per unit of position.
+        """
+        symbol = symbol.upper()
+        if symbol not in self._row:
+            raise CorrelationError(f"No bars for '{symbol}'")
+        r = self._row[symbol]
+        result = {
+            "symbol": symbol,
+            "date": self.date,
+            "window": self.window,
+            "benchmarks": [
+                {"symbol": b, "beta": _value(self.betas[r, j]), "corr": _value(self.beta_corr[r, j])}
+                for j, b in enumerate(self.benchmarks)
+            ],
+            "positive": [],
+            "negative": [],
+        }
+        i = self._col.get(symbol)
+        if i is not None:
+            for side, idx, vals in (("positive", self.hedge_pos, self.hedge_pos_corr),
+                                    ("negative", self.hedge_neg, self.hedge_neg_corr)):
+                result[side] = [
+                    {"symbol": self.symbols[p], "corr": _value(v)}
+                    for p, v in zip(idx[i, :k], vals[i, :k]) if not np.isnan(v)
+                ]
+        return result
+
+
+def _value(v) -> Optional[float]:
+    v = float(v)
+    return None if np.isnan(v) else round(v, 4)
+
+
+_current: Optional[Correlations] = None
+_current_lock = threading.Lock()
+
+
+def get_correlations(corr_dir: str = _CORR_DIR) -> Correlations:
+    """Files for the current store version, computing them if the pipeline has not."""
+    global _current
+    version = barStore.current_version()
+    if version is None:
+        raise CorrelationError("The bar store is empty")
+    if _current is None or _current.version != version:
+        with _current_lock:
+            if _current is None or _current.version != version:
+                hit = os.path.isfile(os.path.join(_version_dir(version, corr_dir), "labels.json"))
+                metrics.cache_result("correlations", hit=hit)
+                if not hit:
+                    update(corr_dir=corr_dir)
+                _current = Correlations(version, corr_dir)
+    return _current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling correlations, betas and hedge candidates")
+    parser.add_argument("symbol", nargs="?", help="Print hedges for this symbol")
+    parser.add_argument("--update", action="store_true", help="Recompute for the current store version")
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.update:
+        print(update())
+    if args.symbol:
+        print(json.dumps(get_correlations().hedges(args.symbol, args.k), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Latest-value snapshot of the whole bar store for the dashboard cards.
+
+For every symbol the snapshot holds the last close, the change from the close
+before it, the last volume and a few indicators (EMA 20/50, RSI 14, MACD and its
+signal). These are rows of one (symbols, columns) array, so a watchlist is a
+gather.
+
+Every indicator here is an exponential recursion, so the snapshot also keeps
+each recursion's state per symbol: the EMAs, Wilder's average gain/loss and
+the previous close. When the bar store gains days, those rows are stepped
+through the state, one vector operation per indicator and day, instead of
+recomputing the history. Symbols still inside an indicator's seed window (new
+listings) are recomputed from their own history with panelIndicators. The
+result matches a full recompute except that the state remembers bars the
+store's rolling window has since dropped.
+
+Snapshots are kept per store version under DASHBOARD_DIR (the end-of-day
+pipeline writes them). A worker loads the file or advances the previous one,
+so each version is computed once.
+"""
+import os
+import json
+import hashlib
+import threading
+from typing import Optional, Sequence
+
+import numpy as np
+
+from . import barStore
+from . import metrics
+from . import panelIndicators
+
+# ---------- configuration ---------- #
+_SNAPSHOT_DIR = os.environ.get("DASHBOARD_DIR", "dashboard_snapshot")
+_KEEP_OLD     = 1                       # previous snapshot files kept
+_MAX_SYMBOLS  = 200                     # watchlist size per request
+_WATCHLIST    = os.environ.get("DASHBOARD_SYMBOLS", "")   # default watchlist, comma list
+# ----------------------------------- #
+
+COLUMNS = ("close", "change", "change_pct", "volume", "ema_20", "ema_50", "rsi_14", "macd", "macdsignal")
+
+# recursion state → smoothing factor
+_STATES = {
+    "ema_12": 2.0 / 13, "ema_20": 2.0 / 21, "ema_26": 2.0 / 27, "ema_50": 2.0 / 51,
+    "signal_9": 2.0 / 10, "gain_14": 1.0 / 14, "loss_14": 1.0 / 14,
+}
+
+
+class SnapshotError(LookupError):
+    """Raised when there are no bars to build a snapshot from."""
+
+
+class Snapshot:
+    """Latest values (`values`, (symbols, COLUMNS) float64) plus the state to advance them."""
+
+    def __init__(self, version: int, date: str, symbols: list[str], state: dict[str, np.ndarray]):
+        self.version = version
+        self.date = date
+        self.symbols = list(symbols)
+        self.state = state
+        self._index = {s: i for i, s in enumerate(self.symbols)}
+        self.values = self._values()
+
+    def _values(self) -> np.ndarray:
+        s = self.state
+        change = s["close"] - s["prev_close"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change_pct = change / s["prev_close"] * 100.0
+            rsi = np.where(s["loss_14"] == 0, 100.0, 100.0 - 100.0 / (1.0 + s["gain_14"] / s["loss_14"]))
+        rsi[np.isnan(s["gain_14"]) | np.isnan(s["loss_14"])] = np.nan
+        macd = s["ema_12"] - s["ema_26"]
+        columns = {
+            "close": s["close"], "change": change, "change_pct": change_pct, "volume": s["volume"],
+            "ema_20": s["ema_20"], "ema_50": s["ema_50"], "rsi_14": rsi,
+            "macd": macd, "macdsignal": s["signal_9"],
+        }
+        return np.column_stack([columns[c] for c in COLUMNS])
+
+    def rows(self, symbols: Sequence[str], columns: Sequence[str] = COLUMNS) -> tuple[list[str], list[list]]:
+        """(symbols found, their rows of `columns` with None for missing values) for a watchlist."""
+        cols = [COLUMNS.index(c) for c in columns]
+        found = [s for s in symbols if s in self._index]
+        block = self.values[[self._index[s] for s in found]][:, cols] if found else np.empty((0, len(cols)))
+        rounded = np.round(block, 4)
+        return found, [[None if np.isnan(v) else float(v) for v in row] for row in rounded]
+
+    def save(self, snapshot_dir: str) -> None:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        path = os.path.join(snapshot_dir, f"v{self.version}.npz")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(fh, **self.state, meta=np.array(json.dumps(
+                {"version": self.version, "date": self.date, "symbols": self.symbols})))
+        os.replace(tmp, path)
+        for name in os.listdir(snapshot_dir):
+            stem = name[1:-4]
+            if name[:1] == "v" and name.endswith(".npz") and stem.isdigit() and int(stem) < self.version - _KEEP_OLD:
+                os.remove(os.path.join(snapshot_dir, name))
+
+    @classmethod
+    def load(cls, path: str) -> "Snapshot":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            state = {k: data[k] for k in data.files if k != "meta"}
+        return cls(meta["version"], meta["date"], meta["symbols"], state)
+
+
+def _last_valid(x: np.ndarray, skip: int = 0) -> np.ndarray:
+    """Per column, the last non-NaN value after `skip` more recent valid ones."""
+    out = np.full(x.shape[1], np.nan)
+    valid = ~np.isnan(x)
+    rank = np.cumsum(valid[::-1], axis=0)[::-1]          # valid values from each row to the end
+    hit = valid & (rank == skip + 1)
+    rows, cols = np.nonzero(hit)
+    out[cols] = x[rows, cols]
+    return out
+
+
+def _gains_losses(delta: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    gap = np.isnan(delta)
+    return np.where(gap, np.nan, np.maximum(delta, 0.0)), np.where(gap, np.nan, np.maximum(-delta, 0.0))
+
+
+def _full_state(fields: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """State after the last row, computed from the whole history of each column."""
+    close = np.asarray(fields["close"], dtype=np.float64)
+    delta = np.full_like(close, np.nan)
+    delta[1:] = close[1:] - close[:-1]
+    gains, losses = _gains_losses(delta)
+    ema_12, ema_26 = panelIndicators.ema(close, 12), panelIndicators.ema(close, 26)
+    return {
+        "close": _last_valid(close),
+        "prev_close": _last_valid(close, skip=1),
+        "last_row": close[-1].copy(),
+        "volume": _last_valid(np.asarray(fields["volume"], dtype=np.float64)),
+        "ema_12": ema_12[-1],
+        "ema_20": panelIndicators.ema(close, 20)[-1],
+        "ema_26": ema_26[-1],
+        "ema_50": panelIndicators.ema(close, 50)[-1],
+        "signal_9": panelIndicators.ema(ema_12 - ema_26, 9)[-1],
+        "gain_14": panelIndicators.seeded_ema(gains, 14, _STATES["gain_14"])[-1],
+        "loss_14": panelIndicators.seeded_ema(losses, 14, _STATES["loss_14"])[-1],
+    }
+
+
+def build(panel: barStore.BarPanel) -> Snapshot:
+    """Snapshot of `panel` from its full history."""
+    if not len(panel.dates):
+        raise SnapshotError("The bar store is empty")
+    return Snapshot(panel.version, str(panel.dates[-1]), panel.symbols, _full_state(panel.fields))
+
+
+def _step(state: np.ndarray, x: np.ndarray, alpha: float) -> None:
+    step = alpha * (x - state)
+    ok = ~np.isnan(step)
+    state[ok] += step[ok]
+
+
+def advance(old: Snapshot, panel: barStore.BarPanel) -> Optional[Snapshot]:
+    """
+    `old` stepped through the days `panel` has after it, or None when it cannot be
+    (symbols reordered or removed, or its last day fell out of the store).
+    """
+    dates = [str(d) for d in panel.dates]
+    n_old = len(old.symbols)
+    if old.date not in dates or panel.symbols[:n_old] != old.symbols:
+        return None
+    start = dates.index(old.date) + 1
+    n = len(panel.symbols)
+    state = {k: np.concatenate([v, np.full(n - n_old, np.nan)]) for k, v in old.state.items()}
+
+    close = panel.fields["close"][start:]
+    volume = panel.fields["volume"][start:]
+    for t in range(len(close)):
+        x = np.asarray(close[t], dtype=np.float64)
+        delta = x - state["last_row"]
+        for name in ("ema_12", "ema_20", "ema_26", "ema_50"):
+            _step(state[name], x, _STATES[name])
+        _step(state["signal_9"], state["ema_12"] - state["ema_26"], _STATES["signal_9"])
+        gains, losses = _gains_losses(delta)
+        _step(state["gain_14"], gains, _STATES["gain_14"])
+        _step(state["loss_14"], losses, _STATES["loss_14"])
+        traded = ~np.isnan(x)
+        state["prev_close"][traded] = state["close"][traded]
+        state["close"][traded] = x[traded]
+        v = np.asarray(volume[t], dtype=np.float64)
+        state["volume"][~np.isnan(v)] = v[~np.isnan(v)]
+        state["last_row"] = x.copy()
+
+    # Recursions that had not started need their own history (young or new symbols)
+    unseeded = np.zeros(n, dtype=bool)
+    for name in _STATES:
+        unseeded |= np.isnan(state[name])
+    unseeded &= ~np.isnan(state["close"])
+    cols = np.flatnonzero(unseeded)
+    if len(cols):
+        fresh = _full_state({f: panel.fields[f][:, cols] for f in ("close", "volume")})
+        for name, values in fresh.items():
+            state[name][cols] = values
+    return Snapshot(panel.version, dates[-1], panel.symbols, state)
+
+
+# ------------------------------------------------------------
+# Current snapshot
+# ------------------------------------------------------------
+_current: Optional[Snapshot] = None
+_current_lock = threading.Lock()
+
+
+def _previous_file(snapshot_dir: str, version: int) -> Optional[str]:
+    if not os.path.isdir(snapshot_dir):
+        return None
+    versions = [int(n[1:-4]) for n in os.listdir(snapshot_dir)
+                if n[:1] == "v" and n.endswith(".npz") and n[1:-4].isdigit() and int(n[1:-4]) < version]
+    return os.path.join(snapshot_dir, f"v{max(versions)}.npz") if versions else None
+
+
+def update(panel: Optional[barStore.BarPanel] = None, snapshot_dir: str = _SNAPSHOT_DIR) -> Snapshot:
+    """Snapshot for `panel` (default: the current store), advanced from the last one when possible."""
+    panel = panel or barStore.load_panel()
+    if panel is None:
+        raise SnapshotError("The bar store is empty")
+    path = os.path.join(snapshot_dir, f"v{panel.version}.npz")
+    if os.path.isfile(path):
+        return Snapshot.load(path)
+
+    previous = _current if _current is not None and _current.version < panel.version else None
+    if previous is None:
+        prev_path = _previous_file(snapshot_dir, panel.version)
+        previous = Snapshot.load(prev_path) if prev_path else None
+    with metrics.timer("dashboard.snapshot"):
+        snapshot = advance(previous, panel) if previous is not None else None
+        metrics.cache_result("dashboard_incremental", hit=snapshot is not None)
+        if snapshot is None:
+            snapshot = build(panel)
+    snapshot.save(snapshot_dir)
+    return snapshot
+
+
+def get_snapshot(snapshot_dir: str = _SNAPSHOT_DIR) -> Snapshot:
+    """The snapshot of the current store version (loaded or advanced once per process)."""
+    global _current
+    version = barStore.current_version()
+    if version is None:
+        raise SnapshotError("The bar store is empty")
+    snapshot = _current
+    metrics.cache_result("dashboard_snapshot", hit=snapshot is not None and snapshot.version == version)
+    if snapshot is None or snapshot.version != version:
+        with _current_lock:
+            if _current is None or _current.version != version:
+                _current = update(snapshot_dir=snapshot_dir)
+            snapshot = _current
+    return snapshot
+
+
+def etag(snapshot: Snapshot, symbols: Sequence[str], columns: Sequence[str]) -> str:
+    """Changes only when the snapshot or the requested watchlist/columns do."""
+    digest = hashlib.sha1(json.dumps([list(symbols), list(columns)]).encode()).hexdigest()[:16]
+    return f"{snapshot.version}-{snapshot.date}-{digest}"
+
+
+def parse_request(symbols: str, columns: str) -> tuple[list[str], list[str]]:
+    """Watchlist (default DASHBOARD_SYMBOLS) and column names from comma-separated query values."""
+    symbols = symbols or _WATCHLIST
+    watchlist = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not watchlist:
+        raise ValueError("Pass ?symbols=AAPL,NVDA")
+    if len(watchlist) > _MAX_SYMBOLS:
+        raise ValueError(f"At most {_MAX_SYMBOLS} symbols per request")
+    wanted = [c.strip().lower() for c in columns.split(",") if c.strip()] or list(COLUMNS)
+    unknown = [c for c in wanted if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}; one of {', '.join(COLUMNS)}")
+    return watchlist, wanted
@@ -0,0 +1,270 @@
+"""
+End-of-day precomputation, run after the close as one job graph.
+
+    python -m TechnicalAnalysis.eodPipeline run              # today's run (resumes if it failed part-way)
+    python -m TechnicalAnalysis.eodPipeline run --only screens
+    python -m TechnicalAnalysis.eodPipeline status
+    python -m TechnicalAnalysis.eodPipeline schedule         # wait for EOD_RUN_AT every weekday, then run
+
+    bars ──┬── shared_bars                    asset_history ── features
+           ├── screens
+           ├── correlations
+           ├── dashboard
+           ├── indicators                     news ── news_tags ── sentiment ──┐
+           └───────────────────────────────────────────────────────────────────┴── sentiment_sessions
+
+Each job fills a cache the API already reads:
+    bars / shared_bars   bar store + shared-memory segment (callClosingPrices, sharedBars)
+    screens              screen_cache/v<N>/<column>.npy (screener)
+    indicators           indicator_cache/v<N>/<name>.npy (/indicators)
+    correlations         correlations/v<N>/ matrix, betas and hedge lists (/hedges)
+    dashboard            dashboard_snapshot/v<N>.npz, advanced from the last one (/dashboard)
+    features             feature_cache/*.npz (GET /predict)
+    sentiment            FinBERT scores in the news archive, if transformers is installed
+    sentiment_sessions   <EOD_DIR>/sentiment.npz: per-session score sum and article count
+                         for every tagged symbol in the bar store
+
+The checkpoint of a run is <EOD_DIR>/runs/<date>.json; re-running the same date
+skips finished jobs.
+"""
+import os
+import time
+import argparse
+import datetime as dt
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from . import barStore
+from . import correlations
+from . import dashboardSnapshot
+from . import indicatorGraph
+from . import jobGraph
+from . import screener
+from . import sharedBars
+
+# ---------- configuration ---------- #
+_EOD_DIR      = os.environ.get("EOD_DIR", "eod_runs")
+_RUN_AT       = os.environ.get("EOD_RUN_AT", "16:30")            # US/Eastern, weekdays
+_UNIVERSE     = os.environ.get("EOD_UNIVERSE", "")               # comma list; empty → every Polygon ticker
+_NEWS_QUERIES = os.environ.get("EOD_NEWS_QUERIES", "")           # "Nvidia=NVDA,Rocket Lab=RKLB"
+_RETRY_AFTER  = 15 * 60                                          # seconds before a failed run is resumed
+_MAX_RESUMES  = 4                                                # resumes per scheduled run
+_MARKET_TZ    = "US/Eastern"
+# ----------------------------------- #
+
+
+def _universe() -> Optional[list[str]]:
+    symbols = [s.strip().upper() for s in _UNIVERSE.split(",") if s.strip()]
+    return symbols or None
+
+
+# ------------------------------------------------------------
+# Jobs: each takes {dependency: result} and returns a JSON-able summary
+# ------------------------------------------------------------
+def refresh_bars(_: dict) -> dict:
+    panel = barStore.refresh_panel(_universe())
+    if panel is None:
+        raise RuntimeError("The bar store is still empty after the refresh")
+    return {"version": panel.version, "last_date": str(panel.dates[-1]), "symbols": len(panel.symbols)}
+
+
+def publish_shared_bars(_: dict) -> dict:
+    return {"generation": sharedBars.publish_store()}
+
+
+def precompute_screens(_: dict) -> dict:
+    panel = barStore.load_panel()
+    screener.Screener(panel).precompute()
+    return {"version": panel.version, "columns": len(screener.DEFAULT_COLUMNS)}
+
+
+def precompute_indicators(_: dict) -> dict:
+    panel = barStore.load_panel()
+    return {"version": panel.version, "names": indicatorGraph.precompute_latest(panel)}
+
+
+def update_correlations(_: dict) -> dict:
+    return correlations.update()
+
+
+def update_dashboard(_: dict) -> dict:
+    snapshot = dashboardSnapshot.update()
+    return {"version": snapshot.version, "date": snapshot.date, "symbols": len(snapshot.symbols)}
+
+
+def refresh_asset_history(_: dict) -> dict:
+    from Random import assetPanel, modelRegistry
+
+    symbols = set(assetPanel.parse_assets().values())
+    for spec in modelRegistry.list_models():
+        data = spec.get("data") or {}
+        symbols.update((data.get("assets") or {}).values())
+        symbols.update(data.get("targets") or [])
+    histories = assetPanel.load_histories(sorted(symbols))
+    return {"symbols": len(histories), "last_date": str(max(d[-1] for d, _ in histories.values()))}
+
+
+def precompute_features(_: dict) -> dict:
+    from Random import modelRegistry
+
+    return {"models": modelRegistry.precompute_features()}
+
+
+def ingest_news(_: dict) -> dict:
+    from News.newsArchive import NewsArchive
+
+    queries = [q.strip().partition("=") for q in _NEWS_QUERIES.split(",") if q.strip()]
+    if not queries:
+        return {"skipped": "EOD_NEWS_QUERIES is empty"}
+    archive = NewsArchive()
+    return {"articles": sum(archive.ingest(q.strip(), tag=(t.strip() or None)) for q, _, t in queries)}
+
+
+def tag_news(_: dict) -> dict:
+    from News.entityMatcher import EntityMatcher
+    from News.newsArchive import NewsArchive
+
+    return {"tags": EntityMatcher.from_sec().tag_archive(NewsArchive())}
+
+
+def score_news(_: dict) -> dict:
+    from News import transformerScorer
+
+    if not transformerScorer.available():
+        return {"skipped": "transformers is not installed"}
+    return {"model": transformerScorer.model_name(), "articles": transformerScorer.score_archive()}
+
+
+def aggregate_news_sentiment(inputs: dict) -> dict:
+    from News import sessionAggregation
+    from News.newsArchive import NewsArchive
+
+    model = inputs["sentiment"].get("model")
+    if model is None:
+        return {"skipped": "no sentiment scores"}
+    panel = barStore.load_panel()
+    calendar = sessionAggregation.session_calendar(panel.dates)
+    scored = NewsArchive().tagged_sentiment(model, start=str(panel.dates[0]))
+    scored = scored[scored["tag"].isin(set(panel.symbols))]
+
+    symbols = sorted(scored["tag"].unique())
+    total = np.zeros((len(calendar), len(symbols)))
+    count = np.zeros((len(calendar), len(symbols)), dtype=np.int64)
+    for j, (_, group) in enumerate(scored.groupby("tag", sort=True)):
+        sessions = sessionAggregation.aggregate_sentiment(group["published_at"], group["score"], calendar)
+        total[:, j] = sessions["sentiment_score"].to_numpy()
+        count[:, j] = sessions["article_count"].to_numpy()
+
+    path = os.path.join(_EOD_DIR, "sentiment.npz")
+    os.makedirs(_EOD_DIR, exist_ok=True)
+    with open(path + ".tmp", "wb") as fh:
+        np.savez(fh, dates=np.asarray(pd.to_datetime(calendar.index), dtype="datetime64[D]").astype(np.int64),
+                 symbols=np.array(symbols, dtype=str), score=total, count=count, model=np.array(model))
+    os.replace(path + ".tmp", path)
+    return {"model": model, "symbols": len(symbols), "sessions": len(calendar)}
+
+
+def load_sentiment(eod_dir: str = _EOD_DIR) -> Optional[dict]:
+    """The last `sentiment_sessions` output: dates, symbols, (dates, symbols) score and count, model."""
+    try:
+        with np.load(os.path.join(eod_dir, "sentiment.npz")) as data:
+            return {
+                "dates": data["dates"].astype("datetime64[D]"),
+                "symbols": data["symbols"].tolist(),
+                "score": data["score"],
+                "count": data["count"],
+                "model": str(data["model"]),
+            }
+    except FileNotFoundError:
+        return None
+
+
+def build_graph() -> jobGraph.JobGraph:
+    graph = jobGraph.JobGraph()
+    graph.add("bars", refresh_bars, retries=2)
+    graph.add("shared_bars", publish_shared_bars, deps=["bars"])
+    graph.add("screens", precompute_screens, deps=["bars"])
+    graph.add("indicators", precompute_indicators, deps=["bars"])
+    graph.add("correlations", update_correlations, deps=["bars"])
+    graph.add("dashboard", update_dashboard, deps=["bars"])
+    graph.add("asset_history", refresh_asset_history, retries=2)
+    graph.add("features", precompute_features, deps=["asset_history"])
+    graph.add("news", ingest_news, retries=2)
+    graph.add("news_tags", tag_news, deps=["news"])
+    graph.add("sentiment", score_news, deps=["news_tags"])
+    graph.add("sentiment_sessions", aggregate_news_sentiment, deps=["bars", "sentiment"])
+    return graph
+
+
+# ------------------------------------------------------------
+# Running and scheduling
+# ------------------------------------------------------------
+def checkpoint_path(day: Optional[dt.date] = None, eod_dir: str = _EOD_DIR) -> str:
+    day = day or pd.Timestamp.now(tz=_MARKET_TZ).date()
+    return os.path.join(eod_dir, "runs", f"{day.isoformat()}.json")
+
+
+def run(day: Optional[dt.date] = None, only=None, workers: int = jobGraph._WORKERS,
+        fresh: bool = False) -> dict:
+    """Run (or resume) the pipeline for `day`; returns the checkpoint state."""
+    path = checkpoint_path(day)
+    if fresh and os.path.exists(path):
+        os.remove(path)
+    return build_graph().run(path, workers=workers, only=only)
+
+
+def next_run(now: Optional[pd.Timestamp] = None) -> pd.Timestamp:
+    """Next weekday at EOD_RUN_AT (US/Eastern) after `now`."""
+    now = now or pd.Timestamp.now(tz=_MARKET_TZ)
+    hour, minute = (int(p) for p in _RUN_AT.split(":"))
+    at = now.normalize() + pd.Timedelta(hours=hour, minutes=minute)
+    while at <= now or at.weekday() >= 5:
+        at = (at + pd.Timedelta(days=1)).normalize() + pd.Timedelta(hours=hour, minutes=minute)
+    return at
+
+
+def schedule(workers: int = jobGraph._WORKERS) -> None:
+    while True:
+        at = next_run()
+        print(f"Next run at {at:%Y-%m-%d %H:%M %Z}", flush=True)
+        time.sleep(max((at - pd.Timestamp.now(tz=_MARKET_TZ)).total_seconds(), 0))
+        for attempt in range(_MAX_RESUMES + 1):
+            state = run(at.date(), workers=workers)
+            if not jobGraph.failed(state):
+                break
+            if attempt < _MAX_RESUMES:
+                print(f"Failed: {', '.join(jobGraph.failed(state))}; resuming in {_RETRY_AFTER // 60} min", flush=True)
+                time.sleep(_RETRY_AFTER)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-of-day precomputation pipeline")
+    parser.add_argument("command", choices=["run", "status", "schedule"])
+    parser.add_argument("--date", type=dt.date.fromisoformat, help="Run date (default: today, US/Eastern)")
+    parser.add_argument("--only", nargs="+", help="Run just these jobs and what they need")
+    parser.add_argument("--workers", type=int, default=jobGraph._WORKERS)
+    parser.add_argument("--fresh", action="store_true", help="Ignore the date's checkpoint and run everything")
+    args = parser.parse_args()
+
+    if args.command == "schedule":
+        schedule(args.workers)
+        return
+    if args.command == "status":
+        state = jobGraph.load_checkpoint(checkpoint_path(args.date))
+    else:
+        state = run(args.date, args.only, args.workers, args.fresh)
+    for name in build_graph().order():
+        record = state["jobs"].get(name)
+        if record is None:
+            print(f"{name:>20}  not run")
+            continue
+        detail = record.get("error") if record.get("status") == jobGraph.FAILED else record.get("result")
+        print(f"{name:>20}  {record.get('status'):<8}  {detail if detail is not None else ''}")
+    if args.command == "run" and jobGraph.failed(state):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
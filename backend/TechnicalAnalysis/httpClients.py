@@ -0,0 +1,144 @@
+"""
+Process-wide HTTP clients with pooled keep-alive connections.
+
+• polygon_client() — one RESTClient per process (rebuilt after a fork), so every
+  fetcher reuses the same connection pool instead of paying TCP+TLS per call.
+• session() / get() — one requests.Session for NewsAPI, SEC and raw Polygon URLs,
+  with retries on 429/5xx and default (connect, read) timeouts.
+• iter_aggs() / agg_columns() — stream Polygon aggregates page by page into
+  column arrays instead of materialising every Agg with list(raw).
+
+With HTTP2=1 and the `h2` package installed, urllib3 negotiates HTTP/2 over TLS
+for both clients; otherwise everything stays on HTTP/1.1 keep-alive.
+"""
+import os
+import threading
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+import requests
+from polygon import RESTClient
+from requests.adapters import HTTPAdapter
+from urllib3 import Timeout
+from urllib3.util.retry import Retry
+
+from . import loadToken
+
+# ---------- configuration ---------- #
+_POOL_SIZE       = int(os.environ.get("HTTP_POOL_SIZE", "10"))     # connections kept per host
+_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+_READ_TIMEOUT    = float(os.environ.get("HTTP_READ_TIMEOUT", "30"))
+_RETRIES         = int(os.environ.get("HTTP_RETRIES", "3"))
+_HTTP2           = os.environ.get("HTTP2", "0") == "1"
+_POLYGON_BASE    = os.environ.get("POLYGON_API_BASE", "https://api.polygon.io")
+_PAGE_LIMIT      = 50_000                                          # Polygon's max aggregates per page
+# ----------------------------------- #
+
+TIMEOUT = (_CONNECT_TIMEOUT, _READ_TIMEOUT)
+POLYGON_BASE = _POLYGON_BASE
+AGG_FIELDS = ("open", "high", "low", "close", "volume", "vwap", "timestamp")
+
+_lock = threading.Lock()
+_polygon: dict[tuple, tuple[int, RESTClient]] = {}
+_session: Optional[tuple[int, requests.Session]] = None
+_http2_checked = False
+
+
+def _enable_http2() -> bool:
+    """Switch urllib3 to HTTP/2 over TLS once, when asked for and available."""
+    global _http2_checked
+    if _http2_checked:
+        return _HTTP2
+    _http2_checked = True
+    if not _HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        from urllib3.http2 import inject_into_urllib3
+    except ImportError:
+        return False
+    inject_into_urllib3()
+    return True
+
+
+def polygon_client(api_key: Optional[str] = None, base: str = _POLYGON_BASE) -> RESTClient:
+    """The shared RESTClient for `api_key` (default: POLYGON_TOKEN)."""
+    api_key = api_key or loadToken.load_token()
+    if not api_key:
+        raise EnvironmentError("Set your Polygon API key in the POLYGON_TOKEN environment variable.")
+    key = (api_key, base)
+    pid = os.getpid()
+    cached = _polygon.get(key)
+    if cached is not None and cached[0] == pid:
+        return cached[1]
+    with _lock:
+        cached = _polygon.get(key)
+        if cached is None or cached[0] != pid:
+            _enable_http2()
+            client = RESTClient(
+                api_key, connect_timeout=_CONNECT_TIMEOUT, read_timeout=_READ_TIMEOUT,
+                num_pools=_POOL_SIZE, retries=_RETRIES, base=base,
+            )
+            # RESTClient keeps one connection per host and never passes its timeout on
+            client.client.connection_pool_kw.update(
+                maxsize=_POOL_SIZE,
+                timeout=Timeout(connect=_CONNECT_TIMEOUT, read=_READ_TIMEOUT),
+            )
+            cached = _polygon[key] = (pid, client)
+    return cached[1]
+
+
+def session() -> requests.Session:
+    """The shared requests.Session (rebuilt after a fork)."""
+    global _session
+    pid = os.getpid()
+    if _session is not None and _session[0] == pid:
+        return _session[1]
+    with _lock:
+        if _session is None or _session[0] != pid:
+            _enable_http2()
+            s = requests.Session()
+            retry = Retry(total=_RETRIES, backoff_factor=0.2,
+                          status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET", "HEAD"))
+            adapter = HTTPAdapter(pool_connections=_POOL_SIZE, pool_maxsize=_POOL_SIZE, max_retries=retry)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = (pid, s)
+    return _session[1]
+
+
+def get(url: str, params: Optional[dict] = None, **kwargs) -> requests.Response:
+    """GET through the shared session with the default timeouts."""
+    kwargs.setdefault("timeout", TIMEOUT)
+    return session().get(url, params=params, **kwargs)
+
+
+# ------------------------------------------------------------
+# Polygon aggregates
+# ------------------------------------------------------------
+def iter_aggs(ticker: str, multiplier: int, timespan: str, from_, to,
+              api_key: Optional[str] = None, **kwargs) -> Iterator:
+    """Aggregates yielded as each page arrives; the next page is only fetched when needed."""
+    kwargs.setdefault("adjusted", True)
+    kwargs.setdefault("sort", "asc")
+    kwargs.setdefault("limit", _PAGE_LIMIT)
+    return polygon_client(api_key).list_aggs(ticker, multiplier, timespan, from_, to, **kwargs)
+
+
+def agg_columns(aggs, fields: Sequence[str] = AGG_FIELDS) -> dict[str, np.ndarray]:
+    """
+    Consume an aggregate stream into one array per field in a single pass.
+
+    Agg objects are dropped as soon as their values are copied out, so memory
+    holds columns of floats rather than a list of objects. Missing values are NaN
+    (timestamps come back as int64 milliseconds).
+    """
+    columns: dict[str, list] = {f: [] for f in fields}
+    appenders = [(columns[f].append, f) for f in fields]
+    for agg in aggs:
+        for append, f in appenders:
+            append(getattr(agg, f))
+    return {
+        f: np.array(v, dtype=np.int64) if f == "timestamp" else np.array(v, dtype=np.float64)
+        for f, v in columns.items()
+    }
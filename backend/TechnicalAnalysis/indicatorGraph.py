@@ -0,0 +1,364 @@
+"""
+Indicators planned as a DAG of shared building blocks.
+
+A request such as ["ema_12", "macd", "rsima_14_9"] is expanded into nodes —
+ema(close,12), ema(close,26), sub(ema,ema), rsi(close,14), sma(rsi,9) — and
+each node is computed once per set of bars however many indicators need it:
+MACD and a plain EMA-12 share ema(close,12), the Chaikin oscillator shares
+adl(), and the OBV bands share obv() and ema(obv,20).
+
+Nodes are keyed by (op, inputs, params) with inputs being other node keys, so a
+key describes its whole sub-graph. An IndicatorGraph memoizes node results for
+one set of bars; graphs are cached per bar-store version (or per symbol and
+last bar for frames the store does not have).
+
+`precompute_latest` stores the last row of common indicators for the whole
+store as one .npy per name and store version (the end-of-day pipeline runs it),
+and `latest` answers from those files before computing anything.
+
+Every EMA is seeded with a simple average (panelIndicators.ema). calculateMACD,
+parameterSweep and dashboardSnapshot use the same convention, so MACD is one
+series whichever endpoint serves it.
+
+Names are `<kind>` or `<kind>_<p1>_<p2>...`; omitted parameters take defaults:
+    open high low close volume vwap
+    ema_20  sma_20  std_20  change_1  avgvol_20  rsi_14  rsima_14_9
+    macd_12_26  macdsignal_12_26_9  macdhist_12_26_9
+    obv  obvema_20  obvupper_20  obvlower_20  adl  chaikin_3_10
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from . import barStore
+from . import calculateAD
+from . import callClosingPrices
+from . import metrics
+from . import panelIndicators
+from . import signalAnalytics
+
+# ---------- configuration ---------- #
+_GRAPH_CACHE = 32            # graphs (bar sets) kept in memory
+_MAX_NAMES   = 32            # indicators per request
+_LATEST_DIR  = os.environ.get("INDICATOR_CACHE_DIR", "indicator_cache")
+_CHUNK_COLS  = 2048          # symbols per graph when precomputing the whole store
+DEFAULT_NAMES = ("ema_12", "ema_26", "ema_50", "ema_200", "sma_50", "rsi_14",
+                 "macd", "macdsignal", "macdhist", "obv", "obvema", "adl", "chaikin")
+# ----------------------------------- #
+
+Key = tuple  # (op, input keys, params)
+
+
+class IndicatorError(ValueError):
+    """Raised for indicator names the graph cannot build."""
+
+
+def _node(op: str, *inputs: Key, params: tuple = ()) -> Key:
+    return (op, inputs, params)
+
+
+def _field(name: str) -> Key:
+    return _node("field", params=(name,))
+
+
+_CLOSE, _VOLUME = _field("close"), _field("volume")
+_HLCV = tuple(_field(f) for f in ("high", "low", "close", "volume"))
+
+
+def _ema(src: Key, n: int) -> Key:
+    return _node("ema", src, params=(n,))
+
+
+def _macd(fast: int, slow: int) -> Key:
+    return _node("sub", _ema(_CLOSE, fast), _ema(_CLOSE, slow))
+
+
+def _obv_band(n: int, k: float) -> Key:
+    obv = _node("obv", _CLOSE, _VOLUME)
+    return _node("band", _ema(obv, n), _node("std", obv, params=(n,)), params=(k,))
+
+
+def _chaikin(fast: int, slow: int) -> Key:
+    line = _node("adl", *_HLCV)
+    return _node("sub", _ema(line, fast), _ema(line, slow))
+
+
+# op → function of (input arrays..., params...)
+_OPS: dict[str, Callable] = {
+    "ema":  panelIndicators.ema,
+    "sma":  panelIndicators.sma,
+    "std":  panelIndicators.rolling_std,
+    "rsi":  panelIndicators.rsi,
+    "pct":  lambda x, n: panelIndicators.pct_change(x, n) * 100.0,
+    "obv":  panelIndicators.obv,
+    "adl":  calculateAD.adl,
+    "sub":  np.subtract,
+    "band": lambda mid, sd, k: mid + k * sd,
+}
+
+# name kind → (default params, key builder)
+_KINDS: dict[str, tuple[tuple, Callable[..., Key]]] = {
+    **{f: ((), lambda f=f: _field(f)) for f in barStore.FIELDS},
+    "ema":        ((20,), lambda n: _ema(_CLOSE, n)),
+    "sma":        ((20,), lambda n: _node("sma", _CLOSE, params=(n,))),
+    "std":        ((20,), lambda n: _node("std", _CLOSE, params=(n,))),
+    "change":     ((1,), lambda n: _node("pct", _CLOSE, params=(n,))),
+    "avgvol":     ((20,), lambda n: _node("sma", _VOLUME, params=(n,))),
+    "rsi":        ((14,), lambda n: _node("rsi", _CLOSE, params=(n,))),
+    "rsima":      ((14, 9), lambda n, m: _node("sma", _node("rsi", _CLOSE, params=(n,)), params=(m,))),
+    "macd":       ((12, 26), _macd),
+    "macdsignal": ((12, 26, 9), lambda f, s, g: _ema(_macd(f, s), g)),
+    "macdhist":   ((12, 26, 9), lambda f, s, g: _node("sub", _macd(f, s), _ema(_macd(f, s), g))),
+    "obv":        ((), lambda: _node("obv", _CLOSE, _VOLUME)),
+    "obvema":     ((20,), lambda n: _ema(_node("obv", _CLOSE, _VOLUME), n)),
+    "obvupper":   ((20,), lambda n: _obv_band(n, signalAnalytics._BB_K)),
+    "obvlower":   ((20,), lambda n: _obv_band(n, -signalAnalytics._BB_K)),
+    "adl":        ((), lambda: _node("adl", *_HLCV)),
+    "chaikin":    ((3, 10), _chaikin),
+}
+_NAME_RE = re.compile(r"^(?P<kind>[a-z]+)(?P<params>(?:_\d+)*)$")
+
+
+def resolve(name: str) -> Key:
+    """Node key for an indicator name such as 'macd_12_26' or 'rsi'."""
+    m = _NAME_RE.match(name.strip().lower())
+    if not m or m["kind"] not in _KINDS:
+        raise IndicatorError(f"Unknown indicator '{name}'")
+    defaults, build = _KINDS[m["kind"]]
+    given = tuple(int(p) for p in m["params"].split("_")[1:])
+    if len(given) > len(defaults):
+        raise IndicatorError(f"'{name}' takes at most {len(defaults)} parameter(s)")
+    if any(p < 1 for p in given):
+        raise IndicatorError(f"Periods in '{name}' must be positive")
+    return build(*given, *defaults[len(given):])
+
+
+def label(key: Key) -> str:
+    """Readable form of a node, e.g. 'ema(obv(close,volume),20)'."""
+    op, inputs, params = key
+    if op == "field":
+        return params[0]
+    return f"{op}({','.join([*map(label, inputs), *map(str, params)])})"
+
+
+# ------------------------------------------------------------
+# Graph over one set of bars
+# ------------------------------------------------------------
+class IndicatorGraph:
+    """
+    Lazily evaluated, memoized indicator nodes over one set of bars.
+
+    `fields` maps OHLCV names to (bars,) or (bars, symbols) arrays. Results are
+    kept for the life of the graph, so overlapping requests only compute the
+    nodes no earlier request needed.
+    """
+
+    def __init__(self, fields: Mapping[str, np.ndarray], index=None,
+                 symbols: Optional[Sequence[str]] = None):
+        self.fields = fields
+        self.index = index
+        self.symbols = symbols
+        self._memo: dict[Key, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+    def _plan(self, keys: Iterable[Key]) -> tuple[list[Key], int]:
+        """Uncomputed nodes behind `keys`, inputs first, plus how many were memo hits."""
+        order: list[Key] = []
+        seen: set = set()
+        hits = 0
+
+        def visit(key: Key) -> None:
+            nonlocal hits
+            if key in seen:
+                return
+            seen.add(key)
+            if key in self._memo:
+                hits += 1
+                return
+            for dep in key[1]:
+                visit(dep)
+            order.append(key)
+
+        for key in keys:
+            visit(key)
+        return order, hits
+
+    def plan(self, names: Iterable[str]) -> list[str]:
+        """Labels of the nodes `compute(names)` would evaluate, in order."""
+        return [label(k) for k in self._plan([resolve(n) for n in names])[0]]
+
+    def compute(self, names: Iterable[str]) -> dict[str, np.ndarray]:
+        """Arrays for each requested name (same shape as the fields)."""
+        keys = {name: resolve(name) for name in names}
+        with self._lock:
+            order, hits = self._plan(keys.values())
+            for hit in [True] * hits + [False] * len(order):
+                metrics.cache_result("indicator_nodes", hit=hit)
+            for key in order:
+                op, inputs, params = key
+                if op == "field":
+                    value = np.asarray(self.fields[params[0]], dtype=np.float64)
+                else:
+                    with metrics.timer(f"indicator_graph.{op}"):
+                        value = _OPS[op](*(self._memo[i] for i in inputs), *params)
+                self._memo[key] = value
+            return {name: self._memo[key] for name, key in keys.items()}
+
+
+# ------------------------------------------------------------
+# Graph cache: one graph per bar version
+# ------------------------------------------------------------
+_graphs: OrderedDict = OrderedDict()
+_graphs_lock = threading.Lock()
+
+
+def _cached_graph(key: tuple, build: Callable[[], IndicatorGraph]) -> IndicatorGraph:
+    with _graphs_lock:
+        graph = _graphs.get(key)
+        if graph is not None:
+            _graphs.move_to_end(key)
+    metrics.cache_result("indicator_graphs", hit=graph is not None)
+    if graph is None:
+        graph = build()
+        with _graphs_lock:
+            graph = _graphs.setdefault(key, graph)
+            while len(_graphs) > _GRAPH_CACHE:
+                _graphs.popitem(last=False)
+    return graph
+
+
+def for_symbol(symbol: str) -> IndicatorGraph:
+    """Graph over one symbol's bars (store first, else the Polygon cache); 1-D arrays."""
+    symbol = symbol.upper()
+    panel = barStore.load_panel()
+    if panel is not None and symbol in panel:
+        key = ("store", panel.version, symbol)
+        load = lambda: panel.frame(symbol)
+    else:
+        data = callClosingPrices.get_price_data(symbol)
+        key = ("frame", symbol, len(data), data.index[-1] if len(data) else None)
+        load = lambda: data
+
+    def build() -> IndicatorGraph:
+        data = load()
+        fields = {f: data[f].to_numpy(dtype=np.float64) for f in barStore.FIELDS if f in data}
+        return IndicatorGraph(fields, index=data.index, symbols=[symbol])
+
+    return _cached_graph(key, build)
+
+
+def for_panel(panel: barStore.BarPanel, symbols: Optional[Sequence[str]] = None) -> IndicatorGraph:
+    """Graph over (dates, symbols) arrays of the store, optionally a subset of symbols."""
+    symbols = tuple(symbols) if symbols is not None else None
+    key = ("panel", panel.version, symbols)
+
+    def build() -> IndicatorGraph:
+        if symbols is None:
+            return IndicatorGraph(panel.fields, index=panel.dates, symbols=panel.symbols)
+        cols = panel.columns(symbols)
+        return IndicatorGraph(
+            {f: panel.fields[f][:, cols] for f in barStore.FIELDS},
+            index=panel.dates, symbols=list(symbols),
+        )
+
+    return _cached_graph(key, build)
+
+
+# ------------------------------------------------------------
+# Latest values:  <INDICATOR_CACHE_DIR>/v<store version>/<name>.npy  → (symbols,)
+# ------------------------------------------------------------
+def _latest_path(cache_dir: str, version: int, name: str) -> str:
+    return os.path.join(cache_dir, f"v{version}", f"{name}.npy")
+
+
+def precompute_latest(panel: barStore.BarPanel, names: Sequence[str] = DEFAULT_NAMES,
+                      cache_dir: str = _LATEST_DIR) -> int:
+    """
+    Store the newest value of each indicator for every symbol of `panel`.
+
+    Symbols are processed in chunks so only a chunk's nodes are held at once.
+
+    Returns:
+        The number of names written.
+    """
+    n_sym = len(panel.symbols)
+    latest = {name: np.full(n_sym, np.nan) for name in names}
+    for lo in range(0, n_sym, _CHUNK_COLS):
+        cols = slice(lo, min(lo + _CHUNK_COLS, n_sym))
+        graph = IndicatorGraph({f: panel.fields[f][:, cols] for f in barStore.FIELDS})
+        for name, values in graph.compute(names).items():
+            latest[name][cols] = values[-1]
+
+    os.makedirs(os.path.join(cache_dir, f"v{panel.version}"), exist_ok=True)
+    for name, values in latest.items():
+        path = _latest_path(cache_dir, panel.version, name)
+        with open(path + ".tmp", "wb") as fh:
+            np.save(fh, values)
+        os.replace(path + ".tmp", path)
+    return len(latest)
+
+
+_latest_memo: OrderedDict = OrderedDict()
+
+
+def latest(panel: barStore.BarPanel, symbols: Sequence[str], names: Sequence[str],
+           cache_dir: str = _LATEST_DIR) -> dict[str, np.ndarray]:
+    """Newest value of each name for `symbols`: precomputed where stored, else computed."""
+    cols = panel.columns(symbols)
+    result, missing = {}, []
+    for name in names:
+        key = (cache_dir, panel.version, name)
+        with _graphs_lock:
+            values = _latest_memo.get(key)
+        if values is None and os.path.isfile(_latest_path(cache_dir, panel.version, name)):
+            values = np.load(_latest_path(cache_dir, panel.version, name))
+            with _graphs_lock:
+                _latest_memo[key] = values
+                while len(_latest_memo) > _GRAPH_CACHE * _MAX_NAMES:
+                    _latest_memo.popitem(last=False)
+        metrics.cache_result("indicator_latest", hit=values is not None)
+        if values is None:
+            missing.append(name)
+        else:
+            result[name] = values[cols]
+    if missing:
+        computed = for_panel(panel, symbols).compute(missing)
+        result.update({name: computed[name][-1] for name in missing})
+    return result
+
+
+def parse_names(value: str) -> list[str]:
+    """Comma-separated indicator names, validated and de-duplicated in order."""
+    names = list(dict.fromkeys(n.strip().lower() for n in value.split(",") if n.strip()))
+    if not names:
+        raise IndicatorError("Pass ?names=ema_12,macd,rsi_14")
+    if len(names) > _MAX_NAMES:
+        raise IndicatorError(f"At most {_MAX_NAMES} indicators per request")
+    for name in names:
+        resolve(name)
+    return names
+
+
+if __name__ == "__main__":
+    # Run from backend/:  python -m TechnicalAnalysis.indicatorGraph
+    closes = pd.Series(np.cumsum(np.random.default_rng(0).normal(0, 1, 300)) + 100)
+    bars = {"close": closes.to_numpy(), "volume": np.full(300, 1e6),
+            "high": closes.to_numpy() + 1, "low": closes.to_numpy() - 1}
+    graph = IndicatorGraph(bars)
+    first = ["ema_12", "macd", "rsima_14_9"]
+    print("plan", first, "→", graph.plan(first))
+    graph.compute(first)
+    second = ["macdsignal", "ema_26", "rsi", "chaikin"]
+    print("plan", second, "→", graph.plan(second))
+    out = graph.compute(second)
+    expected = panelIndicators.ema(closes, 12) - panelIndicators.ema(closes, 26)
+    assert np.allclose(graph.compute(["macd"])["macd"], expected, equal_nan=True)
+    print("nodes memoized:", len(graph))
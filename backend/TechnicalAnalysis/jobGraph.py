@@ -0,0 +1,178 @@
+"""
+Dependency-ordered jobs with parallel stages and a resumable checkpoint.
+
+    graph = JobGraph()
+    graph.add("bars", refresh_bars)
+    graph.add("screens", precompute_screens, deps=["bars"])
+    graph.add("indicators", precompute_indicators, deps=["bars"])
+    graph.run("eod_runs/2025-06-02.json", workers=4)
+
+Every job whose dependencies have finished is started on a thread pool, so
+independent branches (screens and indicators above) run side by side. After
+each job the checkpoint file is rewritten atomically with its status, timing
+and (JSON-able) return value. Running the same graph against the same
+checkpoint skips jobs already marked done, so after a failure a re-run picks up
+at the failed job; jobs downstream of a failure are marked blocked and the
+rest of the graph still runs.
+
+A job function receives a dict of its dependencies' results.
+"""
+import os
+import json
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Optional
+
+from . import metrics
+
+# ---------- configuration ---------- #
+_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+# ----------------------------------- #
+
+DONE, FAILED, BLOCKED = "done", "failed", "blocked"
+
+
+class JobError(ValueError):
+    """Raised for graphs that cannot run (unknown dependencies, cycles)."""
+
+
+class Job:
+    __slots__ = ("name", "func", "deps", "retries")
+
+    def __init__(self, name: str, func: Callable[[dict], object], deps: Iterable[str] = (), retries: int = 0):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.retries = retries
+
+
+def load_checkpoint(path: str) -> dict:
+    """{'jobs': {name: {'status', 'started', 'finished', 'result', 'error'}}}, empty if none."""
+    try:
+        with open(path, "r") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {"jobs": {}}
+
+
+def _save_checkpoint(path: str, state: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(state, fh, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+class JobGraph:
+    def __init__(self):
+        self.jobs: dict[str, Job] = {}
+
+    def add(self, name: str, func: Callable[[dict], object], deps: Iterable[str] = (), retries: int = 0) -> None:
+        if name in self.jobs:
+            raise JobError(f"Duplicate job '{name}'")
+        self.jobs[name] = Job(name, func, deps, retries)
+
+    def order(self) -> list[str]:
+        """Job names in a dependency-respecting order; raises JobError on cycles or unknown deps."""
+        for job in self.jobs.values():
+            unknown = [d for d in job.deps if d not in self.jobs]
+            if unknown:
+                raise JobError(f"{job.name} depends on unknown jobs: {', '.join(unknown)}")
+        order, state = [], {}
+
+        def visit(name: str, path: tuple) -> None:
+            if state.get(name) == DONE:
+                return
+            if name in path:
+                raise JobError(f"Cycle: {' -> '.join(path + (name,))}")
+            for dep in self.jobs[name].deps:
+                visit(dep, path + (name,))
+            state[name] = DONE
+            order.append(name)
+
+        for name in self.jobs:
+            visit(name, ())
+        return order
+
+    def _call(self, job: Job, inputs: dict):
+        for attempt in range(job.retries + 1):
+            try:
+                with metrics.timer(f"job.{job.name}"):
+                    return job.func(inputs)
+            except Exception:
+                if attempt == job.retries:
+                    raise
+
+    def run(self, checkpoint: str, workers: int = _WORKERS,
+            only: Optional[Iterable[str]] = None, log: Callable[[str], None] = print) -> dict:
+        """
+        Run every job not yet done in `checkpoint`.
+
+        Args:
+            checkpoint: JSON file recording each job's status; created if missing.
+            workers: Jobs run at the same time.
+            only: Run just these jobs (and whatever they need that is not done yet).
+            log: Progress sink, one line per finished job.
+
+        Returns:
+            The final checkpoint state.
+        """
+        order = self.order()
+        state = load_checkpoint(checkpoint)
+        records = state.setdefault("jobs", {})
+        results = {n: r.get("result") for n, r in records.items() if r.get("status") == DONE}
+
+        wanted = set(order)
+        if only is not None:
+            wanted, stack = set(), list(only)
+            while stack:
+                name = stack.pop()
+                if name not in self.jobs:
+                    raise JobError(f"Unknown job '{name}'")
+                if name not in wanted:
+                    wanted.add(name)
+                    stack.extend(self.jobs[name].deps)
+        pending = [n for n in order if n in wanted and n not in results]
+        for name in pending:
+            records.pop(name, None)
+        _save_checkpoint(checkpoint, state)
+
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            while pending or running:
+                for name in list(pending):
+                    deps = self.jobs[name].deps
+                    if any(records.get(d, {}).get("status") in (FAILED, BLOCKED) for d in deps):
+                        pending.remove(name)
+                        records[name] = {"status": BLOCKED}
+                        log(f"{name}: blocked")
+                        continue
+                    if all(d in results for d in deps) and len(running) < max(workers, 1):
+                        pending.remove(name)
+                        inputs = {d: results[d] for d in deps}
+                        records[name] = {"status": "running", "started": time.time()}
+                        running[pool.submit(self._call, self.jobs[name], inputs)] = name
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    record = records[name]
+                    record["finished"] = time.time()
+                    try:
+                        results[name] = record["result"] = future.result()
+                        record["status"] = DONE
+                    except Exception as e:
+                        record["status"] = FAILED
+                        record["error"] = "".join(traceback.format_exception_only(type(e), e)).strip()
+                        record["traceback"] = traceback.format_exc()
+                    log(f"{name}: {record['status']} in {record['finished'] - record['started']:.1f}s"
+                        + (f" ({record['error']})" if record["status"] == FAILED else ""))
+                    _save_checkpoint(checkpoint, state)
+        _save_checkpoint(checkpoint, state)
+        return state
+
+
+def failed(state: dict) -> list[str]:
+    return [n for n, r in state.get("jobs", {}).items() if r.get("status") in (FAILED, BLOCKED)]
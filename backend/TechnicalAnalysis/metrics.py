@@ -0,0 +1,281 @@
+"""
+Lightweight in-process metrics, exported in Prometheus text format.
+
+    with metrics.timer("price_data.download"):        # per-stage latency
+        ...
+    with metrics.upstream("polygon"):                  # upstream count, latency, errors
+        ...
+    metrics.cache_result("price_pickle", hit=True)     # cache hit ratios
+
+`init_app(app)` adds request latency and response-size metrics to every Flask
+request, serves them at /metrics, and (with METRICS_SERVER_TIMING=1) returns
+the stages of each request in a Server-Timing header.
+
+Recording a sample is a perf_counter pair, a bisect and a dict update under a
+lock, so it is cheap enough to leave on everywhere.
+"""
+import os
+import time
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# ---------- configuration ---------- #
+_ENABLED       = os.environ.get("METRICS_ENABLED", "1") != "0"
+_SERVER_TIMING = os.environ.get("METRICS_SERVER_TIMING", "0") == "1"
+_PREFIX        = "smad_"
+_TIME_BUCKETS  = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_BYTE_BUCKETS  = (1_024, 4_096, 16_384, 65_536, 262_144, 1_048_576, 4_194_304, 16_777_216)
+# ----------------------------------- #
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    """Counters and histograms keyed by (name, sorted label items)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple, float] = {}
+        self._histograms: dict[tuple, _Histogram] = {}
+        self._help: dict[str, tuple[str, str]] = {}
+        self._lru: dict[str, Callable] = {}
+
+    def describe(self, name: str, kind: str, text: str) -> None:
+        self._help[name] = (kind, text)
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, buckets: tuple = _TIME_BUCKETS, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(buckets)
+            hist.observe(value)
+
+    def track_lru(self, name: str, func: Callable) -> None:
+        """Report hits/misses of an functools.lru_cache-wrapped function at scrape time."""
+        self._lru[name] = func
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: (list(h.counts), h.total, h.count, h.buckets) for k, h in self._histograms.items()}
+        for cache, func in self._lru.items():
+            info = func.cache_info()
+            counters[("cache_requests_total", (("cache", cache), ("result", "hit")))] = info.hits
+            counters[("cache_requests_total", (("cache", cache), ("result", "miss")))] = info.misses
+
+        lines: list[str] = []
+        for name in sorted({k[0] for k in counters}):
+            self._header(lines, name, "counter")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{_PREFIX}{name}{_labels(labels)} {_num(value)}")
+
+        ratios = _hit_ratios(counters)
+        if ratios:
+            self._header(lines, "cache_hit_ratio", "gauge")
+            for cache, ratio in sorted(ratios.items()):
+                lines.append(f'{_PREFIX}cache_hit_ratio{{cache="{_escape(cache)}"}} {_num(ratio)}')
+
+        for name in sorted({k[0] for k in histograms}):
+            self._header(lines, name, "histogram")
+            for (n, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+                if n != name:
+                    continue
+                running = 0
+                for bound, c in zip(buckets, counts):
+                    running += c
+                    lines.append(f"{_PREFIX}{name}_bucket{_labels(labels + (('le', _num(bound)),))} {running}")
+                lines.append(f"{_PREFIX}{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{_PREFIX}{name}_sum{_labels(labels)} {_num(total)}")
+                lines.append(f"{_PREFIX}{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: list, name: str, default_kind: str) -> None:
+        kind, text = self._help.get(name, (default_kind, ""))
+        if text:
+            lines.append(f"# HELP {_PREFIX}{name} {text}")
+        lines.append(f"# TYPE {_PREFIX}{name} {kind}")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(items: tuple) -> str:
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _hit_ratios(counters: dict) -> dict[str, float]:
+    hits: dict[str, float] = {}
+    totals: dict[str, float] = {}
+    for (name, labels), value in counters.items():
+        if name != "cache_requests_total":
+            continue
+        d = dict(labels)
+        totals[d["cache"]] = totals.get(d["cache"], 0.0) + value
+        if d.get("result") == "hit":
+            hits[d["cache"]] = hits.get(d["cache"], 0.0) + value
+    return {c: hits.get(c, 0.0) / t for c, t in totals.items() if t}
+
+
+REGISTRY = Registry()
+REGISTRY.describe("stage_seconds", "histogram", "Time spent in each named stage.")
+REGISTRY.describe("upstream_requests_total", "counter", "Calls to external services by outcome.")
+REGISTRY.describe("upstream_seconds", "histogram", "Latency of calls to external services.")
+REGISTRY.describe("cache_requests_total", "counter", "Cache lookups by result.")
+REGISTRY.describe("cache_hit_ratio", "gauge", "Hits / lookups per cache since start.")
+REGISTRY.describe("http_request_seconds", "histogram", "Flask request latency.")
+REGISTRY.describe("http_response_bytes", "histogram", "Flask response body size.")
+REGISTRY.describe("payload_bytes", "histogram", "Size of payloads read or built, by kind.")
+
+
+# ------------------------------------------------------------
+# Recording helpers
+# ------------------------------------------------------------
+_request_state = threading.local()
+
+
+def _record_stage(stage: str, seconds: float) -> None:
+    REGISTRY.observe("stage_seconds", seconds, stage=stage)
+    stages = getattr(_request_state, "stages", None)
+    if stages is not None:
+        stages.append((stage, seconds))
+
+
+@contextmanager
+def timer(stage: str):
+    """Time the block as `stage` (also listed in the current request's Server-Timing)."""
+    if not _ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_stage(stage, time.perf_counter() - start)
+
+
+def timed(stage: str):
+    """Decorator form of `timer`."""
+    def decorate(func):
+        if not _ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record_stage(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def upstream(service: str):
+    """Count and time one call to an external service; exceptions count as errors."""
+    if not _ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - start
+        REGISTRY.inc("upstream_requests_total", service=service, outcome=outcome)
+        REGISTRY.observe("upstream_seconds", elapsed, service=service)
+        _record_stage(f"upstream.{service}", elapsed)
+
+
+def cache_result(cache: str, hit: bool) -> None:
+    if _ENABLED:
+        REGISTRY.inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def payload_size(kind: str, nbytes: int) -> None:
+    if _ENABLED:
+        REGISTRY.observe("payload_bytes", nbytes, buckets=_BYTE_BUCKETS, kind=kind)
+
+
+# ------------------------------------------------------------
+# Flask integration
+# ------------------------------------------------------------
+def _server_timing(stages: list, total: float) -> str:
+    parts = [
+        f"{name.replace(' ', '_')};dur={seconds * 1000:.2f}"
+        for name, seconds in stages
+    ]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def init_app(app, server_timing: Optional[bool] = None) -> None:
+    """Time every request, record response sizes and serve GET /metrics."""
+    from flask import Response, request
+
+    send_timing = _SERVER_TIMING if server_timing is None else server_timing
+
+    @app.before_request
+    def _start_timer():
+        _request_state.start = time.perf_counter()
+        _request_state.stages = []
+
+    @app.after_request
+    def _finish_timer(response):
+        start = getattr(_request_state, "start", None)
+        if start is None or not _ENABLED:
+            return response
+        total = time.perf_counter() - start
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        if endpoint != "/metrics":
+            REGISTRY.observe("http_request_seconds", total,
+                             endpoint=endpoint, method=request.method, status=response.status_code)
+            if not response.direct_passthrough and response.content_length is not None:
+                REGISTRY.observe("http_response_bytes", response.content_length,
+                                 buckets=_BYTE_BUCKETS, endpoint=endpoint)
+        if send_timing:
+            response.headers["Server-Timing"] = _server_timing(_request_state.stages, total)
+        _request_state.start = None
+        _request_state.stages = None
+        return response
+
+    @app.route("/metrics")
+    def _metrics():
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
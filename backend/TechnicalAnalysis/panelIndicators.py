@@ -0,0 +1,141 @@
+"""
+Indicators over whole price panels.
+
+Every function takes arrays shaped (bars,) or (bars, symbols) with time on axis 0,
+oldest bar first, and NaN before a symbol's first bar. The recursive indicators
+loop over time only, so each step is one vector operation across all symbols;
+inputs with only a few columns run pandas' per-column ewm loop instead.
+The maths matches the list-based versions in calculateEma / calculateRSI /
+calculateOBV (EMA and Wilder averages are seeded with a simple average).
+"""
+import numpy as np
+import pandas as pd
+
+# Below this many columns a per-column C loop (pandas ewm) beats stepping over rows
+_NARROW_COLUMNS = 128
+
+
+def _as_2d(values) -> tuple[np.ndarray, bool]:
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 1:
+        return arr[:, None], True
+    return arr, False
+
+
+def _first_valid(arr: np.ndarray) -> np.ndarray:
+    """Row of the first non-NaN value in each column (len(arr) if none)."""
+    valid = ~np.isnan(arr)
+    return np.where(valid.any(axis=0), valid.argmax(axis=0), len(arr))
+
+
+def seeded_ema(values, period: int, alpha: float, out: np.ndarray = None) -> np.ndarray:
+    """
+    Exponential average seeded with the simple average of each column's first `period` values.
+
+    Rows before the seed are NaN. A NaN inside a series carries the previous value forward.
+    `out` may be given to write into a preallocated (bars, symbols) float64 array.
+    """
+    x, squeeze = _as_2d(values)
+    n_bars, n_cols = x.shape
+    if out is None:
+        out = np.empty_like(x)
+    out2d = out.reshape(n_bars, n_cols)
+    out2d.fill(np.nan)
+
+    seed_row = _first_valid(x) + period - 1
+    cols = np.arange(n_cols)
+    seeded = seed_row < n_bars
+    state = np.full(n_cols, np.nan)
+    seed_values = np.full(n_cols, np.nan)
+    if seeded.any():
+        # Mean of the `period` values ending at each column's seed row
+        rows = seed_row[seeded, None] - np.arange(period)
+        window = x[rows, cols[seeded, None]]
+        seed_values[seeded] = np.nansum(window, axis=1) / period
+    if n_cols <= _NARROW_COLUMNS:
+        # Replace each seed row with its seed, blank everything before it, and let
+        # ewm(adjust=False) run the same recursion; ignore_na carries values over gaps.
+        after = np.arange(n_bars)[:, None] > seed_row
+        x = np.where(after, x, np.nan)
+        x[seed_row[seeded], cols[seeded]] = seed_values[seeded]
+        out2d[:] = pd.DataFrame(x).ewm(alpha=alpha, adjust=False, ignore_na=True).mean().to_numpy()
+        return out[:, 0] if squeeze and out.ndim == 2 else out
+
+    # Columns grouped by the row at which they get their seed
+    order = np.argsort(seed_row, kind="stable")
+    bounds = np.searchsorted(seed_row[order], np.arange(n_bars + 1))
+    first = int(seed_row[seeded].min()) if seeded.any() else n_bars
+
+    step = np.empty(n_cols)
+    skip = np.empty(n_cols, dtype=bool)
+    for t in range(first, n_bars):
+        np.subtract(x[t], state, out=step)
+        step *= alpha
+        np.isnan(step, out=skip)
+        np.add(state, step, out=state, where=~skip)
+        lo, hi = bounds[t], bounds[t + 1]
+        if lo < hi:
+            cols_now = order[lo:hi]
+            state[cols_now] = seed_values[cols_now]
+        out2d[t] = state
+    return out[:, 0] if squeeze and out.ndim == 2 else out
+
+
+def ema(values, period: int, out: np.ndarray = None) -> np.ndarray:
+    """EMA with alpha = 2 / (period + 1), as in calculateEma.get_ema_list."""
+    return seeded_ema(values, period, 2.0 / (period + 1), out=out)
+
+
+def sma(values, period: int) -> np.ndarray:
+    """Simple moving average; NaN until `period` values are available."""
+    x, squeeze = _as_2d(values)
+    csum = np.cumsum(np.nan_to_num(x), axis=0)
+    count = np.cumsum(~np.isnan(x), axis=0)
+    total = csum.copy()
+    total[period:] -= csum[:-period]
+    n = count.copy()
+    n[period:] -= count[:-period]
+    result = np.where(n == period, total / period, np.nan)
+    return result[:, 0] if squeeze else result
+
+
+def rolling_std(values, period: int) -> np.ndarray:
+    """Population standard deviation over a trailing window (statistics.pstdev)."""
+    x, squeeze = _as_2d(values)
+    mean = sma(x, period)
+    mean_sq = sma(x * x, period)
+    result = np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+    return result[:, 0] if squeeze else result
+
+
+def rsi(closes, period: int = 14) -> np.ndarray:
+    """Wilder RSI, matching calculateRSI.calculate_rsi."""
+    x, squeeze = _as_2d(closes)
+    delta = np.full_like(x, np.nan)
+    delta[1:] = x[1:] - x[:-1]
+    avg_gain = seeded_ema(np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0)), period, 1.0 / period)
+    avg_loss = seeded_ema(np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0)), period, 1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    result = np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, result)
+    return result[:, 0] if squeeze else result
+
+
+def obv(closes, volumes) -> np.ndarray:
+    """On-Balance Volume, matching calculateOBV.compute_obv (0 on each symbol's first bar)."""
+    c, squeeze = _as_2d(closes)
+    v, _ = _as_2d(volumes)
+    step = np.zeros_like(c)
+    step[1:] = np.sign(c[1:] - c[:-1]) * v[1:]
+    step = np.nan_to_num(step)
+    result = np.cumsum(step, axis=0)
+    result[np.isnan(c)] = np.nan
+    return result[:, 0] if squeeze else result
+
+
+def pct_change(values, periods: int = 1) -> np.ndarray:
+    x, squeeze = _as_2d(values)
+    result = np.full_like(x, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result[periods:] = x[periods:] / x[:-periods] - 1.0
+    return result[:, 0] if squeeze else result
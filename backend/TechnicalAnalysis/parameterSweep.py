@@ -0,0 +1,313 @@
+"""
+Grid search over indicator periods on the local bar store.
+
+    python -m TechnicalAnalysis.parameterSweep ema_cross --grid fast=5:60:5 slow=50,100,200
+    python -m TechnicalAnalysis.parameterSweep obv_bands --grid ema_period=10:40:5 bb_k=1.5,2,2.5
+
+Combinations are sorted so neighbours share their leading parameters, cut into
+chunks and run on a process pool. Every worker memory-maps the same store
+version and memoizes indicators by (kind, period), so e.g. one EMA per
+distinct period is computed per worker rather than one per combination. The
+memo is bounded in bytes (SWEEP_MEMO_MB, split across the workers). With
+--symbols, a contiguous block of store columns stays a view of the shared map;
+other selections are gathered on first use and memoized like an indicator.
+Each finished chunk is written as its own .npz; re-running the same command
+skips chunks that already exist.
+"""
+import os
+import json
+import hashlib
+import argparse
+import itertools
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from . import backtest
+from . import barStore
+from . import panelIndicators
+
+# ---------- configuration ---------- #
+_RESULTS_DIR = os.environ.get("SWEEP_RESULTS_DIR", "sweep_results")
+_CHUNK_SIZE  = 32                  # combinations per task
+_MEMO_MB     = int(os.environ.get("SWEEP_MEMO_MB", "4096"))   # memoized arrays, all workers together
+_WORKERS     = os.cpu_count() or 1
+# ----------------------------------- #
+
+
+# ------------------------------------------------------------
+# Shared indicator cache
+# ------------------------------------------------------------
+def _column_slice(cols: Optional[np.ndarray]):
+    """`cols` as a slice when it is a contiguous ascending run (indexing then returns a view)."""
+    if cols is None:
+        return slice(None)
+    cols = np.asarray(cols)
+    if len(cols) and np.array_equal(cols, np.arange(cols[0], cols[0] + len(cols))):
+        return slice(int(cols[0]), int(cols[0]) + len(cols))
+    return cols
+
+
+class _Indicators:
+    """Indicator arrays over the worker's panel, memoized by (kind, *periods) up to `memo_bytes`."""
+
+    def __init__(self, panel: barStore.BarPanel, cols: Optional[np.ndarray], memo_bytes: int):
+        self.panel = panel
+        self.cols = _column_slice(cols)
+        self.memo_bytes = memo_bytes
+        self._memo: OrderedDict = OrderedDict()
+        self._held = 0
+
+    def _get(self, key: tuple, build):
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+        value = build()
+        self._memo[key] = value
+        self._held += value.nbytes
+        # Least recently used first; the value just built is always kept
+        while self._held > self.memo_bytes and len(self._memo) > 1:
+            self._held -= self._memo.popitem(last=False)[1].nbytes
+        return value
+
+    def field(self, name: str) -> np.ndarray:
+        """Bar field over the swept columns: a view of the store map, or a memoized gather."""
+        if isinstance(self.cols, slice):
+            return self.panel[name][:, self.cols]
+        return self._get(("field", name), lambda: self.panel[name][:, self.cols])
+
+    @property
+    def closes(self) -> np.ndarray:
+        return self.field("close")
+
+    @property
+    def volumes(self) -> np.ndarray:
+        return self.field("volume")
+
+    def ema(self, period: int) -> np.ndarray:
+        return self._get(("ema", period), lambda: panelIndicators.ema(self.closes, period))
+
+    def rsi(self, period: int) -> np.ndarray:
+        return self._get(("rsi", period), lambda: panelIndicators.rsi(self.closes, period))
+
+    def rsi_sma(self, period: int, smooth: int) -> np.ndarray:
+        if smooth <= 1:
+            return self.rsi(period)
+        return self._get(("rsi_sma", period, smooth),
+                         lambda: panelIndicators.sma(self.rsi(period), smooth))
+
+    def macd(self, fast: int, slow: int) -> np.ndarray:
+        return self._get(("macd", fast, slow), lambda: self.ema(fast) - self.ema(slow))
+
+    def macd_signal(self, fast: int, slow: int, signal: int) -> np.ndarray:
+        return self._get(("macd_signal", fast, slow, signal),
+                         lambda: panelIndicators.ema(self.macd(fast, slow), signal))
+
+    def obv(self) -> np.ndarray:
+        return self._get(("obv",), lambda: panelIndicators.obv(self.closes, self.volumes))
+
+    def obv_ema(self, period: int) -> np.ndarray:
+        return self._get(("obv_ema", period), lambda: panelIndicators.ema(self.obv(), period))
+
+    def obv_std(self, period: int) -> np.ndarray:
+        return self._get(("obv_std", period), lambda: panelIndicators.rolling_std(self.obv(), period))
+
+
+# ------------------------------------------------------------
+# Strategies: name → (parameter names, positions(indicators, **params))
+# ------------------------------------------------------------
+def _ema_cross(ind: _Indicators, fast: int, slow: int) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        return (ind.ema(fast) > ind.ema(slow)).astype(np.float64)
+
+
+def _rsi(ind: _Indicators, period: int, smooth: int, lower: float, upper: float) -> np.ndarray:
+    osc = ind.rsi_sma(period, smooth)
+    with np.errstate(invalid="ignore"):
+        return backtest.hold_until(osc < lower, osc > upper)
+
+
+def _macd(ind: _Indicators, fast: int, slow: int, signal: int) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        return (ind.macd(fast, slow) > ind.macd_signal(fast, slow, signal)).astype(np.float64)
+
+
+def _obv_bands(ind: _Indicators, ema_period: int, bb_k: float) -> np.ndarray:
+    obv, mid, sd = ind.obv(), ind.obv_ema(ema_period), ind.obv_std(ema_period)
+    with np.errstate(invalid="ignore"):
+        # Buy OBV washouts below the lower band, sell once it runs above the upper band
+        return backtest.hold_until(obv < mid - bb_k * sd, obv > mid + bb_k * sd)
+
+
+STRATEGIES = {
+    "ema_cross": (("fast", "slow"), _ema_cross),
+    "rsi":       (("period", "smooth", "lower", "upper"), _rsi),
+    "macd":      (("fast", "slow", "signal"), _macd),
+    "obv_bands": (("ema_period", "bb_k"), _obv_bands),
+}
+DEFAULTS = {
+    "ema_cross": {"fast": 50, "slow": 200},
+    "rsi":       {"period": 14, "smooth": 9, "lower": 30.0, "upper": 70.0},
+    "macd":      {"fast": 12, "slow": 26, "signal": 9},
+    "obv_bands": {"ema_period": 20, "bb_k": 2.0},
+}
+
+
+# ------------------------------------------------------------
+# Workers
+# ------------------------------------------------------------
+_worker: dict = {}
+
+
+def _init_worker(store_dir: str, version: int, cols: Optional[np.ndarray], memo_bytes: int) -> None:
+    panel = barStore.load_panel(store_dir)
+    if panel is None or panel.version != version:
+        raise RuntimeError(f"Bar store version changed while sweeping (expected v{version})")
+    _worker["indicators"] = _Indicators(panel, cols, memo_bytes)
+
+
+def _run_chunk(strategy: str, combos: list[tuple], costs: dict) -> dict[str, np.ndarray]:
+    names, positions_fn = STRATEGIES[strategy]
+    ind = _worker["indicators"]
+    closes, opens = ind.closes, ind.field("open")
+
+    returns, turnover = [], []
+    for combo in combos:
+        sim = backtest.simulate(closes, positions_fn(ind, **dict(zip(names, combo))), opens, **costs)
+        returns.append(sim["returns"].mean(axis=1))
+        turnover.append(sim["turnover"].mean(axis=1))
+    stats = backtest.risk_stats(np.column_stack(returns), np.column_stack(turnover))
+
+    columns = {name: np.array([c[k] for c in combos]) for k, name in enumerate(names)}
+    columns.update({c: stats[c].to_numpy() for c in stats.columns})
+    return columns
+
+
+# ------------------------------------------------------------
+# Driver
+# ------------------------------------------------------------
+def expand_grid(strategy: str, grid: dict[str, Sequence]) -> list[tuple]:
+    """All combinations in `grid` (defaults for missing parameters), sorted by parameter order."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{strategy}'; choose from {', '.join(STRATEGIES)}")
+    names = STRATEGIES[strategy][0]
+    unknown = set(grid) - set(names)
+    if unknown:
+        raise ValueError(f"'{strategy}' has no parameter(s) {', '.join(sorted(unknown))}")
+    axes = [sorted(set(grid.get(n, [DEFAULTS[strategy][n]]))) for n in names]
+    return list(itertools.product(*axes))
+
+
+def _run_dir(strategy: str, grid: dict, version: int, symbols, costs: dict, results_dir: str) -> str:
+    key = json.dumps(
+        {"strategy": strategy, "grid": {k: sorted(v) for k, v in grid.items()},
+         "version": version, "symbols": symbols, "costs": costs},
+        sort_keys=True, default=float,
+    )
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return os.path.join(results_dir, f"{strategy}-{digest}")
+
+
+def run_sweep(strategy: str, grid: dict[str, Sequence],
+              symbols: Optional[Sequence[str]] = None,
+              store_dir: str = barStore._STORE_DIR,
+              results_dir: str = _RESULTS_DIR,
+              workers: int = _WORKERS,
+              chunk_size: int = _CHUNK_SIZE,
+              log: Optional[Callable[[str], None]] = None,
+              **costs) -> str:
+    """
+    Run (or resume) a sweep and return the directory its results are written to.
+
+    Args:
+        strategy: One of STRATEGIES.
+        grid: {parameter: [values]}; parameters left out use DEFAULTS.
+        symbols: Restrict to these tickers (default: the whole store).
+        log: Progress sink, e.g. print (default: silent).
+        costs: slippage_bps / commission_bps / commission_per_share for backtest.simulate.
+    """
+    panel = barStore.load_panel(store_dir)
+    if panel is None:
+        raise RuntimeError("The bar store is empty; run `python -m TechnicalAnalysis.screener --refresh` first.")
+    cols = panel.columns(symbols) if symbols is not None else None
+    combos = expand_grid(strategy, grid)
+
+    out_dir = _run_dir(strategy, grid, panel.version, list(symbols) if symbols else None, costs, results_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "manifest.json"), "w") as fh:
+        json.dump({"strategy": strategy, "grid": grid, "store_version": panel.version,
+                   "combinations": len(combos), "chunk_size": chunk_size, "costs": costs},
+                  fh, indent=2, default=float)
+
+    chunks = {
+        i: combos[start:start + chunk_size]
+        for i, start in enumerate(range(0, len(combos), chunk_size))
+    }
+    pending = {i: c for i, c in chunks.items()
+               if not os.path.isfile(os.path.join(out_dir, f"chunk_{i:05d}.npz"))}
+    log = log or (lambda _: None)
+    log(f"{strategy}: {len(combos)} combinations, {len(chunks) - len(pending)}/{len(chunks)} chunks done")
+    if not pending:
+        return out_dir
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(store_dir, panel.version, cols, _MEMO_MB * 2**20 // max(workers, 1))) as pool:
+        futures = {pool.submit(_run_chunk, strategy, c, costs): i for i, c in pending.items()}
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            path = os.path.join(out_dir, f"chunk_{i:05d}.npz")
+            with open(path + ".tmp", "wb") as fh:
+                np.savez(fh, **future.result())
+            os.replace(path + ".tmp", path)
+            log(f"  chunk {i} written ({done}/{len(pending)})")
+    return out_dir
+
+
+def load_results(out_dir: str) -> pd.DataFrame:
+    """All finished chunks of a sweep as one DataFrame, in combination order."""
+    names = sorted(n for n in os.listdir(out_dir) if n.startswith("chunk_") and n.endswith(".npz"))
+    frames = []
+    for name in names:
+        with np.load(os.path.join(out_dir, name)) as data:
+            frames.append(pd.DataFrame({k: data[k] for k in data.files}))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _parse_values(text: str) -> list:
+    """`5:60:5` → range(5, 60, 5); `1.5,2,2.5` → list. Integers stay integers."""
+    def number(s):
+        return float(s) if any(ch in s for ch in ".eE") else int(s)
+    if ":" in text:
+        parts = [number(p) for p in text.split(":")]
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else 1
+        return list(np.arange(start, stop, step).tolist())
+    return [number(p) for p in text.split(",") if p]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep indicator periods over the bar store")
+    parser.add_argument("strategy", choices=sorted(STRATEGIES))
+    parser.add_argument("--grid", nargs="+", default=[], metavar="PARAM=VALUES",
+                        help="e.g. fast=5:60:5 slow=50,100,200")
+    parser.add_argument("--symbols", nargs="+", help="Restrict to these tickers")
+    parser.add_argument("--workers", type=int, default=_WORKERS)
+    parser.add_argument("--top", type=int, default=20, help="Rows to print, best Sharpe first")
+    args = parser.parse_args()
+
+    grid = {}
+    for item in args.grid:
+        name, _, values = item.partition("=")
+        grid[name] = _parse_values(values)
+
+    out_dir = run_sweep(args.strategy, grid, symbols=args.symbols, workers=args.workers, log=print)
+    results = load_results(out_dir).sort_values("sharpe", ascending=False)
+    print(f"Results in {out_dir}")
+    print(results.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
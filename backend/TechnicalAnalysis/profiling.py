@@ -0,0 +1,179 @@
+"""
+Opt-in profiling of individual Flask requests.
+
+Enabled only when PROFILING_ENABLED=1. A request is profiled when it carries
+`?profile=cpu|mem|all` (`?profile=1` means cpu; the value must be followed by
+`&profile_token=<PROFILE_TOKEN>` when a token is configured), or at random for
+a PROFILE_SAMPLE_RATE fraction of traffic.
+
+• cpu: a background thread samples the request thread's stack every
+  PROFILE_INTERVAL_MS and writes `<id>.folded`, one "frame;frame;... count" line
+  per stack — the input format of flamegraph.pl, speedscope and inferno.
+• mem: tracemalloc runs for the duration of the request; `<id>.tracemalloc`
+  (load with tracemalloc.Snapshot.load) and a `<id>.top.txt` summary are written.
+
+Files go to PROFILE_DIR; the response carries their id in an X-Profile header.
+"""
+import os
+import sys
+import time
+import random
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Optional
+
+# ---------- configuration ---------- #
+_ENABLED     = os.environ.get("PROFILING_ENABLED", "0") == "1"
+_TOKEN       = os.environ.get("PROFILE_TOKEN", "")
+_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+_SAMPLE_MODE = os.environ.get("PROFILE_SAMPLE_MODE", "cpu")
+_INTERVAL    = float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000.0
+_PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+_TOP_LINES   = 25
+_MEM_FRAMES  = 10
+# ----------------------------------- #
+
+_MODES = {"1": {"cpu"}, "cpu": {"cpu"}, "mem": {"mem"}, "all": {"cpu", "mem"}}
+
+
+class StackSampler:
+    """Counts the stacks one thread is executing, sampled from a helper thread."""
+
+    def __init__(self, thread_id: int, interval: float = _INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._labels: dict = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename
+            parts = path.replace("\\", "/").split("/")
+            short = "/".join(parts[-2:])
+            label = f"{code.co_name} ({short}:{code.co_firstlineno})".replace(";", ":").replace(" ", "_")
+            self._labels[code] = label
+        return label
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if codes:
+                self.stacks[tuple(codes)] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        """Root-first stacks in the collapsed "a;b;c count" format."""
+        return "".join(
+            ";".join(self._label(code) for code in reversed(stack)) + f" {count}\n"
+            for stack, count in self.stacks.most_common()
+        )
+
+
+class _Profile:
+    """Profiling state of one request."""
+
+    _mem_lock = threading.Lock()
+
+    def __init__(self, modes: set, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.sampler: Optional[StackSampler] = None
+        self.tracing_mem = False
+        self.started_tracemalloc = False
+        if "cpu" in modes:
+            self.sampler = StackSampler(threading.get_ident()).start()
+        # tracemalloc is process-wide, so only one request traces memory at a time
+        if "mem" in modes and self._mem_lock.acquire(blocking=False):
+            self.tracing_mem = True
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(_MEM_FRAMES)
+                self.started_tracemalloc = True
+
+    def finish(self, out_dir: str, write: bool = True) -> list[str]:
+        written = []
+        if write:
+            os.makedirs(out_dir, exist_ok=True)
+        if self.sampler is not None:
+            self.sampler.stop()
+            if write:
+                path = os.path.join(out_dir, f"{self.name}.folded")
+                with open(path, "w", encoding="utf-8") as fh:
+                    fh.write(self.sampler.folded())
+                written.append(path)
+        if self.tracing_mem:
+            try:
+                if write:
+                    snapshot = tracemalloc.take_snapshot().filter_traces((
+                        tracemalloc.Filter(False, tracemalloc.__file__),
+                        tracemalloc.Filter(False, __file__),
+                        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                    ))
+                    path = os.path.join(out_dir, f"{self.name}.tracemalloc")
+                    snapshot.dump(path)
+                    written.append(path)
+                    top = os.path.join(out_dir, f"{self.name}.top.txt")
+                    with open(top, "w", encoding="utf-8") as fh:
+                        for stat in snapshot.statistics("lineno")[:_TOP_LINES]:
+                            fh.write(f"{stat}\n")
+                    written.append(top)
+            finally:
+                if self.started_tracemalloc:
+                    tracemalloc.stop()
+                self._mem_lock.release()
+        return written
+
+
+def _requested_modes(args) -> set:
+    value = args.get("profile")
+    if value is not None:
+        if _TOKEN and args.get("profile_token") != _TOKEN:
+            return set()
+        return _MODES.get(value, set())
+    if _SAMPLE_RATE > 0 and random.random() < _SAMPLE_RATE:
+        return _MODES.get(_SAMPLE_MODE, {"cpu"})
+    return set()
+
+
+def init_app(app, out_dir: str = _PROFILE_DIR, enabled: Optional[bool] = None) -> None:
+    """Attach the request hooks; does nothing unless profiling is enabled."""
+    if not (_ENABLED if enabled is None else enabled):
+        return
+    from flask import g, request
+
+    @app.before_request
+    def _start_profile():
+        modes = _requested_modes(request.args)
+        if modes:
+            endpoint = (request.endpoint or "unmatched").replace("/", "_")
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{endpoint}-{random.getrandbits(32):08x}"
+            g._profile = _Profile(modes, name)
+
+    @app.after_request
+    def _finish_profile(response):
+        profile = g.pop("_profile", None)
+        if profile is not None:
+            profile.finish(out_dir)
+            response.headers["X-Profile"] = profile.name
+        return response
+
+    @app.teardown_request
+    def _abandon_profile(exc):
+        # Requests that raised never reach after_request; stop the sampler anyway
+        profile = g.pop("_profile", None)
+        if profile is not None:
+            profile.finish(out_dir, write=False)
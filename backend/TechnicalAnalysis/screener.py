@@ -0,0 +1,310 @@
+import os
+import re
+import ast
+import argparse
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from . import barStore
+from . import metrics
+from . import panelIndicators
+
+# ---------- configuration ---------- #
+_CACHE_DIR       = os.environ.get("SCREEN_CACHE_DIR", "screen_cache")
+DEFAULT_COLUMNS  = ("close", "volume", "change_1", "rsi_14", "ema_50", "ema_200", "sma_50", "avgvol_20")
+# ----------------------------------- #
+
+# column kind → (relative cost, builder(field_getter, period) → (dates, symbols) array)
+# Raw fields cost nothing, window sums are one pass, recursive averages loop over time.
+_COLUMN_RE = re.compile(r"^(?P<kind>[a-z]+)(?:_(?P<period>\d+))?$")
+_BUILDERS: dict[str, tuple[int, Callable]] = {
+    "open":   (0, lambda p, n: p("open")),
+    "high":   (0, lambda p, n: p("high")),
+    "low":    (0, lambda p, n: p("low")),
+    "close":  (0, lambda p, n: p("close")),
+    "volume": (0, lambda p, n: p("volume")),
+    "vwap":   (0, lambda p, n: p("vwap")),
+    "change": (1, lambda p, n: panelIndicators.pct_change(p("close"), n or 1) * 100.0),
+    "sma":    (2, lambda p, n: panelIndicators.sma(p("close"), n)),
+    "avgvol": (2, lambda p, n: panelIndicators.sma(p("volume"), n)),
+    "ema":    (3, lambda p, n: panelIndicators.ema(p("close"), n)),
+    "rsi":    (3, lambda p, n: panelIndicators.rsi(p("close"), n)),
+}
+_NEEDS_PERIOD = {"sma", "avgvol", "ema", "rsi"}
+
+_ALLOWED_CMP = {
+    ast.Lt: np.less, ast.LtE: np.less_equal,
+    ast.Gt: np.greater, ast.GtE: np.greater_equal,
+    ast.Eq: np.equal, ast.NotEq: np.not_equal,
+}
+_ALLOWED_BIN = {
+    ast.Add: np.add, ast.Sub: np.subtract,
+    ast.Mult: np.multiply, ast.Div: np.divide,
+}
+
+
+class ScreenError(ValueError):
+    """Raised for filter expressions the screener cannot evaluate."""
+
+
+def _column_spec(name: str) -> tuple[int, str, Optional[int]]:
+    m = _COLUMN_RE.match(name)
+    if not m or m.group("kind") not in _BUILDERS:
+        raise ScreenError(f"Unknown column '{name}'")
+    kind = m.group("kind")
+    period = int(m.group("period")) if m.group("period") else None
+    if kind in _NEEDS_PERIOD and not period:
+        raise ScreenError(f"Column '{name}' needs a period, e.g. {kind}_14")
+    return _BUILDERS[kind][0], kind, period
+
+
+# ------------------------------------------------------------
+# Expression parsing
+# ------------------------------------------------------------
+def _check(node: ast.AST) -> set[str]:
+    """Validate the expression tree and return the columns it references."""
+    if isinstance(node, ast.BoolOp):
+        return set().union(*(_check(v) for v in node.values))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+        return _check(node.operand)
+    if isinstance(node, ast.Compare):
+        if not all(type(op) in _ALLOWED_CMP for op in node.ops):
+            raise ScreenError("Unsupported comparison")
+        return _check(node.left).union(*(_check(c) for c in node.comparators))
+    if isinstance(node, ast.BinOp):
+        if type(node.op) not in _ALLOWED_BIN:
+            raise ScreenError("Only + - * / are supported")
+        return _check(node.left) | _check(node.right)
+    if isinstance(node, ast.Name):
+        _column_spec(node.id)
+        return {node.id}
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return set()
+    raise ScreenError(f"Unsupported syntax: {ast.dump(node)[:60]}")
+
+
+def _is_condition(node: ast.AST) -> bool:
+    """True for comparisons and and/or/not combinations of them."""
+    if isinstance(node, ast.BoolOp):
+        return all(_is_condition(v) for v in node.values)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return _is_condition(node.operand)
+    return isinstance(node, ast.Compare)
+
+
+def parse_filter(expression: str) -> list[tuple[int, ast.AST, set[str]]]:
+    """
+    Split a filter into top-level `and` clauses, each tagged with its cost.
+
+    Returns:
+        [(cost, clause, columns)] sorted cheapest first, so clauses over raw fields
+        prune the universe before any indicator has to be computed.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval").body
+    except SyntaxError as e:
+        raise ScreenError(f"Invalid filter: {e.msg}") from None
+
+    if isinstance(tree, ast.BoolOp) and isinstance(tree.op, ast.And):
+        clauses = tree.values
+    else:
+        clauses = [tree]
+
+    planned = []
+    for clause in clauses:
+        columns = _check(clause)
+        if not _is_condition(clause):
+            raise ScreenError(f"'{ast.unparse(clause)}' is not a condition; compare a column, e.g. close > 10")
+        if not columns:
+            raise ScreenError(f"'{ast.unparse(clause)}' does not reference any column")
+        cost = max((_column_spec(c)[0] for c in columns), default=0)
+        planned.append((cost, clause, columns))
+    planned.sort(key=lambda p: p[0])
+    return planned
+
+
+def _evaluate(node: ast.AST, values: dict[str, np.ndarray]) -> np.ndarray:
+    if isinstance(node, ast.BoolOp):
+        parts = [_evaluate(v, values) for v in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return combine.reduce(parts)
+    if isinstance(node, ast.UnaryOp):
+        operand = _evaluate(node.operand, values)
+        return np.logical_not(operand) if isinstance(node.op, ast.Not) else -operand
+    if isinstance(node, ast.Compare):
+        result = None
+        left = _evaluate(node.left, values)
+        for op, comp in zip(node.ops, node.comparators):
+            right = _evaluate(comp, values)
+            part = _ALLOWED_CMP[type(op)](left, right)
+            result = part if result is None else result & part
+            left = right
+        return result
+    if isinstance(node, ast.BinOp):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return _ALLOWED_BIN[type(node.op)](_evaluate(node.left, values), _evaluate(node.right, values))
+    if isinstance(node, ast.Name):
+        return values[node.id]
+    return np.float64(node.value)
+
+
+# ------------------------------------------------------------
+# Column cache
+# ------------------------------------------------------------
+class Screener:
+    """
+    Evaluates filters over the latest value of each column for every symbol in the store.
+
+    Latest values are cached per bar-store version (in memory and as one .npy per
+    column on disk), so once `precompute` has run a full-universe screen is just a
+    few vectorised comparisons.
+    """
+
+    def __init__(self, panel: barStore.BarPanel, cache_dir: str = _CACHE_DIR):
+        self.panel = panel
+        self.cache_dir = os.path.join(cache_dir, f"v{panel.version}")
+        self._latest: dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _cache_path(self, column: str) -> str:
+        return os.path.join(self.cache_dir, f"{column}.npy")
+
+    def _compute(self, column: str, cols: Optional[np.ndarray]) -> np.ndarray:
+        _, kind, period = _column_spec(column)
+        fields = self.panel.fields
+        if cols is None:
+            get = fields.__getitem__
+        else:
+            get = lambda f: fields[f][:, cols]
+        return _BUILDERS[kind][1](get, period)[-1]
+
+    def latest(self, column: str, cols: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Latest value of `column` for every symbol (or only the columns `cols`).
+
+        A cached full-universe vector is sliced when available; otherwise only the
+        requested symbols are computed, and only full-universe results are cached.
+        """
+        full = self._latest.get(column)
+        if full is None and os.path.isfile(self._cache_path(column)):
+            full = self._latest[column] = np.load(self._cache_path(column))
+        metrics.cache_result("screen_columns", hit=full is not None)
+        if full is not None:
+            return full if cols is None else full[cols]
+
+        with metrics.timer("screen.compute_column"):
+            values = self._compute(column, cols)
+        if cols is None:
+            with self._lock:
+                self._latest[column] = values
+                os.makedirs(self.cache_dir, exist_ok=True)
+                np.save(self._cache_path(column), values)
+        return values
+
+    def precompute(self, columns=DEFAULT_COLUMNS) -> None:
+        for column in columns:
+            self.latest(column)
+
+    @metrics.timed("screen.evaluate")
+    def screen(self, expression: str, extra_columns=(),
+               sort: Optional[str] = None, descending: bool = False,
+               limit: Optional[int] = None) -> list[dict]:
+        """
+        Symbols passing `expression`, with every referenced column's latest value.
+
+        Clauses run cheapest first; each later clause is evaluated only on the
+        symbols that survived the earlier ones.
+        """
+        plan = parse_filter(expression)
+        survivors = np.arange(len(self.panel.symbols))
+        # Symbols without a bar on the latest day are not screened
+        survivors = survivors[~np.isnan(self.latest("close"))]
+        values: dict[str, np.ndarray] = {}
+
+        for _, clause, columns in plan:
+            if not len(survivors):
+                break
+            for c in columns:
+                if c not in values:
+                    values[c] = self.latest(c, survivors)
+            with np.errstate(invalid="ignore"):
+                keep = np.broadcast_to(np.asarray(_evaluate(clause, values), dtype=bool), survivors.shape)
+            survivors = survivors[keep]
+            values = {c: v[keep] for c, v in values.items()}
+
+        report = sorted(set().union(*(p[2] for p in plan)) | set(extra_columns) | ({sort} if sort else set()))
+        for c in report:
+            if c not in values:
+                values[c] = self.latest(c, survivors)
+
+        order = np.arange(len(survivors))
+        if sort:
+            key = values[sort]
+            order = np.argsort(-key if descending else key, kind="stable")
+        if limit:
+            order = order[:limit]
+
+        symbols = self.panel.symbols
+        return [
+            {"symbol": symbols[survivors[i]], **{c: _json_float(values[c][i]) for c in report}}
+            for i in order
+        ]
+
+
+def _json_float(value) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else round(value, 6)
+
+
+_screener: Optional[Screener] = None
+_screener_lock = threading.Lock()
+
+
+def get_screener() -> Screener:
+    """Screener over the current bar-store version, rebuilt when the store changes."""
+    global _screener
+    version = barStore.current_version()
+    if version is None:
+        raise ScreenError("The bar store is empty; run the screener with --refresh first.")
+    if _screener is None or _screener.panel.version != version:
+        with _screener_lock:
+            if _screener is None or _screener.panel.version != version:
+                _screener = Screener(barStore.load_panel())
+    return _screener
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Screen the whole universe, e.g. \"rsi_14 < 30 and close > ema_200\""
+    )
+    parser.add_argument("expression", help="Filter expression over indicator columns")
+    parser.add_argument("--sort", help="Column to sort by")
+    parser.add_argument("--desc", action="store_true", help="Sort descending")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum rows to print")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Pull missing days from Polygon and precompute the default columns first")
+    args = parser.parse_args()
+
+    if args.refresh:
+        barStore.refresh_panel()
+        get_screener().precompute()
+
+    rows = get_screener().screen(args.expression, sort=args.sort,
+                                 descending=args.desc, limit=args.limit)
+    if not rows:
+        print("No symbols matched.")
+        return
+    columns = list(rows[0])
+    print("  ".join(f"{c:>12}" for c in columns))
+    for row in rows:
+        cells = [
+            row[c] if isinstance(row[c], str) else "nan" if row[c] is None else f"{row[c]:.2f}"
+            for c in columns
+        ]
+        print("  ".join(f"{cell:>12}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+One copy of the daily bars in RAM, shared read-only by every worker process.
+
+A single loader process publishes the bar store into a segment directory
+(on /dev/shm by default, so it lives in shared memory rather than on disk):
+
+    <segment>/GENERATION          → current generation number
+    <segment>/g<N>/bars.npy       → (fields, symbols, dates) float64, symbol-major
+    <segment>/g<N>/dates.npy, symbols.json, meta.json
+
+Workers memory-map the current generation read-only. Each symbol's bars are one
+contiguous (fields, dates) block, so `frame(symbol)` wraps it in a DataFrame
+without copying. Publishing writes a new generation and swaps the GENERATION
+file atomically; readers pick it up on their next lookup, and the previous
+generation is kept so frames already handed out stay valid.
+
+    python -m TechnicalAnalysis.sharedBars publish          # bar store → segment, once
+    python -m TechnicalAnalysis.sharedBars loader           # refresh + publish on a timer
+    python -m TechnicalAnalysis.sharedBars status
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import datetime as dt
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from . import barStore
+from . import metrics
+
+# ---------- configuration ---------- #
+_DEFAULT_DIR   = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+_SEGMENT_DIR   = os.environ.get("SHARED_BARS_DIR", os.path.join(_DEFAULT_DIR, "smad_bars"))
+_CHECK_SECONDS = float(os.environ.get("SHARED_BARS_CHECK_SECONDS", "1"))  # GENERATION re-read interval
+_KEEP_OLD      = 1                                                      # generations kept for readers
+_LOADER_EVERY  = 3600                                                   # seconds between refreshes
+# ----------------------------------- #
+
+FIELDS = barStore.FIELDS
+_CLOSE = FIELDS.index("close")
+
+
+def current_generation(seg_dir: str = _SEGMENT_DIR) -> Optional[int]:
+    try:
+        with open(os.path.join(seg_dir, "GENERATION"), "r") as fh:
+            return int(fh.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _read_meta(seg_dir: str, generation: int) -> dict:
+    with open(os.path.join(seg_dir, f"g{generation}", "meta.json"), "r") as fh:
+        return json.load(fh)
+
+
+# ------------------------------------------------------------
+# Loader side
+# ------------------------------------------------------------
+def publish(panel: barStore.BarPanel, seg_dir: str = _SEGMENT_DIR) -> int:
+    """Write `panel` as a new generation and make it current; returns the generation."""
+    os.makedirs(seg_dir, exist_ok=True)
+    generation = (current_generation(seg_dir) or 0) + 1
+    path = os.path.join(seg_dir, f"g{generation}")
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+    n_dates, n_symbols = len(panel.dates), len(panel.symbols)
+    bars = np.lib.format.open_memmap(
+        os.path.join(path, "bars.npy"), mode="w+", dtype=np.float64,
+        shape=(len(FIELDS), n_symbols, n_dates),
+    )
+    for i, field in enumerate(FIELDS):
+        bars[i] = np.asarray(panel.fields[field]).T
+    bars.flush()
+    del bars
+    np.save(os.path.join(path, "dates.npy"), panel.dates)
+    with open(os.path.join(path, "symbols.json"), "w") as fh:
+        json.dump(panel.symbols, fh)
+    with open(os.path.join(path, "meta.json"), "w") as fh:
+        json.dump({"generation": generation, "bar_version": panel.version,
+                   "last_date": str(panel.dates[-1]) if n_dates else None,
+                   "published": time.time()}, fh)
+
+    tmp = os.path.join(seg_dir, "GENERATION.tmp")
+    with open(tmp, "w") as fh:
+        fh.write(str(generation))
+    os.replace(tmp, os.path.join(seg_dir, "GENERATION"))
+
+    # Unlinked files stay mapped in workers that still hold them
+    for name in os.listdir(seg_dir):
+        if name.startswith("g") and name[1:].isdigit() and int(name[1:]) < generation - _KEEP_OLD:
+            shutil.rmtree(os.path.join(seg_dir, name), ignore_errors=True)
+    return generation
+
+
+def publish_store(seg_dir: str = _SEGMENT_DIR, store_dir: str = barStore._STORE_DIR) -> Optional[int]:
+    """Publish the current bar store if the segment does not already hold that version."""
+    panel = barStore.load_panel(store_dir)
+    if panel is None:
+        return None
+    generation = current_generation(seg_dir)
+    if generation is not None:
+        try:
+            if _read_meta(seg_dir, generation).get("bar_version") == panel.version:
+                return generation
+        except FileNotFoundError:
+            pass
+    return publish(panel, seg_dir)
+
+
+# ------------------------------------------------------------
+# Worker side
+# ------------------------------------------------------------
+class _Generation:
+    """One mapped generation of the segment."""
+
+    def __init__(self, seg_dir: str, generation: int):
+        path = os.path.join(seg_dir, f"g{generation}")
+        self.generation = generation
+        self.bars = np.load(os.path.join(path, "bars.npy"), mmap_mode="r")
+        dates = np.load(os.path.join(path, "dates.npy"))
+        self.index = pd.DatetimeIndex(dates.astype("datetime64[ns]"), name="ts")
+        with open(os.path.join(path, "symbols.json"), "r") as fh:
+            self.columns = {s: i for i, s in enumerate(json.load(fh))}
+        last = _read_meta(seg_dir, generation).get("last_date")
+        self.last_date: Optional[dt.date] = (
+            dt.date.fromisoformat(last) if last else (self.index[-1].date() if len(self.index) else None)
+        )
+
+
+class SharedBars:
+    """Read-only view of the segment that follows the current generation."""
+
+    def __init__(self, seg_dir: str = _SEGMENT_DIR, check_seconds: float = _CHECK_SECONDS):
+        self.seg_dir = seg_dir
+        self.check_seconds = check_seconds
+        self._current: Optional[_Generation] = None
+        self._checked = float("-inf")
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[_Generation]:
+        """The mapped generation, re-checking GENERATION at most every `check_seconds`."""
+        now = time.monotonic()
+        if now - self._checked < self.check_seconds:
+            return self._current
+        with self._lock:
+            if now - self._checked < self.check_seconds:
+                return self._current
+            generation = current_generation(self.seg_dir)
+            if generation is None:
+                self._current = None
+            elif self._current is None or self._current.generation != generation:
+                try:
+                    self._current = _Generation(self.seg_dir, generation)
+                except FileNotFoundError:
+                    # Swapped again while opening; keep the old mapping until the next check
+                    pass
+            self._checked = now
+        return self._current
+
+    def frame(self, symbol: str) -> Optional[pd.DataFrame]:
+        """
+        One symbol in the `get_price_data` layout, or None when the segment lacks it.
+
+        The DataFrame wraps the mapped memory directly (read-only, no copy) unless
+        the symbol has gaps inside its history, which are dropped.
+        """
+        gen = self.current()
+        col = gen.columns.get(symbol.upper()) if gen is not None else None
+        if col is None:
+            return None
+        block = gen.bars[:, col, :]
+        valid = np.flatnonzero(~np.isnan(block[_CLOSE]))
+        if not len(valid):
+            return None
+        lo, hi = valid[0], valid[-1] + 1
+        df = pd.DataFrame(block[:, lo:hi].T, index=gen.index[lo:hi], columns=list(FIELDS), copy=False)
+        if hi - lo != len(valid):
+            df = df[df["close"].notna()]
+        return df
+
+
+    def last_date(self) -> Optional[dt.date]:
+        """Date of the newest bar in the mapped generation (None without a segment)."""
+        gen = self.current()
+        return gen.last_date if gen is not None else None
+
+
+_reader = SharedBars()
+
+
+def last_date() -> Optional[dt.date]:
+    """`SharedBars.last_date` on the process-wide reader."""
+    return _reader.last_date()
+
+
+def frame(symbol: str) -> Optional[pd.DataFrame]:
+    """`SharedBars.frame` on the process-wide reader."""
+    df = _reader.frame(symbol)
+    metrics.cache_result("shared_bars", hit=df is not None)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the bar store into shared memory")
+    parser.add_argument("command", choices=["publish", "loader", "status"])
+    parser.add_argument("--segment", default=_SEGMENT_DIR)
+    parser.add_argument("--interval", type=float, default=_LOADER_EVERY,
+                        help="Seconds between refreshes in loader mode")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        generation = current_generation(args.segment)
+        if generation is None:
+            print(f"No segment at {args.segment}")
+        else:
+            print(json.dumps(_read_meta(args.segment, generation)))
+        return
+    if args.command == "publish":
+        print(f"Generation {publish_store(args.segment)} at {args.segment}")
+        return
+    while True:
+        barStore.refresh_panel()
+        print(f"Generation {publish_store(args.segment)} at {args.segment}", flush=True)
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
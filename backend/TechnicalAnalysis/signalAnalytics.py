@@ -0,0 +1,126 @@
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from . import barStore
+from . import panelIndicators
+
+# ---------- configuration ---------- #
+_EMA_PERIOD       = 20
+_BB_K             = 2.0
+_SQUEEZE_LOOKBACK = 6
+_HORIZONS         = (1, 3, 5, 10)
+# ----------------------------------- #
+
+SIGNALS = ("Overbought", "Oversold", "Squeeze")
+
+
+def obv_bands(closes, volumes, ema_period: int = _EMA_PERIOD, bb_k: float = _BB_K) -> dict[str, np.ndarray]:
+    """
+    OBV, its EMA and Bollinger bands around that EMA (population stdev of OBV).
+
+    Inputs are (bars,) or (bars, symbols) arrays; the bands are NaN until the
+    first EMA value, exactly like the list version in calculateOBV.
+    """
+    obv = panelIndicators.obv(closes, volumes)
+    obv_ema = panelIndicators.ema(obv, ema_period)
+    sd = panelIndicators.rolling_std(obv, ema_period)
+    return {
+        "obv": obv,
+        "obv_ema": obv_ema,
+        "bb_upper": obv_ema + bb_k * sd,
+        "bb_lower": obv_ema - bb_k * sd,
+    }
+
+
+def obv_signals(bands: dict[str, np.ndarray],
+                squeeze_lookback: int = _SQUEEZE_LOOKBACK) -> dict[str, np.ndarray]:
+    """
+    Boolean masks for each signal, same shape as the bands.
+
+    • Overbought: OBV above the upper band.
+    • Oversold:   OBV below the lower band.
+    • Squeeze:    band width at its minimum over the last `squeeze_lookback` bars.
+    """
+    obv, upper, lower = bands["obv"], bands["bb_upper"], bands["bb_lower"]
+    width = upper - lower
+    rolling_min = (
+        pd.DataFrame(width.reshape(len(width), -1))
+        .rolling(squeeze_lookback, min_periods=1)
+        .min()
+        .to_numpy()
+        .reshape(width.shape)
+    )
+    with np.errstate(invalid="ignore"):
+        overbought = obv > upper
+        oversold = (obv < lower) & ~overbought
+        squeeze = ~np.isnan(width) & (width == rolling_min)
+    return {"Overbought": overbought, "Oversold": oversold, "Squeeze": squeeze}
+
+
+def signal_labels(masks: dict[str, np.ndarray]) -> np.ndarray:
+    """Per-bar labels such as "Overbought & Squeeze" ("" where nothing fired)."""
+    side = np.where(masks["Overbought"], "Overbought", np.where(masks["Oversold"], "Oversold", ""))
+    both = np.char.add(side, np.where(side != "", " & Squeeze", "Squeeze"))
+    return np.where(masks["Squeeze"], both, side)
+
+
+def forward_returns(closes, horizons: Sequence[int] = _HORIZONS) -> np.ndarray:
+    """
+    Simple returns from each bar to `h` bars later, for every horizon at once.
+
+    Returns:
+        Array shaped (len(horizons),) + closes.shape; NaN where the future bar is missing.
+    """
+    c = np.asarray(closes, dtype=np.float64)
+    horizons = np.asarray(horizons, dtype=np.intp)
+    padded = np.concatenate([c, np.full((horizons.max(),) + c.shape[1:], np.nan)])
+    future = padded[np.arange(len(c))[None, :] + horizons[:, None]]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return future / c - 1.0
+
+
+def signal_stats(masks: dict[str, np.ndarray], returns: np.ndarray,
+                 horizons: Sequence[int] = _HORIZONS) -> pd.DataFrame:
+    """
+    Hit rate and mean forward return per signal and horizon, pooled over all symbols.
+
+    Returns:
+        A DataFrame indexed by signal with `count`, then `hit_rate_{h}d` and
+        `mean_ret_{h}d` for every horizon.
+    """
+    rows = {}
+    valid = ~np.isnan(returns)
+    positive = np.nan_to_num(returns) > 0
+    filled = np.nan_to_num(returns)
+    for name, mask in masks.items():
+        sel = mask[None] & valid
+        n = sel.sum(axis=tuple(range(1, sel.ndim)))
+        hits = (sel & positive).sum(axis=tuple(range(1, sel.ndim)))
+        total = np.where(sel, filled, 0.0).sum(axis=tuple(range(1, sel.ndim)))
+        row = {"count": int(mask.sum())}
+        for k, h in enumerate(horizons):
+            row[f"hit_rate_{h}d"] = hits[k] / n[k] if n[k] else np.nan
+            row[f"mean_ret_{h}d"] = total[k] / n[k] if n[k] else np.nan
+        rows[name] = row
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def analyze_panel(panel: barStore.BarPanel, symbols: Optional[Sequence[str]] = None,
+                  horizons: Sequence[int] = _HORIZONS) -> pd.DataFrame:
+    """Evaluate the OBV signals over many symbols of the bar store in one pass."""
+    cols = panel.columns(symbols) if symbols is not None else slice(None)
+    closes = panel["close"][:, cols]
+    volumes = panel["volume"][:, cols]
+    masks = obv_signals(obv_bands(closes, volumes))
+    return signal_stats(masks, forward_returns(closes, horizons), horizons)
+
+
+if __name__ == "__main__":
+    panel = barStore.load_panel()
+    if panel is None:
+        print("The bar store is empty; run `python -m TechnicalAnalysis.screener --refresh` first.")
+    else:
+        print(f"OBV signals over {len(panel.symbols)} symbols, {len(panel.dates)} bars")
+        print(analyze_panel(panel).to_string(float_format=lambda v: f"{v:.4f}"))
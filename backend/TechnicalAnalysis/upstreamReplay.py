@@ -0,0 +1,260 @@
+"""
+Record upstream HTTP responses to a cassette and replay them offline.
+
+Both the Polygon RESTClient and `requests` (NewsAPI, SEC, the raw Polygon call
+in calculateAdTest) send through urllib3's HTTPConnectionPool.urlopen, so
+patching that one method covers every data path in the backend.
+
+Modes (UPSTREAM_MODE, or the `mode` argument):
+• live   — no patching (default).
+• record — go to the network and append every response to the cassette.
+• replay — serve only from the cassette; an unknown request raises CassetteMiss.
+• auto   — replay what the cassette has, record the rest.
+
+Cassettes are gzip'd JSON lines (one response per line, appended as they are
+recorded). Requests are keyed by method, path, sorted query (API keys removed)
+and a hash of the body, so the same request replays the same bytes.
+
+    python -m TechnicalAnalysis.upstreamReplay serve cassettes/upstream.jsonl.gz --port 8765
+
+starts a local stand-in that answers from a cassette; point NEWS_API_URL or
+POLYGON_API_BASE at it to run another process offline.
+"""
+import io
+import os
+import gzip
+import json
+import base64
+import hashlib
+import argparse
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from urllib3 import connectionpool
+from urllib3._collections import HTTPHeaderDict
+from urllib3.response import HTTPResponse
+
+# ---------- configuration ---------- #
+_MODE          = os.environ.get("UPSTREAM_MODE", "live")
+_CASSETTE      = os.environ.get("UPSTREAM_CASSETTE", os.path.join("cassettes", "upstream.jsonl.gz"))
+_SECRET_PARAMS = {"apikey", "api_key", "apiKey", "token", "access_token"}
+_DROP_HEADERS  = {"content-encoding", "transfer-encoding", "content-length", "connection", "set-cookie"}
+# ----------------------------------- #
+
+MODES = ("live", "record", "replay", "auto")
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a request the cassette has no response for."""
+
+
+def request_key(method: str, url: str, body=None) -> str:
+    """Host-independent key: METHOD /path?sorted-query-without-secrets [#body-hash]."""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k not in _SECRET_PARAMS)
+    key = f"{method.upper()} {parts.path or '/'}"
+    if query:
+        key += "?" + urlencode(query)
+    if body:
+        data = body if isinstance(body, bytes) else str(body).encode()
+        key += "#" + hashlib.sha1(data).hexdigest()[:16]
+    return key
+
+
+class Cassette:
+    """Recorded responses by request key; repeated keys replay in recording order."""
+
+    def __init__(self, path: str = _CASSETTE):
+        self.path = path
+        self._entries: dict[str, list[dict]] = defaultdict(list)
+        self._cursor: dict[str, int] = {}
+        self._lock = threading.Lock()
+        if os.path.isfile(path):
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]].append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._entries.values())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def next(self, key: str) -> Optional[dict]:
+        """The next recorded response for `key`; the last one repeats once exhausted."""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = min(i + 1, len(entries) - 1)
+            return entries[i]
+
+    def add(self, key: str, method: str, url: str, status: int, reason: str,
+            headers: dict, body: bytes) -> dict:
+        entry = {"key": key, "method": method, "url": _redact(url), "status": status,
+                 "reason": reason, "headers": headers}
+        try:
+            entry["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_b64"] = base64.b64encode(body).decode("ascii")
+        with self._lock:
+            self._entries[key].append(entry)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Each append is its own gzip member; gzip.open reads them back as one stream
+            with gzip.open(self.path, "at", encoding="utf-8") as fh:
+                fh.write(json.dumps(entry) + "\n")
+        return entry
+
+
+def _redact(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(k, "REDACTED" if k in _SECRET_PARAMS else v)
+             for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+    return parts._replace(query=urlencode(query)).geturl()
+
+
+def entry_body(entry: dict) -> bytes:
+    if "body_b64" in entry:
+        return base64.b64decode(entry["body_b64"])
+    return entry.get("body", "").encode("utf-8")
+
+
+def _to_response(entry: dict, method: str, preload_content: bool) -> HTTPResponse:
+    body = entry_body(entry)
+    headers = HTTPHeaderDict(entry["headers"])
+    headers["Content-Length"] = str(len(body))
+    return HTTPResponse(
+        body=io.BytesIO(body), headers=headers, status=entry["status"],
+        reason=entry.get("reason"), preload_content=preload_content,
+        decode_content=False, request_method=method,
+    )
+
+
+# ------------------------------------------------------------
+# urllib3 patch
+# ------------------------------------------------------------
+_original_urlopen = connectionpool.HTTPConnectionPool.urlopen
+_active: Optional[tuple[str, Cassette]] = None
+
+
+def _patched_urlopen(pool, method, url, body=None, headers=None, *args, **kwargs):
+    mode, cassette = _active
+    full_url = url if "://" in url else f"{pool.scheme}://{pool.host}:{pool.port}{url}"
+    key = request_key(method, full_url, body)
+    preload = kwargs.get("preload_content", True)
+
+    if mode in ("replay", "auto"):
+        entry = cassette.next(key)
+        if entry is not None:
+            return _to_response(entry, method, preload)
+        if mode == "replay":
+            raise CassetteMiss(f"No recorded response for {key} in {cassette.path}")
+
+    kwargs["preload_content"] = False
+    kwargs["decode_content"] = True
+    resp = _original_urlopen(pool, method, url, body, headers, *args, **kwargs)
+    try:
+        data = resp.read(decode_content=True)
+    finally:
+        resp.release_conn()
+    kept = {k: v for k, v in resp.headers.items() if k.lower() not in _DROP_HEADERS}
+    entry = cassette.add(key, method, full_url, resp.status, resp.reason or "", kept, data)
+    return _to_response(entry, method, preload)
+
+
+def install(mode: str = _MODE, path: str = _CASSETTE) -> Optional[Cassette]:
+    """Route all urllib3 traffic through `path` in `mode`; returns the cassette (None when live)."""
+    global _active
+    if mode not in MODES:
+        raise ValueError(f"UPSTREAM_MODE must be one of {', '.join(MODES)}, got '{mode}'")
+    if mode == "live":
+        uninstall()
+        return None
+    cassette = Cassette(path)
+    _active = (mode, cassette)
+    connectionpool.HTTPConnectionPool.urlopen = _patched_urlopen
+    return cassette
+
+
+def uninstall() -> None:
+    global _active
+    connectionpool.HTTPConnectionPool.urlopen = _original_urlopen
+    _active = None
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = "replay"):
+    """Temporarily record/replay, e.g. around a backtest or benchmark."""
+    global _active
+    previous = _active
+    cassette = install(mode, path)
+    try:
+        yield cassette
+    finally:
+        if previous is None:
+            uninstall()
+        else:
+            _active = previous
+            connectionpool.HTTPConnectionPool.urlopen = _patched_urlopen
+
+
+# ------------------------------------------------------------
+# Local stand-in server
+# ------------------------------------------------------------
+def make_server(cassette: Cassette, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """HTTP server that answers every request from `cassette` (404 when unknown)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _answer(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else None
+            entry = cassette.next(request_key(self.command, self.path, body))
+            if entry is None:
+                payload = json.dumps({"status": "error", "message": f"Not in cassette: {self.path}"}).encode()
+                self.send_response(404)
+                self.send_header("Content-Type", "application/json")
+            else:
+                payload = entry_body(entry)
+                self.send_response(entry["status"], entry.get("reason") or None)
+                for k, v in entry["headers"].items():
+                    self.send_header(k, v)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = _answer
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a recorded upstream cassette over HTTP")
+    parser.add_argument("command", choices=["serve", "list"])
+    parser.add_argument("cassette", nargs="?", default=_CASSETTE)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    cassette = Cassette(args.cassette)
+    if args.command == "list":
+        for key, entries in sorted(cassette._entries.items()):
+            print(f"{len(entries):>3}  {key}")
+        return
+    server = make_server(cassette, args.host, args.port)
+    print(f"Replaying {len(cassette)} responses from {args.cassette} on http://{args.host}:{server.server_port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Flask layer: JSON serialization in HelloWorld.get and full requests through the test client."""
+import json
+
+import pytest
+
+import main
+from TechnicalAnalysis import callClosingPrices
+
+# A real /tickers payload is ~500 daily bars; the larger case shows how serialization scales
+API_SIZES = (500, 100_000)
+
+
+@pytest.fixture
+def price_data(monkeypatch, bars_factory):
+    """Serve synthetic bars from get_price_data instead of Polygon/disk."""
+    def use(n: int):
+        frame = bars_factory(n)
+        monkeypatch.setattr(callClosingPrices, "get_price_data", lambda symbol="AAPL": frame)
+    return use
+
+
+@pytest.mark.parametrize("bars", API_SIZES)
+@pytest.mark.benchmark(group="api")
+def bench_hello_world_serialization(benchmark, price_data, bars):
+    price_data(bars)
+    resource = main.HelloWorld()
+    body = benchmark(lambda: json.dumps(resource.get("aapl")))
+    assert body.startswith('{"ticker": "AAPL"')
+
+
+@pytest.mark.parametrize("bars", API_SIZES)
+@pytest.mark.benchmark(group="api")
+def bench_tickers_request(benchmark, price_data, bars):
+    price_data(bars)
+    client = main.app.test_client()
+    response = benchmark(client.get, "/tickers/aapl")
+    assert response.status_code == 200
@@ -0,0 +1,114 @@
+"""Indicator hot paths, list-based and array-based, on 1k … 10M synthetic bars."""
+import numpy as np
+import pytest
+
+from conftest import SIZES
+
+from TechnicalAnalysis import calculateEma
+from TechnicalAnalysis import calculateRSI
+from TechnicalAnalysis import calculateOBV
+from TechnicalAnalysis import calculateAD
+from TechnicalAnalysis import calculateAdTest
+from TechnicalAnalysis import calculateMACD
+from TechnicalAnalysis import panelIndicators
+from TechnicalAnalysis import signalAnalytics
+
+sizes = pytest.mark.parametrize("bars", SIZES)
+
+
+@sizes
+@pytest.mark.benchmark(group="ema")
+def bench_get_ema_list(benchmark, bars_factory, bars):
+    closes = bars_factory(bars)["close"].tolist()
+    result = benchmark(calculateEma.get_ema_list, closes, 50)
+    assert len(result) == bars - 49
+
+
+@sizes
+@pytest.mark.benchmark(group="ema")
+def bench_panel_ema(benchmark, bars_factory, bars):
+    closes = bars_factory(bars)["close"].to_numpy()
+    result = benchmark(panelIndicators.ema, closes, 50)
+    assert result.shape == closes.shape
+
+
+@sizes
+@pytest.mark.benchmark(group="rsi")
+def bench_calculate_rsi(benchmark, bars_factory, bars):
+    closes = bars_factory(bars)["close"].tolist()
+    result = benchmark(calculateRSI.calculate_rsi, closes, 14)
+    assert len(result) == bars
+
+
+@sizes
+@pytest.mark.benchmark(group="rsi")
+def bench_calculate_sma_of_rsi(benchmark, bars_factory, bars):
+    rsi = calculateRSI.calculate_rsi(bars_factory(bars)["close"].tolist(), 14)
+    result = benchmark(calculateRSI.calculate_sma, rsi, 9)
+    assert len(result) == bars
+
+
+@sizes
+@pytest.mark.benchmark(group="obv")
+def bench_compute_obv(benchmark, bars_factory, bars):
+    df = bars_factory(bars)
+    closes, volumes = df["close"].tolist(), df["volume"].tolist()
+    result = benchmark(calculateOBV.compute_obv, closes, volumes)
+    assert len(result) == bars
+
+
+@sizes
+@pytest.mark.benchmark(group="obv")
+def bench_obv_bollinger_signals(benchmark, bars_factory, bars):
+    df = bars_factory(bars)
+    closes, volumes = df["close"].to_numpy(), df["volume"].to_numpy()
+
+    def run():
+        masks = signalAnalytics.obv_signals(signalAnalytics.obv_bands(closes, volumes))
+        return signalAnalytics.signal_labels(masks)
+
+    result = benchmark(run)
+    assert len(result) == bars
+
+
+@sizes
+@pytest.mark.benchmark(group="adl")
+def bench_calculate_adl(benchmark, bars_factory, bars):
+    df = bars_factory(bars)
+    result = benchmark(calculateAdTest.calculate_adl, df)
+    assert "adl" in result and "adl" not in df
+
+
+def _adl_rows(bars_factory):
+    df = bars_factory(1_000).copy()
+    df.iloc[500, df.columns.get_loc("high")] = np.nan
+    return df, df[["high", "low", "close", "volume"]].to_numpy().tolist()
+
+
+def _stream_adl(rows):
+    state = calculateAD.ADLState()
+    return [state.update(*row) for row in rows]
+
+
+@pytest.mark.benchmark(group="adl")
+def bench_adl_state_stream(benchmark, bars_factory):
+    _, rows = _adl_rows(bars_factory)
+    benchmark(_stream_adl, rows)
+
+
+def test_adl_state_matches_batch(bars_factory):
+    df, rows = _adl_rows(bars_factory)
+    streamed = _stream_adl(rows)
+    batch = calculateAD.calculateAD(df)
+    ok = ~np.isnan(batch["adl"].to_numpy())
+    assert np.allclose(np.array([a for a, _ in streamed])[ok], batch["adl"].to_numpy()[ok])
+    chaikin = np.array([np.nan if c is None else c for _, c in streamed])
+    assert np.allclose(chaikin, batch["chaikin"].to_numpy(), equal_nan=True)
+
+
+@sizes
+@pytest.mark.benchmark(group="macd")
+def bench_calculate_macd(benchmark, bars_factory, bars):
+    df = bars_factory(bars)
+    result = benchmark(calculateMACD.calculate_macd, df)
+    assert len(result) == bars
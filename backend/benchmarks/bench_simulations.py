@@ -0,0 +1,20 @@
+"""Monte Carlo portfolio simulations from "Sentiment Analysis/Monte_Carlo_Simulations.py"."""
+import os
+import random
+
+import pytest
+
+from conftest import BACKEND_DIR, SIZES, load_functions
+
+_MONTE_CARLO = load_functions(
+    os.path.join(BACKEND_DIR, "Sentiment Analysis", "Monte_Carlo_Simulations.py"),
+    {"port_end_value", "port_end_value_simulations"},
+)
+
+
+@pytest.mark.parametrize("n_iter", SIZES)
+@pytest.mark.benchmark(group="monte_carlo")
+def bench_port_end_value_simulations(benchmark, n_iter):
+    random.seed(25)
+    result = benchmark(_MONTE_CARLO["port_end_value_simulations"], n_iter=n_iter)
+    assert len(result) == n_iter
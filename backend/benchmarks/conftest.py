@@ -0,0 +1,94 @@
+"""
+Shared fixtures for the benchmark suite.
+
+Everything runs on synthetic OHLCV data generated from a fixed seed, so results
+are comparable across machines and commits and nothing touches the network.
+
+    pip install ".[bench]"
+    python -m pytest                          # sizes up to 1M bars, autosaved to .benchmarks/
+    BENCH_MAX_BARS=10000000 python -m pytest  # include the 10M-bar cases
+    python -m pytest --benchmark-compare      # compare against the last saved run
+"""
+import ast
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# ---------- configuration ---------- #
+SIZES          = (1_000, 100_000, 1_000_000, 10_000_000)
+_DEFAULT_MAX   = 1_000_000                   # override with BENCH_MAX_BARS
+_SEED          = 25
+_SKIP_IMPORTS  = {"IPython", "matplotlib"}   # display-only imports in notebook scripts
+# ----------------------------------- #
+
+
+def pytest_collection_modifyitems(config, items):
+    max_bars = int(os.environ.get("BENCH_MAX_BARS", _DEFAULT_MAX))
+    skip = pytest.mark.skip(reason=f"more than BENCH_MAX_BARS={max_bars} bars")
+    for item in items:
+        params = item.callspec.params if hasattr(item, "callspec") else {}
+        size = params.get("bars") or params.get("n_iter")
+        if size and size > max_bars:
+            item.add_marker(skip)
+
+
+def make_bars(n: int, seed: int = _SEED) -> pd.DataFrame:
+    """Geometric random walk in the `callClosingPrices.get_price_data` layout."""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, n)))
+    spread = close * rng.uniform(0.0, 0.02, n)
+    low = close - spread * rng.uniform(0.0, 1.0, n)
+    high = low + spread
+    open_ = low + spread * rng.uniform(0.0, 1.0, n)
+    volume = rng.integers(100_000, 5_000_000, n).astype(np.float64)
+    index = pd.date_range("1990-01-01", periods=n, freq="min", name="ts")
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close,
+         "volume": volume, "vwap": (high + low + close) / 3.0},
+        index=index,
+    )
+
+
+_bars_cache: dict[int, pd.DataFrame] = {}
+
+
+@pytest.fixture(scope="session")
+def bars_factory():
+    """bars_factory(n) → cached synthetic frame with n bars (callers must not modify it)."""
+    def factory(n: int) -> pd.DataFrame:
+        if n not in _bars_cache:
+            _bars_cache[n] = make_bars(n)
+        return _bars_cache[n]
+    return factory
+
+
+def load_functions(path: str, names: set) -> dict:
+    """
+    Definitions of `names` from a notebook-style script, without running its top level.
+
+    Used for scripts such as "Sentiment Analysis/Monte_Carlo_Simulations.py" that
+    plot and display on import and live in a folder that is not a package.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        tree = ast.parse(fh.read(), filename=path)
+
+    def wanted(node):
+        if isinstance(node, ast.FunctionDef):
+            return node.name in names
+        if isinstance(node, ast.Import):
+            return not any(a.name.split(".")[0] in _SKIP_IMPORTS for a in node.names)
+        if isinstance(node, ast.ImportFrom):
+            return (node.module or "").split(".")[0] not in _SKIP_IMPORTS
+        return False
+
+    tree.body = [node for node in tree.body if wanted(node)]
+    namespace: dict = {}
+    exec(compile(tree, path, "exec"), namespace)
+    return namespace
@@ -1,13 +1,32 @@
-from flask import Flask, Response
-from flask_restful import Resource, Api
+from flask import Flask, Response, request
+from flask_restful import Resource, Api, abort
 from flask_cors import CORS
+import numpy as np
+import requests
 
 from TechnicalAnalysis import callClosingPrices
 from TechnicalAnalysis import calculateEma
+from TechnicalAnalysis import calculateAD
+from TechnicalAnalysis import calculateMACD
+from TechnicalAnalysis import indicatorGraph
+from TechnicalAnalysis import barStore
+from TechnicalAnalysis import chartService
+from TechnicalAnalysis import correlations
+from TechnicalAnalysis import dashboardSnapshot
+from TechnicalAnalysis import metrics
+from TechnicalAnalysis import profiling
+from TechnicalAnalysis import upstreamReplay
+from TechnicalAnalysis import screener
+from Random import modelRegistry
+from Random import tickerUniverse
+
+upstreamReplay.install()
 
 app = Flask(__name__)
 api = Api(app)
 CORS(app)
+metrics.init_app(app)
+profiling.init_app(app)
 
 
 
@@ -15,12 +34,14 @@ CORS(app)
 class HelloWorld(Resource):
     def get(self, ticker: str):
         new_ticker = ticker.upper()
-        closing_prices = callClosingPrices.get_price_data(new_ticker)
-
+        with metrics.timer('tickers.price_data'):
+            closing_prices = callClosingPrices.get_price_data(new_ticker)
+        with metrics.timer('tickers.to_dict'):
+            records = closing_prices.to_dict(orient='records')
 
         return {
             'ticker': new_ticker,
-            'closingPrices': closing_prices.to_dict(orient='records'),
+            'closingPrices': records,
         }
 
 class EMA(Resource):
@@ -34,8 +55,276 @@ class EMA(Resource):
             'emaValue': emaVal.to_dict(orient='records'),
         }
 
+class ADL(Resource):
+    def get(self, ticker: str):
+        new_ticker = ticker.upper()
+        fast = request.args.get('fast', 3, type=int)
+        slow = request.args.get('slow', 10, type=int)
+        if not 0 < fast < slow:
+            abort(400, message='Expected 0 < fast < slow')
+
+        ad = calculateAD.calculateAD(callClosingPrices.get_price_data(new_ticker), fast, slow)
+        ad = ad[['adl', 'chaikin']].astype(object).where(ad[['adl', 'chaikin']].notna(), None)
+
+        return {
+            'ticker': new_ticker,
+            'adl': [
+                {'date': ts.strftime('%Y-%m-%d'), 'adl': row.adl, 'chaikin': row.chaikin}
+                for ts, row in zip(ad.index, ad.itertuples(index=False))
+            ],
+        }
+
+def _macd_spans():
+    spans = tuple(request.args.get(k, d, type=int) for k, d in (('fast', 12), ('slow', 26), ('signal', 9)))
+    if not (0 < spans[0] < spans[1] and spans[2] > 0):
+        abort(400, message='Expected 0 < fast < slow and signal > 0')
+    return spans
+
+class MACD(Resource):
+    def get(self, ticker: str):
+        new_ticker = ticker.upper()
+        spans = _macd_spans()
+        data = calculateMACD.fetch_last_year_data(new_ticker)
+        macd = calculateMACD.calculate_macd(data, *spans)
+
+        return {
+            'ticker': new_ticker,
+            'macd': [
+                {'date': ts.strftime('%Y-%m-%d'), **dict(zip(('macd', 'signal', 'histogram'), _json_values(row)))}
+                for ts, row in zip(macd.index, macd.itertuples(index=False))
+            ],
+        }
+
+class MACDLatest(Resource):
+    def get(self):
+        spans = _macd_spans()
+        panel = barStore.load_panel()
+        if panel is None:
+            abort(503, message='The bar store is empty')
+        symbols = [s for s in request.args.get('symbols', '').upper().split(',') if s]
+        missing = [s for s in symbols if s not in panel]
+        if not symbols or missing:
+            abort(400, message=f"Unknown symbols: {', '.join(missing)}" if missing else 'Pass ?symbols=AAPL,MSFT')
+
+        macd = calculateMACD.macd_panel(panel, symbols, *spans)
+        latest = {k: v[-1] for k, v in macd.items()}
+        return {
+            'date': str(panel.dates[-1]),
+            'macd': [
+                {'ticker': s, **{k.lower(): (None if np.isnan(v[i]) else float(v[i])) for k, v in latest.items()}}
+                for i, s in enumerate(symbols)
+            ],
+        }
+
+def _indicator_names():
+    try:
+        return indicatorGraph.parse_names(request.args.get('names', ''))
+    except indicatorGraph.IndicatorError as e:
+        abort(400, message=str(e))
+
+def _json_values(values):
+    return [None if np.isnan(v) else float(v) for v in values]
+
+class Indicators(Resource):
+    def get(self, ticker: str):
+        new_ticker = ticker.upper()
+        names = _indicator_names()
+        graph = indicatorGraph.for_symbol(new_ticker)
+        values = graph.compute(names)
+
+        return {
+            'ticker': new_ticker,
+            'dates': [ts.strftime('%Y-%m-%d') for ts in graph.index],
+            'indicators': {name: _json_values(values[name]) for name in names},
+        }
+
+class IndicatorsLatest(Resource):
+    def get(self):
+        names = _indicator_names()
+        panel = barStore.load_panel()
+        if panel is None:
+            abort(503, message='The bar store is empty')
+        symbols = [s for s in request.args.get('symbols', '').upper().split(',') if s]
+        missing = [s for s in symbols if s not in panel]
+        if not symbols or missing:
+            abort(400, message=f"Unknown symbols: {', '.join(missing)}" if missing else 'Pass ?symbols=AAPL,MSFT')
+
+        values = indicatorGraph.latest(panel, symbols, names)
+        latest = {name: _json_values(values[name]) for name in names}
+        return {
+            'date': str(panel.dates[-1]),
+            'indicators': [
+                {'ticker': s, **{name: v[i] for name, v in latest.items()}}
+                for i, s in enumerate(symbols)
+            ],
+        }
+
+class Hedges(Resource):
+    def get(self, ticker: str):
+        k = min(max(request.args.get('k', 5, type=int), 1), 20)
+        try:
+            return correlations.get_correlations().hedges(ticker, k)
+        except correlations.CorrelationError as e:
+            abort(404, message=str(e))
+
+def _predictions(predictor, scores):
+    signals = predictor.signals(scores)
+    return [
+        {'score': None if np.isnan(v) else float(v),
+         'signal': None if signals is None or np.isnan(v) else bool(signals[i])}
+        for i, v in enumerate(scores)
+    ]
+
+def _predictor(name):
+    try:
+        return modelRegistry.get_predictor(name)
+    except modelRegistry.ModelNotFound as e:
+        abort(404, message=str(e))
+
+class Predict(Resource):
+    def get(self):
+        predictor = _predictor(request.args.get('model', ''))
+        default = ','.join(predictor.spec.get('data', {}).get('targets', []))
+        symbols = [s for s in request.args.get('symbols', default).upper().split(',') if s]
+        if not symbols:
+            abort(400, message='Pass ?symbols=NVDA')
+
+        try:
+            X, dates = modelRegistry.latest_features(predictor.spec, symbols)
+        except modelRegistry.ModelError as e:
+            abort(400, message=str(e))
+        complete = ~np.isnan(X).any(axis=1)
+        scores = np.full(len(symbols), np.nan)
+        if complete.any():
+            scores[complete] = predictor.predict(X[complete])
+
+        return {
+            'model': predictor.name,
+            'version': predictor.version,
+            'threshold': predictor.threshold,
+            'predictions': [
+                {'ticker': s, 'date': None if np.isnat(d) else str(d), **p}
+                for s, d, p in zip(symbols, dates, _predictions(predictor, scores))
+            ],
+        }
+
+    def post(self):
+        body = request.get_json(silent=True) or {}
+        predictor = _predictor(body.get('model', ''))
+        try:
+            with np.errstate(over='ignore'):
+                X = np.asarray(body.get('rows') or [], dtype=np.float32)
+        except (TypeError, ValueError):
+            abort(400, message='rows must be a list of numeric feature rows')
+        if X.ndim != 2 or not len(X) or not np.isfinite(X).all():
+            abort(400, message=f"Pass rows of {len(predictor.features)} numbers: {', '.join(predictor.features)}")
+
+        try:
+            scores = predictor.predict(X)
+        except modelRegistry.ModelError as e:
+            abort(400, message=str(e))
+
+        return {
+            'model': predictor.name,
+            'version': predictor.version,
+            'threshold': predictor.threshold,
+            'predictions': _predictions(predictor, scores),
+        }
+
+class Chart(Resource):
+    def get(self, chart: str):
+        fmt = request.args.get('format', 'png')
+        try:
+            params = chartService.parse_params(chart, request.args)
+            key, load = chartService.key(chart, params, fmt)
+            if request.if_none_match.contains(key):
+                return Response(status=304)
+            body = chartService.body(chart, key, load, fmt)
+        except LookupError as e:
+            abort(404, message=str(e))
+        except chartService.ChartError as e:
+            abort(400, message=str(e))
+
+        response = Response(body, mimetype=chartService.FORMATS[fmt])
+        response.set_etag(key)
+        response.cache_control.public = True
+        response.cache_control.max_age = 300
+        return response
+
+class Dashboard(Resource):
+    def get(self):
+        try:
+            symbols, columns = dashboardSnapshot.parse_request(
+                request.args.get('symbols', ''), request.args.get('columns', ''))
+        except ValueError as e:
+            abort(400, message=str(e))
+        try:
+            snapshot = dashboardSnapshot.get_snapshot()
+        except dashboardSnapshot.SnapshotError as e:
+            abort(503, message=str(e))
+
+        tag = dashboardSnapshot.etag(snapshot, symbols, columns)
+        if request.if_none_match.contains(tag):
+            return Response(status=304)
+        found, rows = snapshot.rows(symbols, columns)
+        present = set(found)
+        payload = {
+            'date': snapshot.date,
+            'columns': columns,
+            'symbols': found,
+            'rows': rows,
+            'missing': [s for s in symbols if s not in present],
+        }
+        return payload, 200, {'ETag': f'"{tag}"', 'Cache-Control': 'no-cache'}
+
+class UniverseSearch(Resource):
+    def get(self):
+        query = request.args.get('q', '')
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+
+        try:
+            index = tickerUniverse.get_index()
+        except requests.RequestException as e:
+            abort(503, message=f'The SEC ticker list is unavailable: {e}')
+
+        return {
+            'query': query,
+            'results': index.search(query, limit),
+        }
+
+class Screen(Resource):
+    def get(self):
+        expression = request.args.get('filter', '')
+        sort = request.args.get('sort') or None
+        limit = request.args.get('limit', 100, type=int)
+        descending = request.args.get('order', 'asc') == 'desc'
+
+        try:
+            rows = screener.get_screener().screen(
+                expression, sort=sort, descending=descending, limit=limit
+            )
+        except screener.ScreenError as e:
+            abort(400, message=str(e))
+
+        return {
+            'filter': expression,
+            'count': len(rows),
+            'symbols': rows,
+        }
+
 api.add_resource(HelloWorld, '/tickers/<string:ticker>')
 api.add_resource(EMA, '/ema/<string:ema>')
+api.add_resource(ADL, '/adl/<string:ticker>')
+api.add_resource(MACD, '/macd/<string:ticker>')
+api.add_resource(MACDLatest, '/macd')
+api.add_resource(Indicators, '/indicators/<string:ticker>')
+api.add_resource(IndicatorsLatest, '/indicators')
+api.add_resource(Hedges, '/hedges/<string:ticker>')
+api.add_resource(Predict, '/predict')
+api.add_resource(Chart, '/charts/<string:chart>')
+api.add_resource(Dashboard, '/dashboard')
+api.add_resource(UniverseSearch, '/universe/search')
+api.add_resource(Screen, '/screen')
 
 if __name__ == '__main__':
     app.run(
@@ -1,7 +1,28 @@
 import React, { useEffect, useState } from "react";
 import { configs } from "./lib/configs";
 
+// The dashboard snapshot carries an ETag, so the browser revalidates with
+// If-None-Match and a repeat visit is answered with a 304
+const fetchDashboardClose = async (ticker: string) => {
+  const r = await fetch(
+    `${configs.BACKEND}/dashboard?symbols=${encodeURIComponent(ticker)}&columns=close`
+  );
+
+  if (r.status !== 200) {
+    return undefined;
+  }
+
+  const a = await r.json();
+  return a?.rows?.[0]?.[a.columns.indexOf("close")] ?? undefined;
+};
+
 const fetchTickerData = async (ticker: string) => {
+  // Symbols outside the bar store (or an empty store) fall back to the full price history
+  const price = await fetchDashboardClose(ticker).catch(() => undefined);
+  if (price !== undefined) {
+    return { price };
+  }
+
   const r = await fetch(`${configs.BACKEND}/tickers/${ticker}`);
 
   if (r.status !== 200) {
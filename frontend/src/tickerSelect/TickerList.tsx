@@ -19,12 +19,12 @@ export const SelectTickerList = ({
       <button
         onClick={() => {
           setTicker({
-            name: item.Item.title,
-            ticker: item.Item.ticker,
+            name: item.title,
+            ticker: item.ticker,
           });
         }}
       >
-        <TickerCard name={item.Item.title} ticker={item.Item.ticker} />
+        <TickerCard name={item.title} ticker={item.ticker} />
       </button>
     );
   });
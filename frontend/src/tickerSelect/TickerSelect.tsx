@@ -1,6 +1,7 @@
 import { useState } from "react";
-import { TickerZodObject, tickerZodObject } from "./tickersZodObject";
+import { TickerZodObject, tickerSearchZodObject } from "./tickersZodObject";
 import { SelectTickerList } from "./TickerList";
+import { configs } from "../lib/configs";
 import "./TickerSelect.css";
 
 export const TickerSelect = ({
@@ -18,12 +19,12 @@ export const TickerSelect = ({
   const searchTickerList = async (event: React.FormEvent<HTMLInputElement>) => {
     const currentSearchTerm = event.currentTarget.value;
     const values = await fetch(
-      `https://tickers.penylo.dev/v2/search?q=${currentSearchTerm}`,
+      `${configs.BACKEND}/universe/search?q=${encodeURIComponent(currentSearchTerm)}`,
     );
     console.info(values);
-    const zodParse = tickerZodObject.safeParse(await values.json());
+    const zodParse = tickerSearchZodObject.safeParse(await values.json());
     if (!zodParse.error) {
-      setTickerList(zodParse.data);
+      setTickerList(zodParse.data.results);
     }
   };
 
@@ -2,12 +2,15 @@ import { z } from "zod";
 
 export const tickerZodObject = z.array(
   z.object({
-    Item: z.object({
-      cik_str: z.number(),
-      ticker: z.string(),
-      title: z.string(),
-    }),
+    cik_str: z.number(),
+    ticker: z.string(),
+    title: z.string(),
   }),
 );
 
+export const tickerSearchZodObject = z.object({
+  query: z.string(),
+  results: tickerZodObject,
+});
+
 export type TickerZodObject = z.infer<typeof tickerZodObject>;